@@ -0,0 +1,207 @@
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Zuschlag auf die geschätzte Ausgabegröße (Container-Overhead, Schätzfehler)
+SIZE_ESTIMATE_MARGIN = 1.1
+
+# Verhältnis H.264/Quelle bei gleicher Qualität (CRF 23) je nach Quell-Codec
+CODEC_SIZE_FACTORS = {
+    "hevc": 1.6,
+    "av1": 1.8,
+    "vp9": 1.5,
+    "h264": 1.0
+}
+
+# Mindestzuwachs an Durchsatz, damit ein weiterer paralleler Job als lohnend gilt
+THROUGHPUT_GAIN_THRESHOLD = 1.1
+
+# Nach dieser Zeit mit gesenktem Job-Limit wird wieder ein weiterer paralleler Job versucht
+LIMIT_RECOVERY_INTERVAL_S = 60.0
+
+
+def estimate_output_bytes(video_info: dict, source_size: int, crf: int,
+                          rate_control: str = "crf", bitrate_k: int = 0) -> int:
+    """Schätzt die Ausgabegröße aus Bitrate und Laufzeit der Quelle sowie CRF bzw. Zielbitrate"""
+    duration = video_info.get('duration', 0)
+    if rate_control != "crf" and bitrate_k > 0 and duration > 0:
+        estimate = bitrate_k * 1000 / 8 * duration
+    else:
+        source_bytes = source_size
+        if video_info.get('bit_rate') and duration > 0:
+            source_bytes = video_info['bit_rate'] / 8 * duration
+        factor = CODEC_SIZE_FACTORS.get(video_info.get('codec_name', ''), 1.2)
+        # Jede Erhöhung um 6 CRF-Stufen halbiert etwa die Bitrate
+        estimate = source_bytes * factor * 2 ** ((23 - crf) / 6)
+    return int(estimate * SIZE_ESTIMATE_MARGIN)
+
+
+def measure_write_throughput(directory: str, size_mb: int = 32) -> float:
+    """Misst den Schreibdurchsatz eines Verzeichnisses in MB/s"""
+    os.makedirs(directory, exist_ok=True)
+    test_file = os.path.join(directory, f".h264_write_test_{os.getpid()}")
+    block = os.urandom(1024 * 1024)
+    try:
+        start = time.perf_counter()
+        with open(test_file, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        elapsed = time.perf_counter() - start
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+    return size_mb / max(elapsed, 1e-6)
+
+
+class AdmissionController:
+    """Lässt Jobs nur starten, wenn Speicherplatz reserviert ist und weitere Parallelität Durchsatz bringt"""
+
+    def __init__(self, max_jobs: int = 1, safety_margin_mb: int = 1024,
+                 sample_interval_s: float = 2.0, log_callback=None,
+                 throughput_cache: Optional[Dict[str, float]] = None):
+        self.max_jobs = max(1, max_jobs)
+        self.job_limit = self.max_jobs
+        self.safety_margin = safety_margin_mb * 1024 * 1024
+        self.sample_interval_s = sample_interval_s
+        self.log_callback = log_callback
+        self.condition = threading.Condition()
+        self.active: Dict[str, dict] = {}
+        self.reserved: Dict[str, int] = {}
+        self.throughput_by_level: Dict[int, float] = {}
+        # Durchsatz beim letzten Senken des Limits (Referenz für die Erholung)
+        self.limited_throughput = 0.0
+        self.limited_since = 0.0
+        # Gemessener Schreibdurchsatz pro Verzeichnis (kann über mehrere Batches geteilt werden)
+        self.throughput_cache: Dict[str, float] = {} if throughput_cache is None else throughput_cache
+        self.monitor_thread = None
+        self.stopped = False
+
+    def log(self, message: str):
+        """Sendet eine Log-Nachricht an den Callback"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def is_slow_destination(self, directory: str, threshold_mb_s: float) -> bool:
+        """Prüft (einmal pro Verzeichnis), ob das Ziel langsamer als die Schwelle schreibt"""
+        if directory not in self.throughput_cache:
+            try:
+                self.throughput_cache[directory] = measure_write_throughput(directory)
+                self.log(f"Schreibdurchsatz {directory}: {self.throughput_cache[directory]:.1f} MB/s")
+            except OSError as e:
+                self.log(f"Schreibdurchsatz konnte nicht gemessen werden: {str(e)}")
+                self.throughput_cache[directory] = float('inf')
+        return self.throughput_cache[directory] < threshold_mb_s
+
+    def free_bytes(self, directory: str) -> int:
+        """Freier Speicherplatz abzüglich bereits reservierter Mengen"""
+        return shutil.disk_usage(directory).free - self.reserved.get(directory, 0)
+
+    def acquire(self, job_id: str, estimate: int, directories: List[str],
+                watch_files: List[str], should_continue=lambda: True) -> bool:
+        """Wartet auf einen freien Platz und reserviert Speicher; False wenn der Job nicht passt"""
+        directories = [os.path.abspath(d) for d in directories]
+        for directory in directories:
+            os.makedirs(directory, exist_ok=True)
+
+        with self.condition:
+            while True:
+                if not should_continue() or self.stopped:
+                    return False
+
+                fits = all(self.free_bytes(d) >= estimate + self.safety_margin for d in directories)
+                if fits and len(self.active) < self.job_limit:
+                    break
+                if not fits and not self.active:
+                    # Auch ohne laufende Jobs ist nicht genug Platz vorhanden
+                    needed = (estimate + self.safety_margin) / (1024 ** 3)
+                    self.log(f"Nicht genug Speicherplatz für {os.path.basename(job_id)} "
+                             f"(benötigt ca. {needed:.1f} GB)")
+                    return False
+                self.condition.wait(timeout=1.0)
+
+            for directory in directories:
+                self.reserved[directory] = self.reserved.get(directory, 0) + estimate
+            self.active[job_id] = {
+                'estimate': estimate,
+                'directories': directories,
+                'watch_files': watch_files
+            }
+            self.start_monitor()
+            return True
+
+    def release(self, job_id: str):
+        """Gibt Platz und Reservierung eines beendeten Jobs frei"""
+        with self.condition:
+            job = self.active.pop(job_id, None)
+            if job:
+                for directory in job['directories']:
+                    self.reserved[directory] = max(0, self.reserved.get(directory, 0) - job['estimate'])
+            self.condition.notify_all()
+
+    def stop(self):
+        """Beendet die Überwachung und weckt wartende Jobs"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def start_monitor(self):
+        """Startet die Durchsatz-Messung, sobald mehrere Jobs parallel laufen können"""
+        if self.max_jobs > 1 and self.monitor_thread is None:
+            self.monitor_thread = threading.Thread(target=self.monitor, daemon=True)
+            self.monitor_thread.start()
+
+    def get_written_bytes(self) -> int:
+        """Summe der aktuell geschriebenen Bytes aller laufenden Jobs"""
+        total = 0
+        for job in list(self.active.values()):
+            for path in job['watch_files']:
+                try:
+                    total += os.path.getsize(path)
+                except OSError:
+                    pass
+        return total
+
+    def monitor(self):
+        """Misst den Gesamt-Schreibdurchsatz, senkt das Job-Limit bei Stagnation und hebt es bei Erholung wieder an"""
+        last_bytes = self.get_written_bytes()
+        last_time = time.monotonic()
+        while not self.stopped:
+            time.sleep(self.sample_interval_s)
+            with self.condition:
+                level = len(self.active)
+                written = self.get_written_bytes()
+            now = time.monotonic()
+            if level == 0 or written < last_bytes:
+                # Job gewechselt - neue Messung beginnen
+                last_bytes, last_time = written, now
+                continue
+
+            throughput = (written - last_bytes) / max(now - last_time, 1e-6)
+            last_bytes, last_time = written, now
+            previous = self.throughput_by_level.get(level)
+            self.throughput_by_level[level] = throughput if previous is None else 0.7 * previous + 0.3 * throughput
+
+            lower = self.throughput_by_level.get(level - 1)
+            if level > 1 and lower and level == self.job_limit:
+                if self.throughput_by_level[level] < lower * THROUGHPUT_GAIN_THRESHOLD:
+                    with self.condition:
+                        self.job_limit = max(1, level - 1)
+                    self.limited_throughput = lower
+                    self.limited_since = now
+                    self.log(f"Schreibdurchsatz stagniert bei {self.throughput_by_level[level] / 1024 ** 2:.1f} MB/s "
+                             f"- begrenze auf {self.job_limit} parallele Job(s)")
+            elif level == self.job_limit < self.max_jobs:
+                # Durchsatz gestiegen (z.B. Netz wieder frei) oder Wartezeit abgelaufen: höhere Stufe neu messen
+                recovered = self.throughput_by_level[level] > self.limited_throughput * THROUGHPUT_GAIN_THRESHOLD
+                if recovered or now - self.limited_since >= LIMIT_RECOVERY_INTERVAL_S:
+                    with self.condition:
+                        self.job_limit = level + 1
+                        self.throughput_by_level.pop(level + 1, None)
+                        self.condition.notify_all()
+                    self.limited_since = now
+                    self.log(f"Schreibdurchsatz {self.throughput_by_level[level] / 1024 ** 2:.1f} MB/s "
+                             f"- erlaube wieder {self.job_limit} parallele Job(s)")
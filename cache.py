@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Blockgröße und Anzahl der Stichproben für den Teil-Hash
+HASH_BLOCK_SIZE = 1024 * 1024
+HASH_SAMPLE_BLOCKS = 8
+
+# ioctl-Code für Reflinks (Btrfs/XFS) unter Linux
+FICLONE = 0x40049409
+
+
+def partial_file_hash(file_path: str, block_size: int = HASH_BLOCK_SIZE,
+                      samples: int = HASH_SAMPLE_BLOCKS) -> str:
+    """Berechnet einen schnellen Teil-Hash aus Größe, Anfang, Ende und Stichproben-Blöcken"""
+    size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(size).encode())
+
+    with open(file_path, 'rb') as f:
+        if size <= block_size * (samples + 2):
+            # Kleine Dateien werden vollständig gehasht
+            digest.update(f.read())
+        else:
+            # Anfang, gleichmäßig verteilte Blöcke und Ende
+            last = size - block_size
+            offsets = [0] + [last * i // (samples + 1) for i in range(1, samples + 1)] + [last]
+            for offset in offsets:
+                f.seek(offset)
+                digest.update(f.read(block_size))
+
+    return digest.hexdigest()
+
+
+def settings_hash(settings: dict) -> str:
+    """Berechnet einen stabilen Hash der effektiven Encoding-Einstellungen"""
+    data = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def clone_file(source: str, target: str) -> str:
+    """Legt einen Hardlink, Reflink oder eine Kopie an und gibt die Methode zurück"""
+    if os.path.exists(target):
+        os.remove(target)
+
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        pass
+
+    if sys.platform.startswith('linux'):
+        try:
+            import fcntl
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source, target)
+            return "reflink"
+        except (OSError, ImportError):
+            if os.path.exists(target):
+                os.remove(target)
+
+    shutil.copy2(source, target)
+    return "kopie"
+
+
+class OutputCache:
+    """Inhaltsadressierter Cache für bereits konvertierte Ausgabedateien"""
+
+    def __init__(self, cache_dir: str, max_size_gb: float = 20, log_callback=None):
+        self.cache_dir = Path(cache_dir)
+        self.index_file = self.cache_dir / "cache_index.json"
+        self.max_size_bytes = int(max_size_gb * 1024 * 1024 * 1024)
+        self.log_callback = log_callback
+        self.lock = threading.Lock()
+        self.index = self.load_index()
+
+    def log(self, message: str):
+        """Sendet eine Log-Nachricht an den Callback"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def load_index(self) -> dict:
+        """Lädt den Cache-Index"""
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                self.log("Cache-Index beschädigt - Cache wird neu aufgebaut")
+        return {}
+
+    def save_index(self):
+        """Speichert den Cache-Index atomar"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def make_key(self, input_file: str, settings: dict) -> str:
+        """Bildet den Cache-Schlüssel aus Quellinhalt und Einstellungen"""
+        return f"{partial_file_hash(input_file)}-{settings_hash(settings)}"
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Liefert den Pfad eines gültigen Cache-Eintrags oder None"""
+        with self.lock:
+            entry = self.index.get(key)
+            if not entry:
+                return None
+
+            cached_file = self.cache_dir / entry['file']
+            try:
+                # Integritätsprüfung vor der Wiederverwendung
+                valid = (cached_file.stat().st_size == entry['size'] and
+                         partial_file_hash(str(cached_file)) == entry['digest'])
+            except OSError:
+                valid = False
+
+            if not valid:
+                self.log(f"Cache-Eintrag ungültig, wird verworfen: {entry['file']}")
+                self._remove_entry(key)
+                self.save_index()
+                return None
+
+            entry['last_used'] = time.time()
+            self.save_index()
+            return str(cached_file)
+
+    def contains(self, key: str) -> bool:
+        """Prüft einen Eintrag ohne den Index zu verändern (für Probeläufe)"""
+        with self.lock:
+            entry = self.index.get(key)
+            if not entry:
+                return False
+            cached_file = self.cache_dir / entry['file']
+            try:
+                return (cached_file.stat().st_size == entry['size'] and
+                        partial_file_hash(str(cached_file)) == entry['digest'])
+            except OSError:
+                return False
+
+    def materialize(self, key: str, output_file: str) -> bool:
+        """Stellt eine zwischengespeicherte Ausgabe am Zielpfad bereit"""
+        cached_file = self.lookup(key)
+        if not cached_file:
+            return False
+
+        try:
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            method = clone_file(cached_file, output_file)
+            self.log(f"Cache-Treffer ({method}): {os.path.basename(output_file)}")
+            return True
+        except OSError as e:
+            self.log(f"Cache-Treffer konnte nicht übernommen werden: {str(e)}")
+            return False
+
+    def store(self, key: str, output_file: str):
+        """Übernimmt eine erfolgreich konvertierte Datei in den Cache"""
+        try:
+            size = os.path.getsize(output_file)
+            if size > self.max_size_bytes:
+                return
+
+            with self.lock:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                cached_name = f"{key}{os.path.splitext(output_file)[1]}"
+                clone_file(output_file, str(self.cache_dir / cached_name))
+                self.index[key] = {
+                    'file': cached_name,
+                    'size': size,
+                    'digest': partial_file_hash(output_file),
+                    'last_used': time.time()
+                }
+                self._evict()
+                self.save_index()
+        except OSError as e:
+            self.log(f"Datei konnte nicht in den Cache übernommen werden: {str(e)}")
+
+    def _remove_entry(self, key: str):
+        """Entfernt einen Eintrag samt Datei"""
+        entry = self.index.pop(key, None)
+        if entry:
+            try:
+                (self.cache_dir / entry['file']).unlink()
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Entfernt die am längsten ungenutzten Einträge, bis die Größengrenze eingehalten wird"""
+        total = sum(entry['size'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_used']):
+            if total <= self.max_size_bytes:
+                break
+            total -= self.index[key]['size']
+            self._remove_entry(key)
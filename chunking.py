@@ -0,0 +1,71 @@
+import re
+import subprocess
+from bisect import bisect_left, bisect_right
+from typing import List, Tuple
+
+from supervisor import get_supervisor
+
+# Zusätzliche Kosten eines Szenenwechsels (entspricht Sekunden Material), da dort ein I-Frame entsteht
+SCENE_CUT_COST_S = 0.5
+
+PTS_TIME_PATTERN = re.compile(r'pts_time:\s*([0-9.]+)')
+
+
+def detect_keyframes(input_file: str, start_time: float = 0.0, timeout: int = 600) -> List[float]:
+    """Liest die Keyframe-Zeitpunkte der Quelle relativ zum Dateianfang (nur Keyframes werden dekodiert)"""
+    cmd = ['ffprobe', '-v', 'quiet', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+           '-show_entries', 'frame=pts_time', '-of', 'csv=p=0', input_file]
+    result = get_supervisor().run(cmd, timeout=timeout, capture_stdout=True, group="analysis")
+    if result.timed_out:
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    times = []
+    for line in result.stdout.splitlines():
+        try:
+            times.append(float(line.strip().rstrip(',')))
+        except ValueError:
+            continue
+    # pts_time enthält die Startzeit des Containers (TS/M2TS), -ss zählt ab Dateianfang
+    return sorted(t - start_time for t in times if t >= start_time)
+
+
+def detect_scene_cuts(input_file: str, threshold: float = 0.4, start_time: float = 0.0,
+                      timeout: int = 3600) -> List[float]:
+    """Ermittelt Szenenwechsel relativ zum Dateianfang auf einer verkleinerten Kopie des Videos"""
+    # -copyts: unveränderte Zeitstempel wie bei detect_keyframes, die Startzeit wird einheitlich abgezogen
+    cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-copyts', '-i', input_file, '-map', '0:v:0', '-an', '-sn',
+           '-vf', f"scale=320:-2,select='gt(scene,{threshold})',showinfo", '-f', 'null', '-']
+    result = get_supervisor().run(cmd, timeout=timeout, capture_stderr=True, group="analysis")
+    if result.timed_out:
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    times = (float(match) for match in PTS_TIME_PATTERN.findall(result.stderr))
+    return sorted(t - start_time for t in times if t >= start_time)
+
+
+def estimate_cost(start: float, end: float, scene_cuts: List[float]) -> float:
+    """Schätzt den Kodieraufwand eines Abschnitts aus Laufzeit und Anzahl der Szenenwechsel"""
+    cuts = max(0, bisect_left(scene_cuts, end) - bisect_right(scene_cuts, start))
+    return (end - start) + cuts * SCENE_CUT_COST_S
+
+
+def choose_boundaries(duration: float, scene_cuts: List[float], keyframes: List[float],
+                      chunks: int, min_chunk_s: float = 10) -> List[Tuple[float, float]]:
+    """Wählt Abschnittsgrenzen auf Szenenwechseln (ersatzweise Keyframes) mit ausgeglichenem Aufwand"""
+    if chunks <= 1 or duration <= min_chunk_s * 2:
+        return [(0.0, duration)]
+
+    # Szenenwechsel bevorzugen; ohne Szenenwechsel auf Keyframes ausweichen
+    candidates = [t for t in (scene_cuts or keyframes) if min_chunk_s <= t <= duration - min_chunk_s]
+    if not candidates:
+        return [(0.0, duration)]
+
+    total_cost = estimate_cost(0.0, duration, scene_cuts)
+    boundaries = [0.0]
+    for k in range(1, chunks):
+        target = total_cost * k / chunks
+        # Kandidat, dessen kumulierter Aufwand dem Zielwert am nächsten liegt
+        best = min(candidates, key=lambda t: abs(estimate_cost(0.0, t, scene_cuts) - target))
+        if best - boundaries[-1] >= min_chunk_s and duration - best >= min_chunk_s:
+            boundaries.append(best)
+    boundaries.append(duration)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
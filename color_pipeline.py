@@ -0,0 +1,64 @@
+from typing import Iterable
+
+from profiles import get_bit_depth
+
+# Übertragungsfunktionen von HDR-Quellen
+HDR_TRANSFERS = {
+    "smpte2084": "HDR10/PQ",
+    "arib-std-b67": "HLG"
+}
+
+# Profile, die libx264 und die Hardware-Encoder nur mit 8 Bit und 4:2:0 kodieren
+EIGHT_BIT_PROFILES = ("baseline", "main", "high")
+
+# Pixelformate, die 8-Bit-Profile direkt annehmen
+EIGHT_BIT_PIX_FMTS = ("yuv420p", "yuvj420p", "nv12")
+
+# Tone-Mapping-Verfahren des tonemap-Filters
+TONEMAP_ALGORITHMS = ("hable", "mobius", "reinhard", "clip", "linear", "gamma")
+
+# Farbangaben für SDR-Ausgaben (BT.709)
+BT709_TAGS = ['-color_primaries', 'bt709', '-color_trc', 'bt709', '-colorspace', 'bt709']
+
+
+def is_hdr(video_info: dict) -> bool:
+    """Prüft anhand der Übertragungsfunktion, ob eine Quelle HDR ist"""
+    return video_info.get('color_transfer', '') in HDR_TRANSFERS
+
+
+def needs_conversion(video_info: dict) -> bool:
+    """Prüft, ob eine Quelle für ein 8-Bit-Profil umgewandelt werden muss (unbekanntes Pixelformat: nein)"""
+    return (is_hdr(video_info) or get_bit_depth(video_info) > 8 or
+            (video_info.get('pix_fmt') or 'yuv420p') not in EIGHT_BIT_PIX_FMTS)
+
+
+def plan_color(video_info: dict, profile: str, tonemap_algorithm: str = "hable",
+               available_filters: Iterable[str] = ()) -> dict:
+    """Plant die Umwandlung auf 8 Bit (bei HDR mit Tone-Mapping); leere Listen = keine Umwandlung"""
+    plan = {'filters': [], 'qsv': [], 'output_args': [], 'description': []}
+    if profile not in EIGHT_BIT_PROFILES or not video_info or not needs_conversion(video_info):
+        return plan
+
+    if not is_hdr(video_info):
+        # SDR mit höherer Farbtiefe oder 4:2:2/4:4:4: nur Pixelformat reduzieren
+        plan['filters'] = ['format=yuv420p']
+        plan['qsv'] = ['format=nv12']
+        plan['description'].append(f"Umwandlung {video_info.get('pix_fmt', '?')} → yuv420p")
+        return plan
+
+    transfer = HDR_TRANSFERS[video_info['color_transfer']]
+    if tonemap_algorithm not in TONEMAP_ALGORITHMS:
+        tonemap_algorithm = "hable"
+    plan['qsv'] = ['tonemap=1', 'format=nv12']
+    plan['output_args'] = list(BT709_TAGS)
+    if 'zscale' in available_filters and 'tonemap' in available_filters:
+        # Linearisieren, in BT.709 tone-mappen und wieder als 8-Bit-BT.709 ausgeben
+        plan['filters'] = ['zscale=t=linear:npl=100', 'format=gbrpf32le', 'zscale=p=bt709',
+                           f'tonemap=tonemap={tonemap_algorithm}:desat=0',
+                           'zscale=t=bt709:m=bt709:r=tv', 'format=yuv420p']
+        plan['description'].append(f"Tone-Mapping {transfer} → SDR ({tonemap_algorithm})")
+    else:
+        # Ohne zimg kein Tone-Mapping möglich: Kodierung gelingt, Farben wirken aber blass
+        plan['filters'] = ['format=yuv420p']
+        plan['description'].append(f"{transfer} → 8 Bit ohne Tone-Mapping (zscale nicht verfügbar)")
+    return plan
@@ -0,0 +1,81 @@
+import json
+import os
+import shlex
+from typing import List
+
+from history import makespan
+
+# Schritte eines Plans: argv (Prozess), write (Datei schreiben), move (umbenennen), remove (Verzeichnis löschen)
+
+
+def plan_to_json(plan: dict) -> str:
+    """Plan als JSON (zum Prüfen, Vergleichen und Verteilen)"""
+    return json.dumps(plan, indent=2, ensure_ascii=False)
+
+
+def step_to_shell(step: dict) -> str:
+    """Eine Zeile im Shell-Skript pro Schritt"""
+    if 'argv' in step:
+        # stdin schließen, damit FFmpeg nicht das Skript liest
+        return ' '.join(shlex.quote(arg) for arg in step['argv']) + ' < /dev/null'
+    if 'write' in step:
+        lines = step['content'].splitlines()
+        return "printf '%s\\n' " + ' '.join(shlex.quote(line) for line in lines) + ' > ' + shlex.quote(step['write'])
+    if 'move' in step:
+        source, target = step['move']
+        return f"mv -f {shlex.quote(source)} {shlex.quote(target)}"
+    if 'remove' in step:
+        return f"rm -rf {shlex.quote(step['remove'])}"
+    raise ValueError(f"Unbekannter Schritt: {step.get('name')}")
+
+
+def plan_to_shell(plan: dict) -> str:
+    """Plan als POSIX-Shell-Skript; ein fehlgeschlagener Job bricht nur sich selbst ab"""
+    lines = ['#!/bin/sh',
+             f"# H.264 Converter - Ausführungsplan vom {plan['created']}",
+             f"# {len(plan['jobs'])} Job(s), davon {plan['skipped']} übersprungen",
+             '# Abschnitte aufgeteilter Dateien laufen hier nacheinander', '']
+    for job in plan['jobs']:
+        names = ', '.join(os.path.basename(path) for path in job['inputs'])
+        if job['skip_reason']:
+            lines.extend([f"# Übersprungen: {names} ({job['skip_reason']})", ''])
+            continue
+        lines.append(f"# {names} → {job['encoder']}, {job['profile']}, {job['layout']['mode']}")
+        for note in job.get('provisional', []):
+            lines.append(f"# Vorläufig - {note}")
+        commands = ['mkdir -p ' + ' '.join(shlex.quote(path) for path in job['directories'])]
+        commands.extend(step_to_shell(step) for step in job['steps'])
+        lines.append(' &&\n'.join(commands) + ' ||')
+        lines.extend([f"echo {shlex.quote('Fehlgeschlagen: ' + names)} >&2", ''])
+    return '\n'.join(lines)
+
+
+def shard_plan(plan: dict, shard: int, shards: int) -> dict:
+    """Teilt die Jobs nach geschätztem Aufwand auf mehrere Rechner auf (LPT) und liefert einen Anteil"""
+    if not 0 <= shard < shards:
+        raise ValueError(f"Ungültiger Anteil {shard} von {shards}")
+    runnable = [job for job in plan['jobs'] if not job['skip_reason']]
+    # Ohne Zeitschätzung für alle Jobs dient die geschätzte Größe als Maß für den Aufwand
+    use_time = all(job['estimate']['time_s'] is not None for job in runnable)
+    cost = (lambda job: job['estimate']['time_s']) if use_time else (lambda job: job['estimate']['size_bytes'])
+    loads = [0.0] * shards
+    assigned: List[List[dict]] = [[] for _ in range(shards)]
+    for job in sorted(runnable, key=cost, reverse=True):
+        target = loads.index(min(loads))
+        loads[target] += cost(job)
+        assigned[target].append(job)
+    jobs = assigned[shard]
+    known = [job['estimate']['time_s'] for job in jobs if job['estimate']['time_s'] is not None]
+    return dict(plan, jobs=jobs, shard=[shard, shards], skipped=0,
+                total_size_bytes=sum(job['estimate']['size_bytes'] for job in jobs),
+                total_time_s=makespan(sorted(known, reverse=True), plan['parallel_jobs']) if use_time else None,
+                unknown_time=len(jobs) - len(known))
+
+
+def save_plan(plan: dict, plan_file: str):
+    """Speichert den Plan; .sh ergibt ein Shell-Skript, alles andere JSON"""
+    is_shell = plan_file.lower().endswith('.sh')
+    with open(plan_file, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(plan_to_shell(plan) if is_shell else plan_to_json(plan))
+    if is_shell:
+        os.chmod(plan_file, 0o755)
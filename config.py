@@ -1,5 +1,9 @@
+import copy
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 class Config:
@@ -9,6 +13,11 @@ class Config:
             "output_directory": str(Path.home() / "Videos" / "Converted"),
             "default_encoder": "h264_amf",  # AMD-Encoder als Standard
             "default_crf": 23,
+            "default_rate_control": "crf",  # crf, vbr, 2pass
+            "default_bitrate_k": 4000,  # Zielbitrate in kbit/s (vbr/2pass)
+            "vbv_maxrate_factor": 1.5,  # maxrate = Zielbitrate * Faktor
+            "vbv_bufsize_factor": 2.0,  # bufsize = Zielbitrate * Faktor
+            "two_pass_stats_directory": str(Path.home() / ".h264_converter" / "pass_stats"),
             "default_preset": "medium",
             "default_output_format": "MP4",
             "default_profile": "high10",  # high10 für 10-Bit Kompatibilität
@@ -19,35 +28,235 @@ class Config:
             "split_large_files": True,
             "large_file_threshold_mb": 500,
             "extra_large_file_threshold_gb": 1,
+            "split_workers": 2,  # Parallel kodierte Abschnitte bei sehr großen Dateien
+            "split_min_chunk_s": 30,  # Mindestlänge eines Abschnitts in Sekunden
+            "scene_cut_threshold": 0.4,  # Empfindlichkeit der Szenenwechsel-Erkennung
+            "console_output": "text",  # text, jsonl, off - Ereignisse auf der Konsole
+            "event_log_file": "",  # Ereignisse zusätzlich als JSON-Zeilen in diese Datei schreiben
+            "thumbnails_enabled": False,  # Vorschaubilder als zusätzliche Ausgabe der Konvertierung
+            "thumbnail_count": 20,  # Anzahl der Vorschaubilder pro Video
+            "thumbnail_width": 320,  # Breite der Vorschaubilder in Pixeln
+            "thumbnail_directory": "",  # Leer = Unterordner "thumbnails" im Ausgabeordner
+            "contact_sheet_enabled": True,  # Vorschaubilder zu einem Kontaktbogen zusammensetzen
+            "contact_sheet_columns": 5,  # Spalten des Kontaktbogens
+            "encoder_health_file": str(Path.home() / ".h264_converter" / "encoder_health.json"),
+            "encoder_health_ttl_h": 24,  # Gültigkeit gespeicherter Encoder-Tests und Job-Ergebnisse
+            "session_pooling_enabled": False,  # Kurze Hardware-Clips in gemeinsamen FFmpeg-Prozessen kodieren
+            "session_pool_size": 16,  # Clips pro gemeinsamer Encoder-Sitzung
+            "session_pool_max_clip_s": 120,  # Maximale Clip-Länge für gemeinsame Sitzungen
+            "filter_planner_enabled": False,  # Ränder/Halbbilder erkennen und Filter automatisch planen
+            "auto_crop": True,  # Schwarze Ränder abschneiden (cropdetect)
+            "auto_deinterlace": True,  # Interlaced-Quellen deinterlacen (idet)
+            "max_output_height": 0,  # Auf diese Höhe verkleinern (0 = Originalgröße)
+            "hardware_filters": True,  # Filter auf der GPU ausführen (NVDEC bzw. vpp_qsv), falls möglich
+            "filter_analysis_samples": 5,  # Stichproben für die Bild-Analyse
+            "filter_analysis_seconds": 2,  # Länge einer Stichprobe in Sekunden
+            "queue_file": str(Path.home() / ".h264_converter" / "queue.sqlite3"),  # Warteschlange und Analyse-Ergebnisse
+            "persistent_probe_cache": True,  # Analyse-Ergebnisse in der Warteschlangen-Datei speichern
+            "probe_cache_entries": 512,  # Analyse-Ergebnisse im Arbeitsspeicher
+            "estimate_max_files": 2000,  # Schätzung im Bestätigungsdialog nur bis zu dieser Anzahl Dateien
+            "api_host": "127.0.0.1",  # Job-API nur lokal erreichbar
+            "api_port": 8765,
+            "api_queue_file": str(Path.home() / ".h264_converter" / "api_queue.sqlite3"),  # Eigene Warteschlange der Job-API
+            "api_max_queued": 10000,  # Wartende Jobs, ab denen neue Aufträge abgelehnt werden (HTTP 429)
+            "api_retry_after_s": 30,  # Empfohlene Wartezeit nach einer Ablehnung
+            "api_max_body_kb": 1024,  # Maximale Größe einer Anfrage
+            "api_max_event_clients": 16,  # Gleichzeitige Event-Stream-Verbindungen
+            "api_event_backlog": 1000,  # Rückstand pro Event-Stream, ab dem ein langsamer Client getrennt wird
+            "profiling_enabled": False,  # Zeitleiste pro Batch aufzeichnen (Chrome-Trace/Perfetto)
+            "trace_directory": str(Path.home() / ".h264_converter" / "traces"),
+            "ffmpeg_job_timeout_s": 0,  # Zeitlimit pro FFmpeg-Prozess (0 = unbegrenzt)
+            "stop_grace_s": 10,  # Frist zum Abschließen von Teildateien beim Stoppen (bzw. bei Zeitlimit)
+            "stop_partial_output": "delete",  # delete, keep - Umgang mit Teildateien beim Stoppen
+            "max_parallel_jobs": 1,  # Gleichzeitig laufende Konvertierungen (Obergrenze)
+            "admission_control_enabled": True,  # Speicherplatz reservieren, Parallelität nach Durchsatz begrenzen
+            "disk_safety_margin_mb": 1024,  # Freizuhaltender Speicherplatz pro Laufwerk
+            "staging_mode": "off",  # off, auto, always - lokale Zwischenspeicherung bei langsamem Ziel (auto misst den Schreibdurchsatz)
+            "staging_directory": "",  # Leer = temporäres Verzeichnis des Systems
+            "slow_destination_mb_s": 30,  # Schwelle für "langsames Ziel" in MB/s
+            "upload_workers": 2,  # Parallele Übertragungen aus der Zwischenspeicherung
+            "upload_max_pending": 4,  # Maximal wartende Übertragungen (danach wartet die Konvertierung)
+            "upload_max_retries": 3,
+            "upload_verify_checksum": True,  # Kopie per Prüfsumme kontrollieren
+            "history_enabled": True,  # Messwerte abgeschlossener Konvertierungen speichern
+            "history_file": str(Path.home() / ".h264_converter" / "encode_history.jsonl"),
+            "history_max_entries": 5000,
+            "lpt_scheduling": True,  # Bei parallelen Jobs die längsten zuerst starten
+            "preview_points": 3,  # Stichproben pro Datei im Vorschau-Modus
+            "preview_seconds": 4,  # Länge einer Stichprobe in Sekunden
+            "preview_directory": "",  # Leer = temporäres Verzeichnis des Systems
             "color_depth_mode": "auto",  # auto, quality, compatibility
-            "force_8bit": False  # Erzwingt 8-Bit für maximale Kompatibilität
+            "force_8bit": False,  # Erzwingt 8-Bit für maximale Kompatibilität
+            "color_pipeline_enabled": True,  # 10-Bit/HDR-Quellen für 8-Bit-Profile umwandeln (HDR mit Tone-Mapping)
+            "tonemap_algorithm": "hable",  # hable, mobius, reinhard, clip, linear, gamma
+            "output_cache_enabled": False,  # Inhaltsadressierter Ergebnis-Cache
+            "output_cache_directory": str(Path.home() / ".h264_converter" / "output_cache"),
+            "output_cache_max_gb": 20,
+            "verify_outputs": False,  # Ausgaben nach der Konvertierung prüfen
+            "verify_decode_check": False,  # Zusätzliche Dekodier-Prüfung (-f null)
+            "verify_sample_segments": 3,  # 0 = gesamte Datei dekodieren
+            "verify_segment_seconds": 2,
+            "verify_max_retries": 1,
+            "delivery_optimized": False,  # Ausgaben für Streaming-Auslieferung optimieren
+            "fragmented_mp4": False,  # Fragmentiertes MP4 statt faststart
+            "faststart_deferred": False,  # faststart-Remux parallel zur nächsten Konvertierung
+            "keyframe_interval_s": 2,  # Keyframe-Abstand in Sekunden (0 = Encoder-Standard)
+            "ladder_mode": False,  # Mehrere Auflösungsstufen aus einem Dekodiervorgang
+            "ladder_renditions": [
+                {"height": 1080, "crf": 21, "profile": "high", "bitrate_k": 0},
+                {"height": 720, "crf": 23, "profile": "high", "bitrate_k": 0},
+                {"height": 480, "crf": 25, "profile": "main", "bitrate_k": 0}
+            ],
+            "stream_mapping_enabled": True,  # Audio/Untertitel je nach Container kopieren, umwandeln oder verwerfen
+            "profile_rules_enabled": False,  # Encoding-Profile pro Datei per Regel wählen
+            "encode_profiles": {
+                "schnell": {"preset": "veryfast", "crf": 24},
+                "hochwertig": {"preset": "slow", "crf": 18, "profile": "high10"}
+            },
+            "profile_rules": [
+                # Erste passende Regel gewinnt; Bedingungen: min_/max_ height, width, bit_depth,
+                # duration_s, size_mb sowie large_file (Schwelle large_file_threshold_mb) und codec
+                {"name": "4K 10-Bit Master", "profile": "hochwertig", "min_height": 2160, "min_bit_depth": 10},
+                {"name": "Handy-Clips", "profile": "schnell", "max_height": 1080, "max_duration_s": 120}
+            ]
         }
+        self.load_errors = []
+        self.lock = threading.RLock()
+        self.dirty = False
+        self.batch_depth = 0
+        self.flush_timer = None
         self.config = self.load_config()
     
     def load_config(self):
-        """Lädt die Konfiguration aus der JSON-Datei"""
-        if self.config_file.exists():
+        """Lädt die Konfiguration aus der JSON-Datei und prüft sie gegen das Schema"""
+        config = copy.deepcopy(self.default_config)
+        if not self.config_file.exists():
+            return config
+        
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("Konfiguration ist kein JSON-Objekt")
+        except (OSError, ValueError) as e:
+            # Beschädigte Datei sichern statt sie stillschweigend zu überschreiben
+            backup_file = self.config_file.with_suffix('.corrupt.json')
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return {**self.default_config, **json.load(f)}
-            except:
-                return self.default_config.copy()
-        return self.default_config.copy()
+                os.replace(self.config_file, backup_file)
+            except OSError:
+                pass
+            self.load_errors.append(f"Konfiguration beschädigt ({str(e)}), gesichert als {backup_file.name}")
+            return config
+        
+        for key, value in data.items():
+            error = self.validate(key, value)
+            if error:
+                self.load_errors.append(error)
+            else:
+                config[key] = value
+        return config
+    
+    def validate(self, key, value):
+        """Prüft einen Wert gegen Typ und erlaubte Werte des Standards; liefert eine Fehlermeldung oder None"""
+        if key not in self.default_config:
+            return None  # Unbekannte Schlüssel werden unverändert übernommen
+        
+        default = self.default_config[key]
+        if isinstance(default, bool):
+            valid = isinstance(value, bool)
+        elif isinstance(default, (int, float)):
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        else:
+            valid = isinstance(value, type(default))
+        if not valid:
+            return f"Ungültiger Typ für '{key}': {type(value).__name__} (Standardwert wird verwendet)"
+        
+        choices = CONFIG_CHOICES.get(key)
+        if choices is not None and value not in choices:
+            return f"Ungültiger Wert für '{key}': {value} (Standardwert wird verwendet)"
+        return None
     
     def save_config(self):
-        """Speichert die aktuelle Konfiguration"""
-        os.makedirs(self.config_file.parent, exist_ok=True)
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
+        """Speichert die aktuelle Konfiguration atomar (temporäre Datei + Umbenennen)"""
+        with self.lock:
+            self.cancel_flush()
+            os.makedirs(self.config_file.parent.resolve(), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=self.config_file.name, suffix='.tmp', 
+                                            dir=self.config_file.parent.resolve())
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.config, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.config_file)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.dirty = False
     
     def get(self, key, default=None):
         """Holt einen Konfigurationswert"""
         return self.config.get(key, default)
     
     def set(self, key, value):
-        """Setzt einen Konfigurationswert"""
-        self.config[key] = value
-        self.save_config()
+        """Setzt einen Konfigurationswert (das Speichern erfolgt gebündelt und verzögert)"""
+        with self.lock:
+            self.config[key] = value
+            self.dirty = True
+            if self.batch_depth == 0:
+                self.schedule_flush()
+    
+    def update(self, values: dict):
+        """Setzt mehrere Konfigurationswerte mit einem einzigen Schreibvorgang"""
+        with self.batch():
+            for key, value in values.items():
+                self.config[key] = value
+            self.dirty = True
+    
+    @contextmanager
+    def batch(self):
+        """Bündelt Änderungen; gespeichert wird einmal am Ende des Blocks"""
+        with self.lock:
+            self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.batch_depth -= 1
+                if self.batch_depth == 0 and self.dirty:
+                    self.save_config()
+    
+    def schedule_flush(self):
+        """Plant das Speichern nach kurzer Verzögerung (weitere Änderungen verschieben es)"""
+        self.cancel_flush()
+        self.flush_timer = threading.Timer(FLUSH_DELAY_S, self.flush)
+        self.flush_timer.daemon = True
+        self.flush_timer.start()
+    
+    def cancel_flush(self):
+        """Bricht ein geplantes Speichern ab"""
+        if self.flush_timer:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+    
+    def flush(self):
+        """Schreibt ausstehende Änderungen sofort"""
+        with self.lock:
+            if self.dirty:
+                self.save_config()
+    
+    def reset(self):
+        """Setzt alle Werte auf die Standardwerte zurück und entfernt die Konfigurationsdatei"""
+        with self.lock:
+            self.cancel_flush()
+            if self.config_file.exists():
+                self.config_file.unlink()
+            self.config = copy.deepcopy(self.default_config)
+            self.dirty = False
+
+# Verzögerung für gebündeltes Speichern (Sekunden)
+FLUSH_DELAY_S = 0.5
 
 # Encoder-Profile
 ENCODERS = {
@@ -63,6 +272,20 @@ PRESETS = [
     "fast", "medium", "slow", "slower", "veryslow"
 ]
 
+# Ratenkontrolle
+RATE_CONTROL_MODES = {
+    "crf": "Konstante Qualität (CRF/QP)",
+    "vbr": "Zielbitrate (VBV)",
+    "2pass": "Zwei Durchgänge (libx264)"
+}
+
+# Lokale Zwischenspeicherung
+STAGING_MODES = {
+    "auto": "Bei langsamem Ziel (Messung)",
+    "always": "Immer",
+    "off": "Nie"
+}
+
 # Ausgabeformate
 OUTPUT_FORMATS = ["MP4", "MKV", "MOV", "AVI", "FLV"]
 
@@ -94,3 +317,18 @@ COLOR_DEPTH_DESCRIPTIONS = {
     "quality": "Behält 10-Bit Farbtiefe bei (beste Qualität, moderne Player)",
     "compatibility": "Konvertiert zu 8-Bit (maximale Kompatibilität, alle Player)"
 }
+
+# Erlaubte Werte für die Schema-Prüfung beim Laden
+CONFIG_CHOICES = {
+    "default_encoder": list(ENCODERS.keys()),
+    "default_preset": PRESETS,
+    "default_output_format": OUTPUT_FORMATS,
+    "default_profile": ENCODING_PROFILES,
+    "default_rate_control": list(RATE_CONTROL_MODES.keys()),
+    "max_threads": THREAD_OPTIONS,
+    "language": list(LANGUAGES.keys()),
+    "color_depth_mode": list(COLOR_DEPTH_MODES.keys()),
+    "staging_mode": list(STAGING_MODES.keys()),
+    "stop_partial_output": ["delete", "keep"],
+    "console_output": ["text", "jsonl", "off"]
+}
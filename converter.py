@@ -1,10 +1,49 @@
 import subprocess
 import os
+import shutil
+import tempfile
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Callable
+from collections import deque
+from typing import List, Dict, Callable, Tuple
 import json
+import re
+import sqlite3
+from cache import OutputCache, partial_file_hash, settings_hash
+from verification import OutputVerifier
+from profiles import match_rule, apply_profile, get_bit_depth
+from stream_mapping import plan_streams, validate_plan, stream_args
+from chunking import detect_keyframes, detect_scene_cuts, choose_boundaries
+from admission import AdmissionController, estimate_output_bytes
+from upload import UploadPool
+from history import EncodeHistory, lpt_order, makespan
+from supervisor import get_supervisor
+from tracing import Tracer
+from thumbnails import ContactSheetBuilder, thumbnail_output_args
+from encoder_health import EncoderHealth, parse_ffmpeg_version
+from session_pool import pool_key, group_clips, build_pooled_command
+from filter_planner import analyze_sample, combine_samples, plan_filters
+from color_pipeline import needs_conversion, plan_color
+from job_store import JobStore, ProbeCache, QueueBatch
+from events import (EventBus, LogMessage, JobQueued, JobStarted, Progress, JobFinished, JobFailed,
+                    JobSkipped, BatchStats, ConsoleSubscriber, JsonLinesSubscriber, FileLogSubscriber, MetricsSubscriber)
+
+# Version der Video-Informationen im Analyse-Cache (erhöhen, wenn neue Felder hinzukommen)
+VIDEO_INFO_KIND = "video_info_v3"
+
+# Dateien, die beim Einlesen der Warteschlange gemeinsam geplant werden (gemeinsame Encoder-Sitzungen)
+WORK_WINDOW = 1000
+
+# Meldungen, die auf ein fehlendes oder defektes Gerät hinweisen (nicht auf ungeeignete Parameter einer Datei)
+DEVICE_ERROR_PATTERNS = ("Cannot load", "No capable devices found", "No NVENC capable devices found",
+                         "OpenEncodeSessionEx failed", "Device creation failed", "Failed to create Direct3D device",
+                         "Error creating a MFX session", "Failed to initialise", "failed to initialize",
+                         "DLL amfrt64.dll failed to open", "Failed to create AMF")
+
+# Fortschrittszeile von FFmpeg, z.B. "frame=  120 fps= 48 ... time=00:00:05.00 ... speed=1.9x"
+FFMPEG_PROGRESS_PATTERN = re.compile(r'fps=\s*([0-9.]+).*?time=\s*(-?[0-9:.]+).*?speed=\s*([0-9.]+)x')
 
 class VideoConverter:
     def __init__(self, config, progress_callback=None, log_callback=None):
@@ -12,20 +51,64 @@ class VideoConverter:
         self.progress_callback = progress_callback
         self.log_callback = log_callback
         self.is_converting = False
+        self.cancelled_jobs = set()  # Einzeln abgebrochene Jobs (Eingabepfade)
+        self.job_groups = {}  # Clip -> Job, unter dem seine gemeinsame Encoder-Sitzung läuft
+        self.throughput_cache = {}  # Schreibdurchsatz pro Zielverzeichnis (einmal pro Sitzung gemessen)
         self.current_job = None
+        self.output_cache = None
+        self.history = None
+        self.encoder_health = None
+        self.available_filters = None
+        self.probe_lock = threading.Lock()
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.job_context = threading.local()
+        self.tracer = Tracer()  # Wird pro Batch ersetzt, wenn die Profilierung aktiv ist
+        self.events = self.setup_events()
+        # Analyse-Ergebnisse: wenige im Speicher, alle weiteren in der SQLite-Datei der Warteschlange
+        self.probe_cache = ProbeCache(self.open_job_store(), int(config.get("probe_cache_entries", 512)))
+        
+    def setup_events(self) -> EventBus:
+        """Richtet den Ereignis-Bus mit Konsole, Metriken, Protokolldatei und Callbacks ein"""
+        events = EventBus()
+        self.metrics = MetricsSubscriber()
+        events.subscribe(self.metrics, "metrics")
         
-    def log(self, message: str):
-        """Sendet eine Log-Nachricht an den Callback"""
-        if self.log_callback:
-            self.log_callback(message)
-        print(f"[{time.strftime('%H:%M:%S')}] {message}")
+        console_output = self.config.get("console_output", "text")
+        if console_output == "text":
+            events.subscribe(ConsoleSubscriber(), "console")
+        elif console_output == "jsonl":
+            events.subscribe(JsonLinesSubscriber(), "jsonl")
+        
+        event_log_file = self.config.get("event_log_file", "")
+        if event_log_file:
+            events.subscribe(FileLogSubscriber(event_log_file), "file")
+        
+        # Kompatibilität: Text-Callbacks aus den Ereignissen bedienen
+        if self.log_callback or self.progress_callback:
+            events.subscribe(self.forward_to_callbacks, "callbacks")
+        return events
+    
+    def forward_to_callbacks(self, event):
+        """Übersetzt Ereignisse in die bisherigen Text-Callbacks"""
+        if isinstance(event, LogMessage):
+            if event.level == "detail":
+                if self.progress_callback:
+                    self.progress_callback(event.message)
+            elif self.log_callback:
+                self.log_callback(event.message)
+        elif isinstance(event, BatchStats) and self.progress_callback and event.total:
+            progress = (event.done / event.total) * 100
+            self.progress_callback(f"Fortschritt: {progress:.1f}% ({event.done}/{event.total})")
+    
+    def log(self, message: str, level: str = "info"):
+        """Veröffentlicht eine Protokollzeile auf dem Ereignis-Bus"""
+        self.events.publish(LogMessage(message=message, level=level))
     
     def check_ffmpeg(self) -> bool:
         """Überprüft, ob FFmpeg installiert ist"""
         try:
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                  capture_output=True, text=True, timeout=10)
-            return result.returncode == 0
+            return get_supervisor().run(['ffmpeg', '-version'], timeout=10).returncode == 0
         except:
             return False
     
@@ -41,6 +124,355 @@ class VideoConverter:
         size_gb = self.get_file_size_mb(file_path) / 1024
         return size_gb > self.config.get("extra_large_file_threshold_gb", 1)
     
+    def get_output_cache(self):
+        """Liefert den Ergebnis-Cache, falls aktiviert"""
+        if not self.config.get("output_cache_enabled", False):
+            return None
+        cache_dir = self.config.get("output_cache_directory")
+        if self.output_cache is None or str(self.output_cache.cache_dir) != cache_dir:
+            self.output_cache = OutputCache(cache_dir, self.config.get("output_cache_max_gb", 20),
+                                            log_callback=self.log)
+        return self.output_cache
+    
+    def get_history(self):
+        """Liefert die Konvertierungs-Historie, falls aktiviert"""
+        if not self.config.get("history_enabled", True):
+            return None
+        history_file = self.config.get("history_file")
+        if self.history is None or str(self.history.history_file) != history_file:
+            self.history = EncodeHistory(history_file, int(self.config.get("history_max_entries", 5000)),
+                                         log_callback=self.log)
+        return self.history
+    
+    def open_job_store(self):
+        """Öffnet die SQLite-Datei für Warteschlange und Analyse-Ergebnisse (None = nur im Speicher)"""
+        if not self.config.get("persistent_probe_cache", True):
+            return None
+        try:
+            return JobStore(self.config.get("queue_file"))
+        except (OSError, sqlite3.Error) as e:
+            self.log(f"Warteschlangen-Datei nicht verfügbar, Analyse-Ergebnisse nur im Speicher: {str(e)}")
+            return None
+    
+    def get_encoder_health(self) -> EncoderHealth:
+        """Liefert den gespeicherten Zustand der Hardware-Encoder"""
+        health_file = self.config.get("encoder_health_file")
+        if self.encoder_health is None or str(self.encoder_health.health_file) != health_file:
+            self.encoder_health = EncoderHealth(health_file, float(self.config.get("encoder_health_ttl_h", 24)),
+                                                log_callback=self.log)
+        return self.encoder_health
+    
+    def estimate_files(self, file_list: List[Dict], encoder: str, crf: int, preset: str, 
+                       profile: str, color_depth_mode: str = "auto", split_large_files: bool = None,
+                       rate_control: str = "crf", bitrate_k: int = 0) -> dict:
+        """Schätzt Dauer und Größe pro Datei und für den Batch (aus Historie, sonst nur die Größe)"""
+        history = self.get_history()
+        if split_large_files is None:
+            split_large_files = self.config.get("split_large_files", True)
+        parallel_jobs = max(1, int(self.config.get("max_parallel_jobs", 1)))
+        batch_settings = {'encoder': encoder, 'crf': crf, 'preset': preset, 'profile': profile,
+                          'rate_control': rate_control, 'bitrate_k': bitrate_k}
+        
+        files = []
+        for file_info in file_list:
+            input_file = file_info['path']
+            job = self.get_job_settings(input_file, batch_settings)
+            split = bool(split_large_files and self.should_split_file(input_file))
+            files.append(self.estimate_file(input_file, job, split, history))
+        
+        known = [(i, f['time_s']) for i, f in enumerate(files) if f['time_s'] is not None]
+        order = lpt_order(known)
+        return {
+            'files': files,
+            'total_size_bytes': sum(f['size_bytes'] for f in files),
+            'total_time_s': makespan([files[i]['time_s'] for i in order], parallel_jobs) if known else None,
+            'unknown_time': len(files) - len(known),
+            'parallel_jobs': parallel_jobs
+        }
+    
+    def estimate_file(self, input_file: str, job: dict, split: bool, history=None) -> dict:
+        """Schätzt Dauer und Größe einer Datei (aus Historie, sonst nur die Größe)"""
+        video_info = self.get_video_info(input_file)
+        estimate = history.estimate(video_info, job, split) if history else None
+        if estimate is None:
+            # Ohne passende Historie: Größe aus der Quelle schätzen, Dauer unbekannt
+            try:
+                size_bytes = estimate_output_bytes(video_info, os.path.getsize(input_file), job['crf'],
+                                                   job['rate_control'], job['bitrate_k'])
+            except OSError:
+                size_bytes = 0
+            estimate = {'time_s': None, 'size_bytes': size_bytes, 'samples': 0}
+        estimate['path'] = input_file
+        estimate['duration'] = video_info.get('duration', 0)
+        return estimate
+    
+    def order_for_makespan(self, file_list: List[Dict], estimates: dict) -> List[Dict]:
+        """Ordnet die Jobs nach LPT, damit parallele Worker möglichst gleichzeitig fertig werden"""
+        # Ohne Historie dient die Laufzeit der Quelle als Näherung für den Aufwand
+        costs = [(i, f['time_s'] if f['time_s'] is not None else f['duration'])
+                 for i, f in enumerate(estimates['files'])]
+        return [file_list[i] for i in lpt_order(costs)]
+    
+    def plan_files(self, file_list: List[Dict], encoder: str, crf: int, preset: str, profile: str,
+                   threads: str, output_format: str, overwrite: bool = False, color_depth_mode: str = "auto",
+                   split_large_files: bool = None, rate_control: str = "crf", bitrate_k: int = 0) -> dict:
+        """Probelauf: vollständiger Ausführungsplan mit allen Befehlen, ohne etwas zu kodieren oder zu analysieren"""
+        if split_large_files is None:
+            split_large_files = self.config.get("split_large_files", True)
+        batch_settings = {'encoder': encoder, 'crf': crf, 'preset': preset, 'profile': profile,
+                          'rate_control': rate_control, 'bitrate_k': bitrate_k}
+        ladder_mode = self.config.get("ladder_mode", False)
+        history = self.get_history()
+        output_cache = self.get_output_cache()
+        
+        jobs = []
+        for file_info in file_list:
+            input_file = file_info['path']
+            job = self.get_job_settings(input_file, batch_settings)
+            # Fehlende Szenen- und Bild-Analysen werden nicht nachgeholt, der Job gilt dann als vorläufig
+            self.job_context.missing_analysis = set()
+            try:
+                entry = self.plan_file(input_file, job, threads, output_format, overwrite, color_depth_mode,
+                                       split_large_files, ladder_mode, history, output_cache)
+                entry['provisional'] = sorted(self.job_context.missing_analysis)
+            finally:
+                self.job_context.missing_analysis = None
+            jobs.append(entry)
+        
+        # Gemeinsame Encoder-Sitzungen wie in convert_files (nur für Jobs, die tatsächlich laufen)
+        if self.config.get("session_pooling_enabled", False) and not ladder_mode:
+            runnable = [{'path': entry['inputs'][0]} for entry in jobs if not entry['skip_reason']]
+            groups, _ = self.plan_session_pools(runnable, batch_settings, output_format, split_large_files)
+            by_input = {entry['inputs'][0]: entry for entry in jobs if not entry['skip_reason']}
+            pooled = {file_info['path'] for group in groups for file_info in group}
+            jobs = [entry for entry in jobs if entry['skip_reason'] or entry['inputs'][0] not in pooled]
+            for input_files in ([file_info['path'] for file_info in group] for group in groups):
+                entries = [by_input[path] for path in input_files]
+                self.job_context.missing_analysis = {note for entry in entries for note in entry['provisional']}
+                try:
+                    entry = self.plan_pool(input_files, entries, self.get_job_settings(input_files[0], batch_settings),
+                                           threads, color_depth_mode)
+                    entry['provisional'] = sorted(self.job_context.missing_analysis)
+                finally:
+                    self.job_context.missing_analysis = None
+                jobs.append(entry)
+        
+        parallel_jobs = max(1, int(self.config.get("max_parallel_jobs", 1)))
+        runnable = [entry for entry in jobs if not entry['skip_reason']]
+        known = [entry['estimate']['time_s'] for entry in runnable if entry['estimate']['time_s'] is not None]
+        return {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'settings': self.get_effective_settings(encoder, crf, preset, profile, output_format,
+                                                    color_depth_mode, rate_control, bitrate_k),
+            'parallel_jobs': parallel_jobs,
+            'jobs': jobs,
+            'skipped': len(jobs) - len(runnable),
+            'total_size_bytes': sum(entry['estimate']['size_bytes'] for entry in runnable),
+            'total_time_s': makespan(sorted(known, reverse=True), parallel_jobs) if known else None,
+            'unknown_time': len(runnable) - len(known)
+        }
+    
+    def plan_file(self, input_file: str, job: dict, threads: str, output_format: str, overwrite: bool,
+                  color_depth_mode: str, split_large_files: bool, ladder_mode: bool, history=None,
+                  output_cache=None) -> dict:
+        """Plant einen Job: Befehle, Aufteilung, Schätzung oder Grund für das Überspringen"""
+        filename = os.path.splitext(os.path.basename(input_file))[0]
+        video_info = self.get_video_info(input_file)
+        rate_control = self.get_effective_rate_control(job['encoder'], job['rate_control'], job['bitrate_k'])
+        entry = {
+            'inputs': [input_file],
+            'outputs': [],
+            'skip_reason': None,
+            'encoder': job['encoder'],
+            'profile': self.get_optimal_profile(video_info, job['profile'], color_depth_mode) if video_info else None,
+            'preset': job['preset'],
+            'crf': job['crf'],
+            'rate_control': rate_control,
+            'bitrate_k': job['bitrate_k'],
+            'filters': [],
+            'layout': {'mode': 'single'},
+            'directories': [],
+            'steps': [],
+            'estimate': None
+        }
+        if not video_info:
+            entry['skip_reason'] = "Video-Informationen nicht lesbar"
+            return entry
+        
+        if ladder_mode:
+            outputs = self.get_ladder_outputs(input_file, filename, output_format)
+            entry['outputs'] = [path for _, path in outputs]
+            if not outputs:
+                entry['skip_reason'] = "Keine passenden Auflösungsstufen"
+            elif not overwrite and all(os.path.exists(path) for path in entry['outputs']):
+                entry['skip_reason'] = "Auflösungsstufen existieren bereits"
+        else:
+            output_file = os.path.join(self.config.get("output_directory"),
+                                       f"{filename}_H264.{output_format.lower()}")
+            entry['outputs'] = [output_file]
+            if os.path.exists(output_file) and not overwrite:
+                entry['skip_reason'] = "Ausgabedatei existiert bereits"
+            elif output_cache:
+                try:
+                    effective_settings = self.get_effective_settings(
+                        job['encoder'], job['crf'], job['preset'], job['profile'],
+                        output_format, color_depth_mode, job['rate_control'], job['bitrate_k'])
+                    if output_cache.contains(output_cache.make_key(input_file, effective_settings)):
+                        entry['skip_reason'] = "Im Ergebnis-Cache vorhanden"
+                except OSError:
+                    pass
+        if entry['skip_reason']:
+            return entry
+        
+        # Stream-Zuordnung wie vor dem Start einer echten Konvertierung prüfen
+        stream_plan = self.get_stream_plan(input_file, entry['outputs'][0])
+        if stream_plan is not None:
+            errors = validate_plan(video_info.get('index'), stream_plan, output_format.upper())
+            if errors:
+                entry['skip_reason'] = f"Stream-Prüfung fehlgeschlagen: {'; '.join(errors)}"
+                return entry
+        
+        entry['directories'].append(os.path.dirname(entry['outputs'][0]))
+        if ladder_mode:
+            self.plan_ladder_steps(entry, input_file, outputs, job, threads, color_depth_mode)
+            split = False
+        else:
+            entry['filters'] = self.get_filter_plan(input_file, job['encoder'], entry['profile'])['description']
+            split = self.plan_encode_steps(entry, input_file, job, threads, split_large_files)
+        
+        estimate = self.estimate_file(input_file, job, split, None if ladder_mode else history)
+        entry['estimate'] = {'time_s': estimate['time_s'], 'size_bytes': estimate['size_bytes'] * len(entry['outputs'])}
+        return entry
+    
+    def plan_encode_steps(self, entry: dict, input_file: str, job: dict, threads: str,
+                          split_large_files: bool) -> bool:
+        """Befehle einer Einzeldatei wie in convert_single_file (liefert True bei Aufteilung)"""
+        output_file = entry['outputs'][0]
+        encoder, crf, preset, profile = job['encoder'], job['crf'], job['preset'], entry['profile']
+        rate_control, bitrate_k = entry['rate_control'], job['bitrate_k']
+        if self.config.get("thumbnails_enabled", False):
+            entry['directories'].append(self.get_thumbnail_directory(output_file))
+        
+        chunks = []
+        if split_large_files and self.should_split_file(input_file) and rate_control != "2pass":
+            chunks = self.get_chunk_plan(input_file)
+        if len(chunks) >= 2:
+            # Fester Name statt tempfile.mkdtemp, damit der Plan reproduzierbar bleibt
+            chunk_dir = os.path.join(os.path.dirname(output_file),
+                                     f".h264_chunks_{os.path.splitext(os.path.basename(output_file))[0]}")
+            chunk_files = [os.path.join(chunk_dir, f"chunk_{i:04d}.mkv") for i in range(len(chunks))]
+            list_file = os.path.join(chunk_dir, "chunks.txt")
+            entry['layout'] = {'mode': 'split', 'chunks': [[round(start, 3), round(end, 3)] for start, end in chunks],
+                               'parallel': True}
+            entry['directories'].append(chunk_dir)
+            for i, ((start, end), chunk_file) in enumerate(zip(chunks, chunk_files)):
+                entry['steps'].append({'name': f"Abschnitt {i + 1}/{len(chunks)}",
+                                       'argv': self.build_chunk_command(input_file, output_file, chunk_file, i,
+                                                                        start, end, encoder, crf, preset, profile,
+                                                                        threads, rate_control, bitrate_k)})
+            entry['steps'].append({'name': "Abschnittsliste", 'write': list_file,
+                                   'content': self.get_chunk_list(chunk_files)})
+            entry['steps'].append({'name': "Zusammenfügen",
+                                   'argv': self.build_concat_command(input_file, output_file, list_file)})
+            entry['steps'].append({'name': "Aufräumen", 'remove': chunk_dir})
+            return True
+        
+        output_args = None
+        if rate_control == "2pass":
+            pass_log_prefix = self.get_pass_log_prefix(input_file, preset, profile)
+            entry['layout'] = {'mode': '2pass', 'pass_log_prefix': pass_log_prefix,
+                               'first_pass_cached': self.has_pass_stats(pass_log_prefix)}
+            if not entry['layout']['first_pass_cached']:
+                entry['steps'].append({'name': "Durchgang 1",
+                                       'argv': self.build_first_pass_command(input_file, pass_log_prefix, crf,
+                                                                             preset, profile, threads, bitrate_k)})
+            output_args = ['-pass', '2', '-passlogfile', pass_log_prefix]
+        
+        entry['steps'].append({'name': "Kodierung",
+                               'argv': self.build_ffmpeg_command(input_file, output_file, encoder, crf, preset,
+                                                                 profile, threads, rate_control=rate_control,
+                                                                 bitrate_k=bitrate_k, output_args=output_args,
+                                                                 extra_outputs=self.get_thumbnail_outputs(
+                                                                     input_file, output_file))})
+        return False
+    
+    def plan_ladder_steps(self, entry: dict, input_file: str, outputs: List[Tuple[dict, str]], job: dict,
+                          threads: str, color_depth_mode: str):
+        """Befehle des Ladder-Modus wie in convert_ladder_file"""
+        encoder, crf, preset, profile = job['encoder'], job['crf'], job['preset'], job['profile']
+        rate_control, bitrate_k = entry['rate_control'], job['bitrate_k']
+        entry['layout'] = {'mode': 'ladder', 'renditions': [rendition['height'] for rendition, _ in outputs]}
+        
+        pass_prefixes = None
+        if rate_control == "2pass":
+            video_info = self.get_video_info(input_file)
+            pass_prefixes = {
+                i: self.get_pass_log_prefix(input_file, preset,
+                                            self.get_optimal_profile(video_info, rendition.get('profile', profile),
+                                                                     color_depth_mode),
+                                            rendition['height'])
+                for i, (rendition, _) in enumerate(outputs)
+            }
+            missing = [i for i, prefix in pass_prefixes.items() if not self.has_pass_stats(prefix)]
+            if missing:
+                entry['steps'].append({'name': "Durchgang 1",
+                                       'argv': self.build_ladder_command(
+                                           input_file, [outputs[i] for i in missing], encoder, crf, preset,
+                                           profile, threads, color_depth_mode, rate_control, bitrate_k,
+                                           {n: pass_prefixes[i] for n, i in enumerate(missing)}, first_pass=True)})
+        
+        entry['steps'].append({'name': "Kodierung",
+                               'argv': self.build_ladder_command(input_file, outputs, encoder, crf, preset, profile,
+                                                                 threads, color_depth_mode, rate_control,
+                                                                 bitrate_k, pass_prefixes)})
+    
+    def plan_pool(self, input_files: List[str], entries: List[dict], job: dict, threads: str,
+                  color_depth_mode: str) -> dict:
+        """Fasst die geplanten Jobs einer gemeinsamen Encoder-Sitzung zu einem Eintrag zusammen"""
+        output_files = [entry['outputs'][0] for entry in entries]
+        output_format = os.path.splitext(output_files[0])[1].lstrip('.').lower()
+        pool_dir = os.path.join(os.path.dirname(output_files[0]),
+                                f".h264_pool_{os.path.splitext(os.path.basename(output_files[0]))[0]}")
+        pattern = os.path.join(pool_dir, f"segment_%04d.{output_format}")
+        steps = [{'name': f"Sitzung ({len(input_files)} Clips)",
+                  'argv': self.build_pool_command(input_files, output_files, job, threads, color_depth_mode, pattern)}]
+        steps.extend({'name': "Segment übernehmen", 'move': [pattern % i, output_file]}
+                     for i, output_file in enumerate(output_files))
+        steps.append({'name': "Aufräumen", 'remove': pool_dir})
+        times = [entry['estimate']['time_s'] for entry in entries]
+        return dict(entries[0], inputs=input_files, outputs=output_files,
+                    layout={'mode': 'pooled', 'segments': len(input_files)},
+                    directories=[os.path.dirname(output_files[0]), pool_dir], steps=steps,
+                    estimate={'time_s': sum(times) if None not in times else None,
+                              'size_bytes': sum(entry['estimate']['size_bytes'] for entry in entries)})
+    
+    def get_effective_settings(self, encoder: str, crf: int, preset: str, profile: str,
+                               output_format: str, color_depth_mode: str, 
+                               rate_control: str = "crf", bitrate_k: int = 0) -> dict:
+        """Liefert alle Einstellungen, die das Ergebnis einer Konvertierung beeinflussen"""
+        return {
+            'encoder': encoder,
+            'crf': crf,
+            'preset': preset,
+            'profile': profile,
+            'output_format': output_format.lower(),
+            'color_depth_mode': color_depth_mode,
+            'rate_control': rate_control,
+            'bitrate_k': bitrate_k if rate_control != "crf" else 0,
+            'delivery': {
+                'fragmented_mp4': self.config.get("fragmented_mp4", False),
+                'keyframe_interval_s': self.config.get("keyframe_interval_s", 0)
+            } if self.config.get("delivery_optimized", False) else None,
+            'filters': {
+                'max_output_height': self.config.get("max_output_height", 0),
+                'auto_crop': self.config.get("auto_crop", True),
+                'auto_deinterlace': self.config.get("auto_deinterlace", True)
+            } if self.config.get("filter_planner_enabled", False) else None,
+            'color': {
+                'tonemap_algorithm': self.config.get("tonemap_algorithm", "hable")
+            } if self.config.get("color_pipeline_enabled", True) else None
+        }
+    
     def should_optimize_file(self, file_path: str) -> bool:
         """Ermittelt, ob eine Datei optimiert werden sollte"""
         size_mb = self.get_file_size_mb(file_path)
@@ -48,112 +480,461 @@ class VideoConverter:
     
     def build_ffmpeg_command(self, input_file: str, output_file: str, 
                            encoder: str, crf: int, preset: str, 
-                           profile: str, threads: str) -> List[str]:
+                           profile: str, threads: str, input_args: List[str] = None,
+                           video_only: bool = False, rate_control: str = "crf",
+                           bitrate_k: int = 0, output_args: List[str] = None,
+                           extra_outputs: List[str] = None) -> List[str]:
         """Baut den FFmpeg-Befehl zusammen"""
-        cmd = ['ffmpeg', '-i', input_file, '-y']  # -y überschreibt existierende Dateien
+        started = time.perf_counter()
+        # Zuschneiden/Deinterlacing/Verkleinern; GPU-Filter nur ohne weitere (Software-)Ausgaben
+        filter_plan = self.get_filter_plan(input_file, encoder, profile, hardware_filters=not extra_outputs)
+        cmd = (['ffmpeg'] + (input_args or []) + filter_plan['input_args'] +
+               ['-i', input_file, '-y'])  # -y überschreibt existierende Dateien
+        
+        # Video-Stream immer explizit auswählen (die Audio-Streams werden ebenfalls per -map zugeordnet)
+        if video_only:
+            cmd.extend(['-map', '0:v:0', '-an', '-sn'])
+        elif self.get_stream_plan(input_file, output_file) is not None:
+            cmd.extend(['-map', f"0:{self.get_video_info(input_file)['index']}"])
+        else:
+            cmd.extend(['-map', '0:v:0'])
+        
+        # Video-Encoder, Qualität, Profil und Threading
+        cmd.extend(self.get_video_encoder_args(encoder, crf, preset, profile, threads, 
+                                               rate_control, bitrate_k))
+        cmd.extend(filter_plan['output_args'])
+        
+        # Keyframe-Intervall/GOP-Ausrichtung für Streaming-Auslieferung
+        cmd.extend(self.get_keyframe_args(input_file, encoder))
+        
+        if not video_only:
+            # Audio-, Untertitel- und Anhang-Streams (kopieren, neu kodieren oder verwerfen)
+            cmd.extend(self.get_stream_args(input_file, output_file))
+            
+            # Container-Optimierung (faststart, fragmentiertes MP4, Index vorne)
+            cmd.extend(self.get_delivery_muxer_args(output_file))
+        
+        # Große Datei-Optimierung
+        if self.should_optimize_file(input_file):
+            self.log(f"Optimiere große Datei: {os.path.basename(input_file)}")
+            cmd.extend(['-max_muxing_queue_size', '1024'])
+        
+        # Zusätzliche Ausgabe-Parameter (z.B. Durchgang bei Zwei-Pass-Kodierung)
+        cmd.extend(output_args or [])
+        
+        # Ausgabedatei
+        cmd.append(output_file)
+        
+        # Weitere Ausgaben aus demselben Dekodiervorgang (z.B. Vorschaubilder)
+        cmd.extend(extra_outputs or [])
+        
+        self.tracer.complete("build_ffmpeg_command", started, time.perf_counter(), "command",
+                             output=os.path.basename(output_file))
+        return cmd
+    
+    def get_video_encoder_args(self, encoder: str, crf: int, preset: str, 
+                               profile: str, threads: str, rate_control: str = "crf",
+                               bitrate_k: int = 0) -> List[str]:
+        """Liefert die Encoder-Parameter für einen Video-Ausgabestream"""
+        args = []
         
         # Encoder-spezifische Parameter
         if encoder == "libx264":
-            cmd.extend(['-c:v', 'libx264'])
+            args.extend(['-c:v', 'libx264'])
             # libx264 unterstützt alle Presets
-            cmd.extend(['-preset', preset])
+            args.extend(['-preset', preset])
         elif encoder == "h264_nvenc":
-            cmd.extend(['-c:v', 'h264_nvenc'])
+            args.extend(['-c:v', 'h264_nvenc'])
             # NVIDIA NVENC unterstützt nur bestimmte Presets
             if preset in ["veryslow", "slower", "slow"]:
-                cmd.extend(['-preset', 'slow'])
+                args.extend(['-preset', 'slow'])
             elif preset in ["faster", "veryfast", "superfast", "ultrafast"]:
-                cmd.extend(['-preset', 'fast'])
+                args.extend(['-preset', 'fast'])
             else:
-                cmd.extend(['-preset', 'medium'])
+                args.extend(['-preset', 'medium'])
         elif encoder == "h264_amf":
-            cmd.extend(['-c:v', 'h264_amf'])
+            args.extend(['-c:v', 'h264_amf'])
             # AMD AMF verwendet quality-Parameter statt preset
             if preset in ["veryslow", "slower", "slow"]:
-                cmd.extend(['-quality', 'quality'])
+                args.extend(['-quality', 'quality'])
             elif preset in ["faster", "veryfast", "superfast", "ultrafast"]:
-                cmd.extend(['-quality', 'speed'])
+                args.extend(['-quality', 'speed'])
             else:
-                cmd.extend(['-quality', 'balanced'])
-            
-            # AMD-spezifische Parameter für bessere Qualität
-            cmd.extend(['-rc', 'cqp'])  # Constant QP Rate Control
-            cmd.extend(['-qp_i', '23'])  # I-Frame QP
-            cmd.extend(['-qp_p', '23'])  # P-Frame QP
-            cmd.extend(['-qp_b', '23'])  # B-Frame QP
+                args.extend(['-quality', 'balanced'])
         elif encoder == "h264_qsv":
-            cmd.extend(['-c:v', 'h264_qsv'])
+            args.extend(['-c:v', 'h264_qsv'])
             # Intel QSV unterstützt nur bestimmte Presets
             if preset in ["veryslow", "slower", "slow"]:
-                cmd.extend(['-preset', 'slow'])
+                args.extend(['-preset', 'slow'])
             elif preset in ["faster", "veryfast", "superfast", "ultrafast"]:
-                cmd.extend(['-preset', 'fast'])
+                args.extend(['-preset', 'fast'])
             else:
-                cmd.extend(['-preset', 'medium'])
+                args.extend(['-preset', 'medium'])
         
-        # Qualität (CRF für libx264, QP für Hardware-Encoder)
-        if encoder == "libx264":
-            cmd.extend(['-crf', str(crf)])
+        if rate_control in ("vbr", "2pass") and bitrate_k > 0:
+            # Zielbitrate mit VBV-Begrenzung (maxrate/bufsize)
+            args.extend(self.get_bitrate_args(encoder, bitrate_k))
+        elif encoder == "libx264":
+            # Qualität (CRF für libx264, QP für Hardware-Encoder)
+            args.extend(['-crf', str(crf)])
         elif encoder == "h264_amf":
-            # AMD AMF verwendet bereits QP-Parameter oben
-            pass  # QP-Parameter wurden bereits gesetzt
+            # AMD AMF: Constant QP mit dem eingestellten Qualitätswert
+            qp = str(max(0, min(51, crf)))
+            args.extend(['-rc', 'cqp', '-qp_i', qp, '-qp_p', qp, '-qp_b', qp])
         else:
             # Andere Hardware-Encoder verwenden QP statt CRF
             qp = max(0, min(51, crf))  # Konvertiere CRF zu QP
-            cmd.extend(['-qp', str(qp)])
+            args.extend(['-qp', str(qp)])
         
         # Encoding-Profil
-        cmd.extend(['-profile:v', profile])
+        args.extend(['-profile:v', profile])
         
         # Threading
         if threads != "Auto":
             if threads == "Max":
-                cmd.extend(['-threads', '0'])  # 0 = alle verfügbaren Threads
+                args.extend(['-threads', '0'])  # 0 = alle verfügbaren Threads
             else:
-                cmd.extend(['-threads', threads])
+                args.extend(['-threads', threads])
         
-        # Audio-Codec (Kopie)
-        cmd.extend(['-c:a', 'copy'])
+        return args
+    
+    def get_stream_plan(self, input_file: str, output_file: str):
+        """Liefert den Stream-Mapping-Plan oder None (dann wird Audio unverändert kopiert)"""
+        if not self.config.get("stream_mapping_enabled", True):
+            return None
+        video_info = self.get_video_info(input_file)
+        if not video_info:
+            return None
+        output_format = os.path.splitext(output_file)[1].lstrip('.').upper()
+        return plan_streams(video_info.get('streams', []), output_format)
+    
+    def get_stream_args(self, input_file: str, output_file: str, input_index: int = 0) -> List[str]:
+        """Liefert Mapping- und Codec-Parameter für alle Nicht-Video-Streams"""
+        plan = self.get_stream_plan(input_file, output_file)
+        if plan is None:
+            # Ohne Zuordnung Audio kopieren; -map ist nötig, weil Video überall explizit zugeordnet wird
+            return ['-map', f'{input_index}:a?', '-c:a', 'copy']
+        return stream_args(plan, input_index)
+    
+    def check_stream_plan(self, input_file: str, output_file: str) -> bool:
+        """Prüft vor dem Start, ob alle Streams in den Zielcontainer passen, und protokolliert Anpassungen"""
+        plan = self.get_stream_plan(input_file, output_file)
+        if plan is None:
+            return True
         
-        # Große Datei-Optimierung
-        if self.should_optimize_file(input_file):
-            self.log(f"Optimiere große Datei: {os.path.basename(input_file)}")
-            cmd.extend(['-max_muxing_queue_size', '1024'])
+        output_format = os.path.splitext(output_file)[1].lstrip('.').upper()
+        errors = validate_plan(self.get_video_info(input_file).get('index'), plan, output_format)
+        for error in errors:
+            self.log(f"Stream-Prüfung fehlgeschlagen: {error}")
         
-        # Ausgabedatei
-        cmd.append(output_file)
+        for item in plan:
+            if item['action'] == 'transcode':
+                self.log(f"Stream #{item['index']} ({item['type']}) wird neu kodiert: {item['reason']}")
+            elif item['action'] == 'drop':
+                self.log(f"Stream #{item['index']} wird verworfen: {item['reason']}")
+        return not errors
+    
+    def get_bitrate_args(self, encoder: str, bitrate_k: int) -> List[str]:
+        """Liefert Parameter für Zielbitrate mit maxrate/bufsize"""
+        maxrate = round(bitrate_k * float(self.config.get("vbv_maxrate_factor", 1.5)))
+        bufsize = round(bitrate_k * float(self.config.get("vbv_bufsize_factor", 2.0)))
+        args = []
+        if encoder == "h264_nvenc":
+            args.extend(['-rc', 'vbr'])
+        elif encoder == "h264_amf":
+            args.extend(['-rc', 'vbr_peak'])
+        args.extend(['-b:v', f'{bitrate_k}k', '-maxrate', f'{maxrate}k', '-bufsize', f'{bufsize}k'])
+        return args
+    
+    def get_pass_log_prefix(self, input_file: str, preset: str, profile: str, height: int = 0) -> str:
+        """Liefert den Pfad der Statistikdatei des ersten Durchgangs (unabhängig von der Zielbitrate)"""
+        # Filter ändern Auflösung und Bilder: geänderte Filter dürfen keine alte Statistik wiederverwenden
+        if height:
+            filters = self.get_color_plan(input_file, profile)['filters']  # Auflösungsstufe: scale + Farbe
+        else:
+            filter_plan = self.get_filter_plan(input_file, "libx264", profile)
+            filters = filter_plan['input_args'] + filter_plan['output_args']
+        analysis_settings = {
+            'preset': preset,
+            'profile': profile,
+            'height': height,
+            'keyframes': self.get_keyframe_args(input_file, "libx264"),
+            'filters': filters
+        }
+        stats_dir = self.config.get("two_pass_stats_directory")
+        os.makedirs(stats_dir, exist_ok=True)
+        return os.path.join(stats_dir, f"{partial_file_hash(input_file)}-{settings_hash(analysis_settings)}")
+    
+    def has_pass_stats(self, pass_log_prefix: str) -> bool:
+        """Prüft, ob die Statistik eines früheren ersten Durchgangs vorhanden ist"""
+        return os.path.exists(f"{pass_log_prefix}-0.log")
+    
+    def run_first_pass(self, input_file: str, pass_log_prefix: str, crf: int, preset: str, 
+                       profile: str, threads: str, bitrate_k: int) -> bool:
+        """Führt den Analyse-Durchgang von libx264 aus"""
+        self.log(f"Erster Durchgang (Analyse): {os.path.basename(input_file)}")
+        cmd = self.build_first_pass_command(input_file, pass_log_prefix, crf, preset, profile, threads, bitrate_k)
+        return_code, _ = self.run_ffmpeg(cmd, prefix="[Durchgang 1] ")
+        if return_code != 0:
+            # Unvollständige Statistik nicht wiederverwenden
+            for suffix in ("-0.log", "-0.log.mbtree", "-0.log.temp", "-0.log.mbtree.temp"):
+                if os.path.exists(pass_log_prefix + suffix):
+                    os.remove(pass_log_prefix + suffix)
+        return return_code == 0
+    
+    def build_first_pass_command(self, input_file: str, pass_log_prefix: str, crf: int, preset: str,
+                                 profile: str, threads: str, bitrate_k: int) -> List[str]:
+        """Baut den Befehl für den Analyse-Durchgang von libx264"""
+        return self.build_ffmpeg_command(input_file, '-', "libx264", crf, preset, profile, threads,
+                                         video_only=True, rate_control="2pass", bitrate_k=bitrate_k,
+                                         output_args=['-pass', '1', '-passlogfile', pass_log_prefix, 
+                                                      '-f', 'null'])
+    
+    def get_keyframe_args(self, input_file: str, encoder: str) -> List[str]:
+        """Liefert Parameter für ein festes Keyframe-Intervall"""
+        interval = float(self.config.get("keyframe_interval_s", 0) or 0)
+        if not self.config.get("delivery_optimized", False) or interval <= 0:
+            return []
         
-        return cmd
+        args = ['-force_key_frames', f'expr:gte(t,n_forced*{interval:g})']
+        frame_rate = self.get_video_info(input_file).get('frame_rate', 0)
+        if frame_rate > 0:
+            gop = max(1, round(frame_rate * interval))
+            args.extend(['-g', str(gop), '-keyint_min', str(gop)])
+        if encoder == "libx264":
+            # Keine zusätzlichen Keyframes an Szenenwechseln, damit die GOPs ausgerichtet bleiben
+            args.extend(['-sc_threshold', '0'])
+        elif encoder == "h264_nvenc":
+            args.extend(['-forced-idr', '1'])
+        return args
+    
+    def uses_deferred_faststart(self, output_format: str) -> bool:
+        """Ermittelt, ob faststart in einem nachgelagerten Remux-Schritt erfolgt"""
+        return (self.config.get("delivery_optimized", False) and
+                self.config.get("faststart_deferred", False) and
+                not self.config.get("fragmented_mp4", False) and
+                output_format.upper() in ("MP4", "MOV"))
+    
+    def get_delivery_muxer_args(self, output_file: str) -> List[str]:
+        """Liefert Muxer-Parameter für schnellen Wiedergabestart"""
+        if not self.config.get("delivery_optimized", False):
+            return []
+        
+        output_format = os.path.splitext(output_file)[1].lstrip('.').upper()
+        if output_format in ("MP4", "MOV"):
+            if self.config.get("fragmented_mp4", False):
+                return ['-movflags', '+frag_keyframe+empty_moov+default_base_moof']
+            if self.uses_deferred_faststart(output_format):
+                return []  # moov-Atom wird nach der Konvertierung verschoben
+            return ['-movflags', '+faststart']
+        elif output_format == "MKV":
+            # Platz für den Index (Cues) am Dateianfang reservieren
+            return ['-reserve_index_space', '200k']
+        elif output_format == "FLV":
+            return ['-flvflags', 'add_keyframe_index']
+        return []  # AVI bietet keine Streaming-Optimierung
+    
+    def apply_faststart(self, output_file: str) -> bool:
+        """Verschiebt das moov-Atom an den Dateianfang (Remux ohne Neukodierung)"""
+        base, ext = os.path.splitext(output_file)
+        tmp_file = f"{base}.faststart{ext}"
+        cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-i', output_file, '-map', '0', 
+               '-c', 'copy', '-movflags', '+faststart', '-y', tmp_file]
+        try:
+            result = get_supervisor().run(cmd, capture_stderr=True, group="postprocess")
+            if result.returncode == 0:
+                os.replace(tmp_file, output_file)
+                self.log(f"faststart angewendet: {os.path.basename(output_file)}")
+                return True
+            self.log(f"faststart fehlgeschlagen: {result.stderr.strip()}")
+        except OSError as e:
+            self.log(f"faststart fehlgeschlagen: {str(e)}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return False
     
     def get_video_info(self, input_file: str) -> dict:
-        """Ermittelt Informationen über das Video"""
+        """Ermittelt Informationen über das Video (zwischengespeichert pro Dateistand)"""
+        try:
+            stat = os.stat(input_file)
+            cache_key = (os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns, VIDEO_INFO_KIND)
+        except OSError:
+            cache_key = None
+        
+        with self.probe_lock:
+            if cache_key in self.probe_cache:
+                return self.probe_cache[cache_key]
+        
         try:
             cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json', 
-                   '-show_streams', '-select_streams', 'v:0', input_file]
+                   '-show_streams', '-show_format', input_file]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            result = get_supervisor().run(cmd, timeout=30, capture_stdout=True, group="probe")
+            self.trace_process("get_video_info", result, "probe", input=os.path.basename(input_file))
             if result.returncode == 0:
                 data = json.loads(result.stdout)
-                if 'streams' in data and len(data['streams']) > 0:
-                    stream = data['streams'][0]
-                    return {
+                # Erster echter Video-Stream (eingebettete Cover-Bilder überspringen)
+                video_streams = [s for s in data.get('streams', []) 
+                                 if s.get('codec_type') == 'video' and 
+                                 not s.get('disposition', {}).get('attached_pic')]
+                if video_streams:
+                    stream = video_streams[0]
+                    format_info = data.get('format', {})
+                    info = {
+                        'index': stream.get('index', 0),
                         'width': stream.get('width', 0),
                         'height': stream.get('height', 0),
                         'pix_fmt': stream.get('pix_fmt', ''),
-                        'bit_depth': stream.get('bits_per_raw_sample', 8),
+                        'bit_depth': stream.get('bits_per_raw_sample', ''),
                         'codec_name': stream.get('codec_name', ''),
-                        'duration': stream.get('duration', 0)
+                        'color_primaries': stream.get('color_primaries', ''),
+                        'color_transfer': stream.get('color_transfer', ''),
+                        'color_space': stream.get('color_space', ''),
+                        'duration': float(stream.get('duration') or format_info.get('duration') or 0),
+                        'start_time': float(format_info.get('start_time') or 0),
+                        'nb_frames': int(stream.get('nb_frames') or 0),
+                        'frame_rate': self.parse_frame_rate(stream.get('avg_frame_rate', '')),
+                        'bit_rate': int(format_info.get('bit_rate') or 0),
+                        'streams': [{
+                            'index': s.get('index'),
+                            'codec_type': s.get('codec_type', ''),
+                            'codec_name': s.get('codec_name', ''),
+                            'language': s.get('tags', {}).get('language', '')
+                        } for s in data.get('streams', []) if s is not stream]
                     }
+                    # FFprobe liefert bits_per_raw_sample als Text (oder gar nicht)
+                    info['bit_depth'] = get_bit_depth(info)
+                    if cache_key:
+                        with self.probe_lock:
+                            self.probe_cache[cache_key] = info
+                    return info
         except Exception as e:
             self.log(f"Fehler beim Ermitteln der Video-Informationen: {str(e)}")
         
         return {}
     
+    def get_scene_index(self, input_file: str) -> dict:
+        """Ermittelt Keyframes und Szenenwechsel (zwischengespeichert neben den Video-Informationen)"""
+        try:
+            stat = os.stat(input_file)
+            cache_key = (os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns, 'scene_index_v2')
+        except OSError:
+            cache_key = None
+        
+        with self.probe_lock:
+            if cache_key in self.probe_cache:
+                return self.probe_cache[cache_key]
+        if self.is_planning():
+            self.job_context.missing_analysis.add("Szenen-Analyse fehlt: Aufteilung in Abschnitte erst beim Start")
+            return {'keyframes': [], 'scene_cuts': []}
+        
+        self.log(f"Analysiere Szenenwechsel: {os.path.basename(input_file)}")
+        index = {'keyframes': [], 'scene_cuts': []}
+        try:
+            start_time = self.get_video_info(input_file).get('start_time', 0.0)
+            index['keyframes'] = detect_keyframes(input_file, start_time)
+            index['scene_cuts'] = detect_scene_cuts(input_file, self.config.get("scene_cut_threshold", 0.4),
+                                                    start_time)
+        except (OSError, subprocess.SubprocessError) as e:
+            self.log(f"Fehler bei der Szenen-Analyse: {str(e)}")
+        
+        if cache_key:
+            with self.probe_lock:
+                self.probe_cache[cache_key] = index
+        return index
+    
+    def get_picture_analysis(self, input_file: str) -> dict:
+        """Erkennt schwarze Ränder und Halbbilder an Stichproben (zwischengespeichert pro Dateistand)"""
+        try:
+            stat = os.stat(input_file)
+            cache_key = (os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns, 'picture_analysis')
+        except OSError:
+            cache_key = None
+        
+        with self.probe_lock:
+            if cache_key in self.probe_cache:
+                return self.probe_cache[cache_key]
+        if self.is_planning():
+            self.job_context.missing_analysis.add("Bild-Analyse fehlt: Zuschneiden/Deinterlacing erst beim Start")
+            return None
+        
+        video_info = self.get_video_info(input_file)
+        seconds = float(self.config.get("filter_analysis_seconds", 2))
+        points = self.get_preview_points(video_info.get('duration', 0),
+                                         int(self.config.get("filter_analysis_samples", 5)), seconds)
+        self.log(f"Analysiere Bildränder und Halbbilder: {os.path.basename(input_file)}")
+        try:
+            with ThreadPoolExecutor(max_workers=len(points)) as executor:
+                samples = list(executor.map(lambda start: analyze_sample(input_file, start, seconds), points))
+            analysis = combine_samples(samples, video_info.get('width', 0), video_info.get('height', 0))
+        except (OSError, subprocess.SubprocessError) as e:
+            self.log(f"Fehler bei der Bild-Analyse: {str(e)}")
+            analysis = None
+        
+        if cache_key:
+            with self.probe_lock:
+                self.probe_cache[cache_key] = analysis
+        return analysis
+    
+    def is_planning(self) -> bool:
+        """Probelauf im aktuellen Thread: nur zwischengespeicherte Analysen verwenden, keine Dekodierung"""
+        return getattr(self.job_context, 'missing_analysis', None) is not None
+    
+    def get_available_filters(self) -> set:
+        """Ermittelt die Filter der installierten FFmpeg-Version (einmal pro Sitzung)"""
+        if self.available_filters is None:
+            try:
+                result = get_supervisor().run(['ffmpeg', '-hide_banner', '-filters'], timeout=10,
+                                              capture_stdout=True)
+                # Zeilen wie " TSC zscale            V->V       Apply resizing, colorspace and bit depth conversion."
+                self.available_filters = {line.split()[1] for line in result.stdout.splitlines()
+                                          if len(line.split()) > 2 and '->' in line.split()[2]}
+            except OSError as e:
+                self.log(f"Fehler beim Abfragen der Filter: {str(e)}")
+                self.available_filters = set()
+        return self.available_filters
+    
+    def get_color_plan(self, input_file: str, profile: str) -> dict:
+        """Farb-Pipeline für 8-Bit-Profile (Tone-Mapping bzw. Reduktion auf 8 Bit; leer, wenn nicht nötig)"""
+        video_info = self.get_video_info(input_file)
+        if not self.config.get("color_pipeline_enabled", True) or not needs_conversion(video_info):
+            return plan_color({}, profile)
+        return plan_color(video_info, profile, self.config.get("tonemap_algorithm", "hable"),
+                          self.get_available_filters())
+    
+    def get_filter_plan(self, input_file: str, encoder: str, profile: str = None,
+                        hardware_filters: bool = True) -> dict:
+        """Filter für Zuschneiden, Deinterlacing, Verkleinern und Farbumwandlung (leer, wenn nicht nötig)"""
+        color = self.get_color_plan(input_file, profile) if profile else None
+        hardware_filters = hardware_filters and self.config.get("hardware_filters", True)
+        if not self.config.get("filter_planner_enabled", False):
+            if not color or not color['filters']:
+                return {'input_args': [], 'output_args': [], 'description': []}
+            return plan_filters(self.get_video_info(input_file), None, 0, encoder, hardware_filters, color)
+        video_info = self.get_video_info(input_file)
+        analysis = None
+        if self.config.get("auto_crop", True) or self.config.get("auto_deinterlace", True):
+            analysis = self.get_picture_analysis(input_file)
+            if analysis:
+                analysis = dict(analysis)
+                if not self.config.get("auto_crop", True):
+                    analysis['crop'] = [video_info.get('width', 0), video_info.get('height', 0), 0, 0]
+                if not self.config.get("auto_deinterlace", True):
+                    analysis['interlaced'] = False
+        return plan_filters(video_info, analysis, int(self.config.get("max_output_height", 0) or 0), encoder,
+                            hardware_filters, color)
+    
+    def parse_frame_rate(self, rate: str) -> float:
+        """Wandelt eine FFprobe-Bildrate ("30000/1001") in eine Zahl um"""
+        try:
+            num, _, den = rate.partition('/')
+            return float(num) / float(den or 1)
+        except (ValueError, ZeroDivisionError):
+            return 0.0
+    
     def get_optimal_profile(self, video_info: dict, requested_profile: str, color_depth_mode: str = "auto") -> str:
         """Ermittelt das optimale Encoding-Profil basierend auf der Video-Farbtiefe und Benutzerauswahl"""
-        bit_depth = video_info.get('bit_depth', 8)
-        pix_fmt = video_info.get('pix_fmt', '')
-        is_10bit = bit_depth == 10 or '10' in pix_fmt
+        is_10bit = get_bit_depth(video_info) > 8
         
         # Farbtiefe-Modus bestimmen
         if color_depth_mode == "compatibility":
@@ -186,9 +967,100 @@ class VideoConverter:
                 # 8-Bit Video - verwende angeforderte Profil
                 return requested_profile
     
+    def run_ffmpeg(self, cmd: List[str], prefix: str = "", job_group: str = "") -> Tuple[int, List[str]]:
+        """Führt FFmpeg über den Supervisor aus, leitet Meldungen weiter und liefert Rückgabecode und letzte Ausgabezeilen"""
+        stderr_tail = deque(maxlen=50)
+        
+        job_id = getattr(self.job_context, 'job_id', '')
+        duration = getattr(self.job_context, 'duration', 0)
+        # Eigene Untergruppe pro Job, damit ein einzelner Job abgebrochen werden kann
+        job_group = job_group or job_id
+        group = f"conversion/{job_group}" if job_group else "conversion"
+        frames = {}  # Zeitpunkte der ersten und letzten Fortschrittszeile
+        
+        def on_line(output):
+            # Fortschrittszeilen als Ereignis, alle anderen Meldungen als Protokoll-Detail
+            if output.startswith('frame='):
+                if self.tracer.enabled:
+                    frames.setdefault('first', time.perf_counter())
+                    frames['last'] = time.perf_counter()
+                self.publish_progress(job_id, duration, output)
+            else:
+                stderr_tail.append(output)
+                self.log(f"{prefix}{output}", level="detail")
+        
+        timeout = float(self.config.get("ffmpeg_job_timeout_s", 0)) or None
+        result = get_supervisor().run(cmd, on_line=on_line, timeout=timeout, group=group,
+                                      grace_s=float(self.config.get("stop_grace_s", 10)))
+        if result.timed_out:
+            self.log(f"{prefix}Zeitlimit überschritten - FFmpeg wurde beendet")
+        self.trace_ffmpeg(result, frames, job=os.path.basename(job_id), prefix=prefix.strip())
+        return result.returncode, list(stderr_tail)
+    
+    def trace_process(self, name: str, result, category: str, **args):
+        """Trägt Start, erstes Ausgabe-Byte und Ende eines Prozesses in die Zeitleiste ein"""
+        if not self.tracer.enabled:
+            return
+        self.tracer.complete(f"{name}: spawn", result.requested_at, result.started_at, category, **args)
+        self.tracer.complete(name, result.started_at, result.ended_at, category,
+                             returncode=result.returncode, **args)
+        if result.first_output_at is not None:
+            self.tracer.instant(f"{name}: erstes Ausgabe-Byte", category, result.first_output_at)
+    
+    def trace_ffmpeg(self, result, frames: dict, **args):
+        """Zerlegt einen FFmpeg-Lauf in Start, Encoder-Initialisierung, Kodierung und Abschluss (Muxing)"""
+        if not self.tracer.enabled:
+            return
+        self.trace_process("ffmpeg", result, "ffmpeg", **args)
+        first_frame = frames.get('first', result.ended_at)
+        last_frame = frames.get('last', result.ended_at)
+        self.tracer.complete("ffmpeg: Initialisierung", result.started_at, first_frame, "ffmpeg")
+        if 'first' in frames:
+            self.tracer.complete("ffmpeg: Kodierung", first_frame, last_frame, "ffmpeg")
+        self.tracer.complete("ffmpeg: Abschluss", last_frame, result.ended_at, "ffmpeg")
+    
+    def publish_progress(self, job_id: str, duration: float, line: str):
+        """Wandelt eine FFmpeg-Fortschrittszeile in ein Progress-Ereignis um"""
+        match = FFMPEG_PROGRESS_PATTERN.search(line)
+        if not match:
+            return
+        fps, time_text, speed = match.groups()
+        out_time_s = 0.0
+        if not time_text.startswith('-'):
+            for part in time_text.split(':'):
+                out_time_s = out_time_s * 60 + float(part or 0)
+        percent = min(100.0, out_time_s / duration * 100) if duration > 0 else 0.0
+        self.events.publish(Progress(job_id=job_id, percent=percent, out_time_s=out_time_s,
+                                     fps=float(fps), speed=float(speed)))
+    
+    def is_hardware_encoder_error(self, encoder: str, stderr_tail: List[str]) -> bool:
+        """Erkennt Fehler beim Initialisieren eines Hardware-Encoders"""
+        if encoder == "libx264":
+            return False
+        output = "\n".join(stderr_tail)
+        return "Error while opening encoder" in output or self.is_device_error(encoder, stderr_tail)
+    
+    def is_device_error(self, encoder: str, stderr_tail: List[str]) -> bool:
+        """Erkennt Geräte- bzw. Treiberfehler; nur diese machen einen Hardware-Encoder unbrauchbar"""
+        if encoder == "libx264":
+            return False
+        output = "\n".join(stderr_tail)
+        return any(pattern in output for pattern in DEVICE_ERROR_PATTERNS)
+    
+    def get_effective_rate_control(self, encoder: str, rate_control: str, bitrate_k: int) -> str:
+        """Passt den Ratenkontroll-Modus an Encoder und Bitrate an"""
+        if rate_control in ("vbr", "2pass") and bitrate_k <= 0:
+            self.log("Keine Zielbitrate angegeben - verwende konstante Qualität (CRF)")
+            return "crf"
+        if rate_control == "2pass" and encoder != "libx264":
+            self.log(f"Zwei-Pass-Kodierung nur mit libx264 - {encoder} verwendet Zielbitrate mit VBV")
+            return "vbr"
+        return rate_control
+    
     def convert_single_file(self, input_file: str, output_file: str, 
                            encoder: str, crf: int, preset: str, 
-                           profile: str, threads: str, color_depth_mode: str = "auto") -> bool:
+                           profile: str, threads: str, color_depth_mode: str = "auto",
+                           split: bool = False, rate_control: str = "crf", bitrate_k: int = 0) -> bool:
         """Konvertiert eine einzelne Datei"""
         try:
             # Erstelle Ausgabeverzeichnis
@@ -198,13 +1070,21 @@ class VideoConverter:
             video_info = self.get_video_info(input_file)
             optimal_profile = self.get_optimal_profile(video_info, profile, color_depth_mode)
             
-            # Baue FFmpeg-Befehl
-            cmd = self.build_ffmpeg_command(input_file, output_file, encoder, 
-                                          crf, preset, optimal_profile, threads)
+            # Stream-Zuordnung vor dem Start prüfen (statt nach stundenlanger Kodierung zu scheitern)
+            if not self.check_stream_plan(input_file, output_file):
+                return False
+            
+            rate_control = self.get_effective_rate_control(encoder, rate_control, bitrate_k)
             
             self.log(f"Starte Konvertierung: {os.path.basename(input_file)}")
-            self.log(f"Encoder: {encoder}, Preset: {preset}, Qualität: {crf}")
+            if rate_control == "crf":
+                self.log(f"Encoder: {encoder}, Preset: {preset}, Qualität: {crf}")
+            else:
+                self.log(f"Encoder: {encoder}, Preset: {preset}, Zielbitrate: {bitrate_k} kbit/s ({rate_control})")
             self.log(f"Farbtiefe-Modus: {color_depth_mode}")
+            filter_plan = self.get_filter_plan(input_file, encoder, optimal_profile)
+            if filter_plan['description']:
+                self.log(f"Filter: {', '.join(filter_plan['description'])}")
             
             if optimal_profile != profile:
                 self.log(f"Profil angepasst: {profile} → {optimal_profile}")
@@ -213,36 +1093,59 @@ class VideoConverter:
                 elif color_depth_mode == "quality":
                     self.log("10-Bit Profil für beste Qualität (moderne Player)")
                 else:
-                    self.log(f"Automatische Anpassung wegen {video_info.get('bit_depth', 8)}-Bit Video")
+                    self.log(f"Automatische Anpassung wegen {get_bit_depth(video_info)}-Bit Video")
             
-            # Führe FFmpeg aus
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, 
-                                     stderr=subprocess.PIPE, text=True, 
-                                     bufsize=1, universal_newlines=True)
+            # Sehr große Dateien parallel in Abschnitten kodieren (nicht bei Zwei-Pass-Kodierung)
+            if split and self.should_split_file(input_file) and rate_control != "2pass":
+                self.prepare_thumbnail_directory(output_file)
+                if self.convert_split_file(input_file, output_file, encoder, crf, preset, 
+                                           optimal_profile, threads, rate_control, bitrate_k):
+                    return True
+                if not self.job_active(input_file):
+                    return False
+                self.log("Abschnitts-Kodierung nicht möglich - konvertiere am Stück")
             
-            # Überwache den Prozess
-            while True:
-                output = process.stderr.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    # Filtere wichtige Nachrichten
-                    output = output.strip()
-                    if output and not output.startswith('frame='):
-                        if self.progress_callback:
-                            self.progress_callback(output)
+            # Zwei-Pass: Statistik des ersten Durchgangs wiederverwenden oder erzeugen
+            output_args = None
+            if rate_control == "2pass":
+                pass_log_prefix = self.get_pass_log_prefix(input_file, preset, optimal_profile)
+                if self.has_pass_stats(pass_log_prefix):
+                    self.log("Statistik des ersten Durchgangs wird wiederverwendet")
+                elif not self.run_first_pass(input_file, pass_log_prefix, crf, preset, 
+                                             optimal_profile, threads, bitrate_k):
+                    self.log(f"Erster Durchgang fehlgeschlagen: {os.path.basename(input_file)}")
+                    return False
+                output_args = ['-pass', '2', '-passlogfile', pass_log_prefix]
+            
+            # Baue FFmpeg-Befehl (Vorschaubilder entstehen im selben Durchgang)
+            self.prepare_thumbnail_directory(output_file)
+            cmd = self.build_ffmpeg_command(input_file, output_file, encoder, 
+                                          crf, preset, optimal_profile, threads,
+                                          rate_control=rate_control, bitrate_k=bitrate_k,
+                                          output_args=output_args,
+                                          extra_outputs=self.get_thumbnail_outputs(input_file, output_file))
             
-            # Warte auf Beendigung
-            return_code = process.wait()
+            # Führe FFmpeg aus
+            return_code, stderr_tail = self.run_ffmpeg(cmd)
             
             if return_code == 0:
                 self.log(f"Konvertierung erfolgreich: {os.path.basename(output_file)}")
+                if encoder != "libx264":
+                    # Erfolgreicher Job ersetzt die nächste Test-Kodierung
+                    self.get_encoder_health().record(encoder, True, source="job")
                 return True
+            elif not self.job_active(input_file):
+                self.log(f"Konvertierung abgebrochen: {os.path.basename(input_file)}")
+                return False
             else:
                 # Prüfe ob es ein Hardware-Encoder-Problem ist
-                if encoder != "libx264" and "Cannot load" in str(process.stderr) or "Error while opening encoder" in str(process.stderr):
+                if self.is_hardware_encoder_error(encoder, stderr_tail):
                     self.log(f"Hardware-Encoder {encoder} fehlgeschlagen, versuche Software-Encoder...")
-                    return self.convert_with_software_fallback(input_file, output_file, crf, preset, profile, threads)
+                    # Parameterfehler einer einzelnen Datei (z.B. high10 bei NVENC) sperren das Gerät nicht
+                    if self.is_device_error(encoder, stderr_tail):
+                        self.get_encoder_health().record(encoder, False, source="job")
+                    return self.convert_with_software_fallback(input_file, output_file, crf, preset, profile, threads,
+                                                               rate_control, bitrate_k)
                 else:
                     self.log(f"Fehler bei der Konvertierung: {os.path.basename(input_file)} (Code: {return_code})")
                     return False
@@ -251,42 +1154,131 @@ class VideoConverter:
             self.log(f"Fehler: {str(e)}")
             return False
     
+    def get_thumbnail_directory(self, output_file: str) -> str:
+        """Verzeichnis der Vorschaubilder einer Ausgabedatei (unabhängig von der Zwischenspeicherung)"""
+        thumbnail_root = (self.config.get("thumbnail_directory") or
+                          os.path.join(self.config.get("output_directory"), "thumbnails"))
+        return os.path.join(thumbnail_root, os.path.splitext(os.path.basename(output_file))[0])
+    
+    def prepare_thumbnail_directory(self, output_file: str):
+        """Leert das Verzeichnis der Vorschaubilder vor einem (erneuten) Durchgang"""
+        if not self.config.get("thumbnails_enabled", False):
+            return
+        thumbnail_dir = self.get_thumbnail_directory(output_file)
+        shutil.rmtree(thumbnail_dir, ignore_errors=True)
+        os.makedirs(thumbnail_dir, exist_ok=True)
+    
+    def get_thumbnail_outputs(self, input_file: str, output_file: str, part: int = None) -> List[str]:
+        """Zusätzliche image2-Ausgabe für Vorschaubilder (leer, wenn deaktiviert)"""
+        if not self.config.get("thumbnails_enabled", False):
+            return []
+        count = max(1, int(self.config.get("thumbnail_count", 20)))
+        duration = self.get_video_info(input_file).get('duration', 0)
+        interval_s = max(1.0, duration / count) if duration > 0 else 10.0
+        # Abschnitte erhalten ein eigenes Präfix, damit die Bilder zeitlich sortiert bleiben
+        name = "%04d.jpg" if part is None else f"c{part:03d}_%04d.jpg"
+        pattern = os.path.join(self.get_thumbnail_directory(output_file), name)
+        return thumbnail_output_args(pattern, interval_s, int(self.config.get("thumbnail_width", 320)),
+                                     max_frames=count if part is None else 0)
+    
+    def get_chunk_plan(self, input_file: str) -> List[Tuple[float, float]]:
+        """Teilt eine Datei an Szenenwechseln in Abschnitte mit ausgeglichenem Aufwand"""
+        duration = self.get_video_info(input_file).get('duration', 0)
+        if duration <= 0:
+            return []
+        index = self.get_scene_index(input_file)
+        return choose_boundaries(duration, index['scene_cuts'], index['keyframes'],
+                                 int(self.config.get("split_workers", 2)), 
+                                 float(self.config.get("split_min_chunk_s", 30)))
+    
+    def build_chunk_command(self, input_file: str, output_file: str, chunk_file: str, i: int,
+                            start: float, end: float, encoder: str, crf: int, preset: str, profile: str,
+                            threads: str, rate_control: str = "crf", bitrate_k: int = 0) -> List[str]:
+        """Baut den Befehl für einen Abschnitt (nur Video, Vorschaubilder mit eigenem Präfix)"""
+        input_args = ['-ss', f'{start:.3f}', '-t', f'{end - start:.3f}']
+        return self.build_ffmpeg_command(input_file, chunk_file, encoder, crf, preset, 
+                                         profile, threads, input_args=input_args, video_only=True,
+                                         rate_control=rate_control, bitrate_k=bitrate_k,
+                                         extra_outputs=self.get_thumbnail_outputs(input_file, output_file, i))
+    
+    def get_chunk_list(self, chunk_files: List[str]) -> str:
+        """Inhalt der Liste für den concat-Demuxer"""
+        lines = []
+        for chunk_file in chunk_files:
+            escaped = chunk_file.replace("'", "'\\''")
+            lines.append(f"file '{escaped}'\n")
+        return ''.join(lines)
+    
+    def build_concat_command(self, input_file: str, output_file: str, list_file: str) -> List[str]:
+        """Fügt die Abschnitte zusammen und übernimmt Audio/Untertitel aus der Quelle"""
+        cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', list_file, '-i', input_file, '-y',
+               '-map', '0:v:0', '-c:v', 'copy']
+        cmd.extend(self.get_stream_args(input_file, output_file, input_index=1))
+        cmd.extend(self.get_delivery_muxer_args(output_file))
+        cmd.extend(['-max_muxing_queue_size', '1024', output_file])
+        return cmd
+    
+    def convert_split_file(self, input_file: str, output_file: str, 
+                           encoder: str, crf: int, preset: str, 
+                           profile: str, threads: str, rate_control: str = "crf", 
+                           bitrate_k: int = 0) -> bool:
+        """Kodiert die Abschnitte einer großen Datei parallel und fügt sie ohne Neukodierung zusammen"""
+        chunks = self.get_chunk_plan(input_file)
+        if len(chunks) < 2:
+            return False
+        
+        chunk_dir = tempfile.mkdtemp(prefix=".h264_chunks_", dir=os.path.dirname(output_file))
+        try:
+            self.log(f"Teile Datei in {len(chunks)} Abschnitte an Szenenwechseln: {os.path.basename(input_file)}")
+            
+            def encode_chunk(i, start, end):
+                chunk_file = os.path.join(chunk_dir, f"chunk_{i:04d}.mkv")
+                cmd = self.build_chunk_command(input_file, output_file, chunk_file, i, start, end, encoder,
+                                               crf, preset, profile, threads, rate_control, bitrate_k)
+                return_code, _ = self.run_ffmpeg(cmd, prefix=f"[Abschnitt {i + 1}/{len(chunks)}] ",
+                                                 job_group=input_file)
+                return chunk_file if return_code == 0 else None
+            
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                chunk_files = list(executor.map(lambda c: encode_chunk(*c), 
+                                                [(i, start, end) for i, (start, end) in enumerate(chunks)]))
+            
+            if not all(chunk_files) or not self.job_active(input_file):
+                self.log(f"Abschnitts-Kodierung fehlgeschlagen: {os.path.basename(input_file)}")
+                return False
+            
+            # Abschnitte zusammenfügen, Audio/Untertitel aus der Quelle übernehmen
+            list_file = os.path.join(chunk_dir, "chunks.txt")
+            with open(list_file, 'w', encoding='utf-8') as f:
+                f.write(self.get_chunk_list(chunk_files))
+            
+            cmd = self.build_concat_command(input_file, output_file, list_file)
+            return_code, _ = self.run_ffmpeg(cmd, prefix="[Zusammenfügen] ")
+            if return_code == 0:
+                self.log(f"Konvertierung erfolgreich: {os.path.basename(output_file)}")
+                return True
+            self.log(f"Zusammenfügen fehlgeschlagen: {os.path.basename(output_file)} (Code: {return_code})")
+            return False
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+    
     def convert_with_software_fallback(self, input_file: str, output_file: str, 
-                                     crf: int, preset: str, profile: str, threads: str) -> bool:
+                                     crf: int, preset: str, profile: str, threads: str,
+                                     rate_control: str = "crf", bitrate_k: int = 0) -> bool:
         """Konvertiert mit Software-Encoder als Fallback"""
         try:
             self.log("Verwende Software-Encoder (libx264) als Fallback...")
             
             # Baue FFmpeg-Befehl für Software-Encoder
-            cmd = ['ffmpeg', '-i', input_file, '-y', '-c:v', 'libx264', 
-                   '-preset', preset, '-crf', str(crf), '-profile:v', profile, 
-                   '-c:a', 'copy', output_file]
-            
-            # Threading
-            if threads != "Auto":
-                if threads == "Max":
-                    cmd.extend(['-threads', '0'])
-                else:
-                    cmd.extend(['-threads', threads])
+            # (Zwei-Pass wird im Fallback als Zielbitrate mit VBV kodiert)
+            cmd = self.build_ffmpeg_command(input_file, output_file, "libx264", 
+                                          crf, preset, profile, threads,
+                                          rate_control="vbr" if rate_control == "2pass" else rate_control,
+                                          bitrate_k=bitrate_k,
+                                          extra_outputs=self.get_thumbnail_outputs(input_file, output_file))
             
             # Führe FFmpeg aus
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, 
-                                     stderr=subprocess.PIPE, text=True, 
-                                     bufsize=1, universal_newlines=True)
-            
-            # Überwache den Prozess
-            while True:
-                output = process.stderr.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    output = output.strip()
-                    if output and not output.startswith('frame='):
-                        if self.progress_callback:
-                            self.progress_callback(f"[Software-Fallback] {output}")
-            
-            # Warte auf Beendigung
-            return_code = process.wait()
+            return_code, _ = self.run_ffmpeg(cmd, prefix="[Software-Fallback] ")
             
             if return_code == 0:
                 self.log(f"Software-Encoder Konvertierung erfolgreich: {os.path.basename(output_file)}")
@@ -299,114 +1291,957 @@ class VideoConverter:
             self.log(f"Fehler bei Software-Encoder Fallback: {str(e)}")
             return False
     
+    def get_job_settings(self, input_file: str, batch_settings: dict) -> dict:
+        """Wählt anhand der Profil-Regeln die Encoding-Einstellungen für eine einzelne Datei"""
+        if not self.config.get("profile_rules_enabled", False):
+            return batch_settings
+        
+        rule = match_rule(self.config.get("profile_rules", []), self.get_video_info(input_file),
+                          self.get_file_size_mb(input_file), 
+                          self.config.get("large_file_threshold_mb", 500))
+        if not rule:
+            return batch_settings
+        
+        profile = self.config.get("encode_profiles", {}).get(rule.get('profile'))
+        if profile is None:
+            self.log(f"Encoding-Profil nicht gefunden: {rule.get('profile')}")
+            return batch_settings
+        
+        self.log(f"Regel '{rule.get('name', rule.get('profile'))}' → Profil '{rule['profile']}': "
+                 f"{os.path.basename(input_file)}")
+        return apply_profile(batch_settings, profile)
+    
+    def get_ladder_outputs(self, input_file: str, filename: str, output_format: str) -> List[Tuple[dict, str]]:
+        """Ermittelt die Auflösungsstufen und Ausgabedateien für den Ladder-Modus"""
+        source_height = self.get_video_info(input_file).get('height', 0)
+        outputs = []
+        for rendition in sorted(self.config.get("ladder_renditions", []), 
+                                key=lambda r: r['height'], reverse=True):
+            # Keine Hochskalierung über die Quellauflösung hinaus
+            if source_height and rendition['height'] > source_height:
+                continue
+            output_filename = f"{filename}_H264_{rendition['height']}p.{output_format.lower()}"
+            outputs.append((rendition, os.path.join(self.config.get("output_directory"), output_filename)))
+        return outputs
+    
+    def get_rendition_bitrate(self, rendition: dict, bitrate_k: int, source_height: int) -> int:
+        """Ermittelt die Zielbitrate einer Auflösungsstufe (fest oder nach Pixelanzahl skaliert)"""
+        if rendition.get('bitrate_k'):
+            return int(rendition['bitrate_k'])
+        if source_height and bitrate_k:
+            return max(1, round(bitrate_k * (rendition['height'] / source_height) ** 2))
+        return bitrate_k
+    
+    def build_ladder_command(self, input_file: str, outputs: List[Tuple[dict, str]], 
+                             encoder: str, crf: int, preset: str, profile: str, 
+                             threads: str, color_depth_mode: str = "auto", rate_control: str = "crf",
+                             bitrate_k: int = 0, pass_prefixes: Dict[int, str] = None, 
+                             first_pass: bool = False) -> List[str]:
+        """Baut einen FFmpeg-Befehl, der einmal dekodiert und mehrere Auflösungen kodiert"""
+        video_info = self.get_video_info(input_file)
+        cmd = ['ffmpeg', '-i', input_file, '-y']
+        
+        # Dekodiertes Video aufteilen und pro Stufe skalieren (Farbumwandlung danach auf weniger Pixeln)
+        profiles = [self.get_optimal_profile(video_info, rendition.get('profile', profile), color_depth_mode)
+                    for rendition, _ in outputs]
+        colors = [self.get_color_plan(input_file, rendition_profile) for rendition_profile in profiles]
+        labels = [f"[s{i}]" for i in range(len(outputs))]
+        filters = [f"[0:v]split={len(outputs)}{''.join(labels)}"]
+        for i, (rendition, _) in enumerate(outputs):
+            chain = [f"scale=-2:{rendition['height']}"] + colors[i]['filters']
+            filters.append(f"[s{i}]{','.join(chain)}[v{i}]")
+        cmd.extend(['-filter_complex', ';'.join(filters)])
+        
+        for i, (rendition, output_file) in enumerate(outputs):
+            rendition_profile = profiles[i]
+            rendition_bitrate = self.get_rendition_bitrate(rendition, bitrate_k, video_info.get('height', 0))
+            cmd.extend(['-map', f'[v{i}]'])
+            cmd.extend(self.get_video_encoder_args(encoder, rendition.get('crf', crf), preset, 
+                                                   rendition_profile, threads, rate_control, 
+                                                   rendition_bitrate))
+            cmd.extend(colors[i]['output_args'])
+            
+            # Optionale Bitraten-Obergrenze pro Stufe (bei konstanter Qualität)
+            if rate_control == "crf" and int(rendition.get('bitrate_k', 0) or 0) > 0:
+                cmd.extend(['-maxrate', f"{rendition['bitrate_k']}k", 
+                            '-bufsize', f"{rendition['bitrate_k'] * 2}k"])
+            
+            cmd.extend(self.get_keyframe_args(input_file, encoder))
+            
+            if first_pass:
+                # Analyse-Durchgang: nur Statistik schreiben
+                cmd.extend(['-an', '-sn', '-pass', '1', '-passlogfile', pass_prefixes[i], '-f', 'null', '-'])
+                continue
+            if pass_prefixes:
+                cmd.extend(['-pass', '2', '-passlogfile', pass_prefixes[i]])
+            
+            cmd.extend(self.get_stream_args(input_file, output_file))
+            cmd.extend(self.get_delivery_muxer_args(output_file))
+            if self.should_optimize_file(input_file):
+                cmd.extend(['-max_muxing_queue_size', '1024'])
+            cmd.append(output_file)
+        
+        return cmd
+    
+    def convert_ladder_file(self, input_file: str, outputs: List[Tuple[dict, str]], 
+                            encoder: str, crf: int, preset: str, profile: str, 
+                            threads: str, color_depth_mode: str = "auto", rate_control: str = "crf",
+                            bitrate_k: int = 0) -> bool:
+        """Konvertiert eine Datei in mehrere Auflösungsstufen (ein Dekodiervorgang)"""
+        try:
+            os.makedirs(os.path.dirname(outputs[0][1]), exist_ok=True)
+            if not self.check_stream_plan(input_file, outputs[0][1]):
+                return False
+            rate_control = self.get_effective_rate_control(encoder, rate_control, bitrate_k)
+            
+            pass_prefixes = None
+            if rate_control == "2pass":
+                # Statistik pro Auflösungsstufe; nur fehlende Stufen werden analysiert
+                video_info = self.get_video_info(input_file)
+                pass_prefixes = {
+                    i: self.get_pass_log_prefix(input_file, preset, 
+                                                self.get_optimal_profile(video_info, rendition.get('profile', profile), 
+                                                                         color_depth_mode),
+                                                rendition['height'])
+                    for i, (rendition, _) in enumerate(outputs)
+                }
+                missing = [i for i, prefix in pass_prefixes.items() if not self.has_pass_stats(prefix)]
+                if missing:
+                    self.log(f"Erster Durchgang (Analyse) für {len(missing)} Auflösungsstufe(n)")
+                    missing_outputs = [outputs[i] for i in missing]
+                    cmd = self.build_ladder_command(input_file, missing_outputs, encoder, crf, preset, profile,
+                                                    threads, color_depth_mode, rate_control, bitrate_k,
+                                                    {n: pass_prefixes[i] for n, i in enumerate(missing)},
+                                                    first_pass=True)
+                    return_code, _ = self.run_ffmpeg(cmd, prefix="[Durchgang 1] ")
+                    if return_code != 0:
+                        self.log(f"Erster Durchgang fehlgeschlagen: {os.path.basename(input_file)}")
+                        return False
+                else:
+                    self.log("Statistik des ersten Durchgangs wird wiederverwendet")
+            
+            cmd = self.build_ladder_command(input_file, outputs, encoder, crf, preset, 
+                                            profile, threads, color_depth_mode, rate_control, 
+                                            bitrate_k, pass_prefixes)
+            
+            heights = ', '.join(f"{rendition['height']}p" for rendition, _ in outputs)
+            self.log(f"Starte Ladder-Konvertierung: {os.path.basename(input_file)} ({heights})")
+            
+            return_code, stderr_tail = self.run_ffmpeg(cmd)
+            if return_code == 0:
+                self.log(f"Ladder-Konvertierung erfolgreich: {os.path.basename(input_file)}")
+                return True
+            if self.is_hardware_encoder_error(encoder, stderr_tail):
+                self.log(f"Hardware-Encoder {encoder} fehlgeschlagen, versuche Software-Encoder...")
+                return self.convert_ladder_file(input_file, outputs, "libx264", crf, preset, 
+                                                profile, threads, color_depth_mode, rate_control, bitrate_k)
+            self.log(f"Fehler bei der Ladder-Konvertierung: {os.path.basename(input_file)} (Code: {return_code})")
+            return False
+        except Exception as e:
+            self.log(f"Fehler: {str(e)}")
+            return False
+    
     def convert_files(self, file_list: List[Dict], encoder: str, crf: int, 
                      preset: str, profile: str, threads: str, 
-                     output_format: str, overwrite: bool = False, color_depth_mode: str = "auto"):
-        """Konvertiert mehrere Dateien"""
+                     output_format: str, overwrite: bool = False, color_depth_mode: str = "auto",
+                     split_large_files: bool = None, rate_control: str = "crf", bitrate_k: int = 0):
+        """Konvertiert mehrere Dateien (Liste oder Warteschlange aus einem JobStore)"""
         if self.is_converting:
             self.log("Konvertierung läuft bereits!")
             return
         
         self.is_converting = True
+        self.cancelled_jobs.clear()
+        self.resume_event.set()
+        self.tracer = Tracer(self.config.get("profiling_enabled", False))
         total_files = len(file_list)
-        successful = 0
+        state = {'successful': 0, 'failed': 0, 'done': 0}
+        state_lock = threading.Lock()
+        job_times = {}
+        batch_started = time.perf_counter()
+        output_cache = self.get_output_cache()
+        batch_settings = {'encoder': encoder, 'crf': crf, 'preset': preset, 'profile': profile,
+                          'rate_control': rate_control, 'bitrate_k': bitrate_k}
         
-        try:
-            for i, file_info in enumerate(file_list):
-                if not self.is_converting:  # Abbruch
-                    break
-                
-                input_file = file_info['path']
-                filename = os.path.splitext(os.path.basename(input_file))[0]
-                
+        # Optionale Nachbearbeitung (faststart-Remux, Prüfung)
+        verifier = None
+        post_executor = None
+        pending_post = deque()
+        retries = []  # Nach fehlgeschlagener Prüfung erneut zu kodieren (laufen wie neue Jobs über die Worker)
+        if self.config.get("verify_outputs", False):
+            verifier = OutputVerifier(self.config, self.get_video_info, log_callback=self.log)
+        deferred_faststart = self.uses_deferred_faststart(output_format)
+        if verifier or deferred_faststart:
+            # Nachbearbeitung läuft parallel zur nächsten Konvertierung
+            post_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Nachbearbeitung")
+        max_retries = int(self.config.get("verify_max_retries", 1))
+        
+        # Zulassung nach Speicherplatz und Schreibdurchsatz, ggf. lokale Zwischenspeicherung
+        parallel_jobs = max(1, int(self.config.get("max_parallel_jobs", 1)))
+        admission = None
+        if self.config.get("admission_control_enabled", True):
+            admission = AdmissionController(parallel_jobs, int(self.config.get("disk_safety_margin_mb", 1024)),
+                                            log_callback=self.log, throughput_cache=self.throughput_cache)
+        staging_dir = self.get_staging_directory(admission)
+        upload_pool = None
+        pending_uploads = deque()
+        if staging_dir:
+            # Übertragung ans Ziel im Hintergrund, die nächste Konvertierung startet sofort
+            upload_pool = UploadPool(int(self.config.get("upload_workers", 2)),
+                                     int(self.config.get("upload_max_pending", 4)),
+                                     int(self.config.get("upload_max_retries", 3)),
+                                     self.config.get("upload_verify_checksum", True),
+                                     log_callback=self.log, tracer=self.tracer)
+        
+        ladder_mode = self.config.get("ladder_mode", False)
+        sheet_builder = None
+        if self.config.get("thumbnails_enabled", False) and self.config.get("contact_sheet_enabled", True):
+            # Kontaktbögen entstehen nebenher aus den bereits erzeugten Vorschaubildern
+            sheet_builder = ContactSheetBuilder(int(self.config.get("contact_sheet_columns", 5)),
+                                                log_callback=self.log)
+        if split_large_files is None:
+            split_large_files = self.config.get("split_large_files", True)
+        history = self.get_history()
+        
+        # Längste Jobs zuerst, damit parallele Worker etwa gleichzeitig fertig werden
+        lpt_scheduling = parallel_jobs > 1 and self.config.get("lpt_scheduling", True)
+        if lpt_scheduling and isinstance(file_list, list):
+            estimates = self.estimate_files(file_list, encoder, crf, preset, profile, color_depth_mode,
+                                            split_large_files, rate_control, bitrate_k)
+            file_list = self.order_for_makespan(file_list, estimates)
+        # Warteschlange aus dem JobStore: jedes gelesene Fenster nach LPT ordnen
+        # (eine laufende Warteschlange reserviert selbst die größte Datei höchster Priorität zuerst)
+        order_windows = lpt_scheduling and isinstance(file_list, JobStore)
+        
+        def convert(input_file, output_file, job):
+            return self.convert_single_file(input_file, output_file, job['encoder'], job['crf'], 
+                                            job['preset'], job['profile'], threads, color_depth_mode,
+                                            split=split_large_files, rate_control=job['rate_control'],
+                                            bitrate_k=job['bitrate_k'])
+        
+        def convert_ladder(input_file, outputs, job):
+            return self.convert_ladder_file(input_file, outputs, job['encoder'], job['crf'], 
+                                            job['preset'], job['profile'], threads, color_depth_mode,
+                                            job['rate_control'], job['bitrate_k'])
+        
+        def succeed(input_file, output_files, cache_key):
+            self.cancelled_jobs.discard(input_file)
+            with state_lock:
+                state['successful'] += 1
+            if cache_key:
+                output_cache.store(cache_key, output_files[0])
+            output_bytes = sum(os.path.getsize(path) for path in output_files if os.path.exists(path))
+            self.events.publish(JobFinished(job_id=input_file, input_file=input_file, output_files=output_files,
+                                            elapsed_s=job_times.pop(input_file, 0.0), output_bytes=output_bytes))
+        
+        def fail(input_file, reason):
+            self.cancelled_jobs.discard(input_file)
+            with state_lock:
+                state['failed'] += 1
+            job_times.pop(input_file, None)
+            self.events.publish(JobFailed(job_id=input_file, input_file=input_file, reason=reason))
+        
+        def publish_stats(finished=False):
+            with state_lock:
+                stats = BatchStats(total=total_files, done=state['done'], successful=state['successful'],
+                                   failed=state['failed'], elapsed_s=time.perf_counter() - batch_started,
+                                   finished=finished)
+            self.events.publish(stats)
+        
+        def skip(input_file, reason):
+            self.log(reason)
+            self.events.publish(JobSkipped(job_id=input_file, input_file=input_file, reason=reason))
+        
+        def finish(input_file, work_files, output_files, cache_key):
+            if upload_pool:
+                future = upload_pool.submit(work_files, output_files)
+                with state_lock:
+                    pending_uploads.append((future, input_file, output_files, cache_key))
+                return
+            succeed(input_file, output_files, cache_key)
+        
+        def prepare_file(file_info):
+            # Ausgabepfade, Einstellungen und Cache prüfen (None = übersprungen oder bereits erledigt)
+            input_file = file_info['path']
+            filename = os.path.splitext(os.path.basename(input_file))[0]
+            cache_key = None
+            
+            # Einstellungen pro Datei (Encoding-Profil anhand von Regeln)
+            job = self.get_job_settings(input_file, batch_settings)
+            
+            if ladder_mode:
+                # Mehrere Auflösungsstufen aus einem einzigen Dekodiervorgang
+                outputs = self.get_ladder_outputs(input_file, filename, output_format)
+                if not outputs:
+                    skip(input_file, f"Keine passenden Auflösungsstufen für: {os.path.basename(input_file)}")
+                    return None
+                if not overwrite and all(os.path.exists(path) for _, path in outputs):
+                    skip(input_file, f"Überspringe existierende Auflösungsstufen: {filename}")
+                    return None
+                output_files = [path for _, path in outputs]
+                work_outputs = [(rendition, self.get_work_path(path, staging_dir)) for rendition, path in outputs]
+                work_files = [path for _, path in work_outputs]
+                retry = lambda: convert_ladder(input_file, work_outputs, job)
+            else:
                 # Bestimme Ausgabedatei
                 output_filename = f"{filename}_H264.{output_format.lower()}"
                 output_file = os.path.join(self.config.get("output_directory"), output_filename)
                 
                 # Prüfe, ob Datei bereits existiert
                 if os.path.exists(output_file) and not overwrite:
-                    self.log(f"Überspringe existierende Datei: {output_filename}")
-                    continue
-                
-                # Konvertiere Datei
-                if self.convert_single_file(input_file, output_file, encoder, 
-                                          crf, preset, profile, threads, color_depth_mode):
-                    successful += 1
+                    skip(input_file, f"Überspringe existierende Datei: {output_filename}")
+                    return None
                 
+                # Prüfe den Ergebnis-Cache (gleicher Inhalt unter anderem Namen/Pfad)
+                if output_cache:
+                    try:
+                        effective_settings = self.get_effective_settings(
+                            job['encoder'], job['crf'], job['preset'], job['profile'],
+                            output_format, color_depth_mode, job['rate_control'], job['bitrate_k'])
+                        cache_key = output_cache.make_key(input_file, effective_settings)
+                    except OSError as e:
+                        self.log(f"Cache-Schlüssel konnte nicht berechnet werden: {str(e)}")
+                    if cache_key and output_cache.materialize(cache_key, output_file):
+                        succeed(input_file, [output_file], None)
+                        return None
+                    # Verhindert, dass FFmpeg eine verlinkte Cache-Datei überschreibt
+                    if os.path.exists(output_file):
+                        os.remove(output_file)
+                output_files = [output_file]
+                work_files = [self.get_work_path(output_file, staging_dir)]
+                retry = lambda: convert(input_file, work_files[0], job)
+            
+            return {'input_file': input_file, 'job': job, 'output_files': output_files,
+                    'work_files': work_files, 'retry': retry, 'cache_key': cache_key}
+        
+        def admit(key, plans):
+            # Speicherplatz reservieren und auf einen freien Job-Platz warten
+            if not admission:
+                return True
+            estimate = sum(self.estimate_job_output_bytes(plan['input_file'], plan['job'], split_large_files) *
+                           len(plan['work_files']) for plan in plans)
+            work_files = [path for plan in plans for path in plan['work_files']]
+            directories = sorted({os.path.dirname(path) for plan in plans
+                                  for path in plan['work_files'] + plan['output_files']})
+            with self.tracer.span("Warten auf Zulassung", "queue", job=os.path.basename(key)):
+                admitted = admission.acquire(key, estimate, directories, work_files,
+                                             should_continue=lambda: self.is_converting)
+            if not admitted and self.is_converting:
+                for plan in plans:
+                    fail(plan['input_file'], "Nicht genug Speicherplatz")
+            return admitted
+        
+        def run_plan(plan, announce=True):
+            input_file = plan['input_file']
+            if not admit(input_file, [plan]):
+                return
+            
+            # Konvertiere Datei
+            if announce:
+                self.events.publish(JobStarted(job_id=input_file, input_file=input_file,
+                                               encoder=plan['job']['encoder']))
+            self.job_context.job_id = input_file
+            self.job_context.duration = self.get_video_info(input_file).get('duration', 0)
+            started = time.perf_counter()
+            try:
+                converted = plan['retry']()
+            finally:
+                job_times[input_file] = time.perf_counter() - started
+                self.job_context.job_id = ''
+                if admission:
+                    admission.release(input_file)
+            complete_file(plan, converted, job_times[input_file])
+        
+        def complete_file(plan, converted, elapsed):
+            input_file = plan['input_file']
+            work_files, output_files = plan['work_files'], plan['output_files']
+            if not converted:
+                # Abgebrochene oder fehlerhafte Ausgaben dürfen beim nächsten Lauf nicht übersprungen werden
+                self.discard_partial_outputs(work_files, stopped=not self.is_converting)
+                if self.config.get("thumbnails_enabled", False) and not ladder_mode:
+                    shutil.rmtree(self.get_thumbnail_directory(output_files[0]), ignore_errors=True)
+                fail(input_file, "Konvertierung fehlgeschlagen" if self.job_active(input_file)
+                     else "Konvertierung abgebrochen")
+                return
+            
+            # Messwerte für spätere Schätzungen festhalten (Ladder-Läufe sind nicht vergleichbar)
+            if history and not ladder_mode:
+                try:
+                    history.record(self.get_video_info(input_file), plan['job'], elapsed,
+                                   os.path.getsize(work_files[0]),
+                                   split=bool(split_large_files and self.should_split_file(input_file)),
+                                   parallel_jobs=parallel_jobs)
+                except OSError:
+                    pass
+            
+            if sheet_builder and not ladder_mode:
+                thumbnail_dir = self.get_thumbnail_directory(output_files[0])
+                sheet_builder.submit(thumbnail_dir, thumbnail_dir + "_sheet.jpg")
+            
+            if post_executor:
+                future = post_executor.submit(self.post_process, verifier, deferred_faststart,
+                                              input_file, work_files)
+                with state_lock:
+                    pending_post.append((future, plan))
+            else:
+                finish(input_file, work_files, output_files, plan['cache_key'])
+        
+        def process_file(file_info):
+            plan = prepare_file(file_info)
+            if plan:
+                run_plan(plan)
+        
+        def process_group(group):
+            # Kurze Clips nacheinander in einem Encoder-Prozess (Geräte-Initialisierung nur einmal)
+            plans = []
+            for plan in filter(None, map(prepare_file, group)):
+                if plan['input_file'] in self.cancelled_jobs:
+                    fail(plan['input_file'], "Abgebrochen")
+                else:
+                    plans.append(plan)
+            if len(plans) < 2:
+                for plan in plans:
+                    run_plan(plan)
+                return
+            group_id = plans[0]['input_file']
+            if not admit(group_id, plans):
+                return
+            
+            for plan in plans:
+                self.events.publish(JobStarted(job_id=plan['input_file'], input_file=plan['input_file'],
+                                               encoder=plan['job']['encoder']))
+            durations = [self.get_video_info(plan['input_file']).get('duration', 0) for plan in plans]
+            self.job_context.job_id = group_id
+            self.job_context.duration = sum(durations)
+            for plan in plans:
+                self.job_groups[plan['input_file']] = group_id
+            started = time.perf_counter()
+            try:
+                converted = self.convert_pooled_files([plan['input_file'] for plan in plans],
+                                                      [plan['work_files'][0] for plan in plans],
+                                                      plans[0]['job'], threads, color_depth_mode)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.job_context.job_id = ''
+                for plan in plans:
+                    self.job_groups.pop(plan['input_file'], None)
+                if admission:
+                    admission.release(group_id)
+            
+            if not converted and self.is_converting:
+                # Fehlschlag oder Abbruch eines Clips: abgebrochene Clips verwerfen, die übrigen einzeln kodieren
+                self.log("Gemeinsame Kodierung fehlgeschlagen oder abgebrochen - konvertiere die Clips einzeln")
+                for plan in plans:
+                    if plan['input_file'] in self.cancelled_jobs:
+                        complete_file(plan, False, 0.0)
+                    elif self.is_converting:
+                        run_plan(plan, announce=False)
+                return
+            
+            # Gemessene Zeit anteilig nach Clip-Länge verteilen
+            for plan, duration in zip(plans, durations):
+                job_times[plan['input_file']] = elapsed * duration / max(sum(durations), 1e-6)
+                complete_file(plan, converted, job_times[plan['input_file']])
+        
+        def run_job(item):
+            # Während einer Pause keine neuen Jobs starten
+            while not self.resume_event.wait(timeout=0.5):
+                if not self.is_converting:
+                    return
+            if not self.is_converting:  # Abbruch
+                return
+            if not isinstance(item, list) and item['path'] in self.cancelled_jobs:
+                # Vor dem Start einzeln abgebrochen
+                fail(item['path'], "Abgebrochen")
+                with state_lock:
+                    state['done'] += 1
+                publish_stats()
+                return
+            # Eintrag ist eine Datei oder eine Gruppe kurzer Clips für einen gemeinsamen Encoder-Prozess
+            group = item if isinstance(item, list) else None
+            try:
+                if group:
+                    with self.tracer.span(f"Sitzung ({len(group)} Clips)", "job"):
+                        process_group(group)
+                else:
+                    with self.tracer.span(os.path.basename(item['path']), "job"):
+                        process_file(item)
+            finally:
                 # Fortschritt
-                progress = ((i + 1) / total_files) * 100
-                if self.progress_callback:
-                    self.progress_callback(f"Fortschritt: {progress:.1f}% ({i+1}/{total_files})")
+                with state_lock:
+                    state['done'] += len(group) if group else 1
+                publish_stats()
+        
+        def collect_post(wait):
+            # Ergebnisse der Nachbearbeitung einsammeln; fehlerhafte Ausgaben werden zur Wiederholung vorgemerkt
+            while True:
+                with state_lock:
+                    if not pending_post or not (wait or pending_post[0][0].done()):
+                        return
+                    future, plan = pending_post.popleft()
+                input_file = plan['input_file']
+                if future.result():
+                    finish(input_file, plan['work_files'], plan['output_files'], plan['cache_key'])
+                elif plan.get('attempt', 0) < max_retries and self.job_active(input_file):
+                    attempt = plan.get('attempt', 0) + 1
+                    self.log(f"Wiederhole Konvertierung ({attempt}/{max_retries}): {os.path.basename(input_file)}")
+                    retries.append(dict(plan, attempt=attempt))
+                else:
+                    reject(plan)
+        
+        def reject(plan):
+            fail(plan['input_file'], "Prüfung fehlgeschlagen")
+            # Fehlerhafte Ausgaben entfernen, damit sie beim nächsten Lauf nicht übersprungen werden
+            for output_file in set(plan['work_files'] + plan['output_files']):
+                if os.path.exists(output_file):
+                    os.remove(output_file)
+                    self.log(f"Fehlerhafte Ausgabe entfernt: {os.path.basename(output_file)}")
+        
+        def take_retries():
+            pending = retries[:]
+            retries.clear()
+            return pending
+        
+        def run_retry(plan):
+            # Wiederholung wie ein neuer Job: Zulassung, Job-Kontext und Einzelabbruch gelten auch hier
+            while not self.resume_event.wait(timeout=0.5):
+                if not self.is_converting:
+                    break
+            if not self.job_active(plan['input_file']):
+                reject(plan)
+                return
+            with self.tracer.span(f"Wiederholung: {os.path.basename(plan['input_file'])}", "job"):
+                run_plan(plan, announce=False)
+        
+        def collect_uploads(wait):
+            # Abgeschlossene Übertragungen auswerten
+            while True:
+                with state_lock:
+                    if not pending_uploads or not (wait or pending_uploads[0][0].done()):
+                        return
+                    future, input_file, output_files, cache_key = pending_uploads.popleft()
+                if future.result():
+                    succeed(input_file, output_files, cache_key)
+                else:
+                    fail(input_file, "Übertragung fehlgeschlagen")
+        
+        def plan_window(window):
+            if order_windows:
+                window = self.order_for_makespan(window, self.estimate_files(
+                    window, encoder, crf, preset, profile, color_depth_mode, split_large_files,
+                    rate_control, bitrate_k))
+            if self.config.get("session_pooling_enabled", False) and not ladder_mode:
+                groups, singles = self.plan_session_pools(window, batch_settings, output_format, split_large_files)
+                if groups:
+                    self.log(f"{sum(len(group) for group in groups)} kurze Clips in {len(groups)} gemeinsamen "
+                             f"Encoder-Sitzungen")
+                return singles + groups
+            return window
+        
+        def iterate_work_items():
+            # Dateien fensterweise lesen, damit lange Warteschlangen nicht vollständig im Speicher liegen
+            # (ohne gemeinsame Sitzungen und LPT einzeln, damit eine laufende Warteschlange erst bei Bedarf gelesen wird)
+            pooling = self.config.get("session_pooling_enabled", False) and not ladder_mode
+            window_size = WORK_WINDOW if pooling or order_windows else 1
+            if isinstance(file_list, QueueBatch):
+                # Laufende Warteschlange: höchstens eine gemeinsame Sitzung auf einmal reservieren
+                window_size = max(1, int(self.config.get("session_pool_size", 16))) if pooling else 1
+            window = []
+            for file_info in file_list:
+                if queue_store:
+                    self.events.publish(JobQueued(job_id=file_info['path'], input_file=file_info['path']))
+                window.append(file_info)
+                if len(window) >= window_size:
+                    yield from plan_window(window)
+                    window = []
+            if window:
+                yield from plan_window(window)
+        
+        # Warteschlange auf der Festplatte: Job-Zustände werden über den Ereignis-Bus festgehalten
+        queue_store = file_list if isinstance(file_list, (JobStore, QueueBatch)) else None
+        queue_subscription = self.events.subscribe(queue_store, "queue") if queue_store else None
+        if not queue_store:
+            for file_info in file_list:
+                self.events.publish(JobQueued(job_id=file_info['path'], input_file=file_info['path']))
+        
+        try:
+            if parallel_jobs > 1:
+                # Begrenzte Warteschlange, damit nicht alle Jobs auf einmal eingeplant werden
+                with ThreadPoolExecutor(max_workers=parallel_jobs, thread_name_prefix="Job") as job_executor:
+                    in_flight = deque()
+                    # Laufende Warteschlange: nur so viele Jobs vorab reservieren, wie Worker frei werden
+                    max_in_flight = parallel_jobs if isinstance(file_list, QueueBatch) else parallel_jobs * 2
+                    
+                    def submit(function, argument):
+                        if len(in_flight) >= max_in_flight:
+                            in_flight.popleft().result()
+                        in_flight.append(job_executor.submit(function, argument))
+                    
+                    for item in iterate_work_items():
+                        if not self.is_converting:
+                            break
+                        submit(run_job, item)
+                        collect_post(wait=False)
+                        for plan in take_retries():
+                            submit(run_retry, plan)
+                        collect_uploads(wait=False)
+                    # Restliche Jobs, Nachbearbeitung und Wiederholungen abschließen
+                    while in_flight or pending_post or retries:
+                        if in_flight:
+                            in_flight.popleft().result()
+                        collect_post(wait=not in_flight)
+                        for plan in take_retries():
+                            submit(run_retry, plan)
+            else:
+                for item in iterate_work_items():
+                    if not self.is_converting:  # Abbruch
+                        break
+                    run_job(item)
+                    collect_post(wait=False)
+                    for plan in take_retries():
+                        run_retry(plan)
+                    collect_uploads(wait=False)
+                while pending_post or retries:
+                    collect_post(wait=True)
+                    for plan in take_retries():
+                        run_retry(plan)
+            
+            # Ausstehende Übertragungen abwarten
+            collect_uploads(wait=True)
             
-            self.log(f"Konvertierung abgeschlossen: {successful}/{total_files} erfolgreich")
+            self.log(f"Konvertierung abgeschlossen: {state['successful']}/{total_files} erfolgreich")
             
         except Exception as e:
-            self.log(f"Fehler bei der Batch-Konvertierung: {str(e)}")
+            self.log(f"Fehler bei der Batch-Konvertierung: {str(e)}", level="error")
         
         finally:
+            publish_stats(finished=True)
+            if admission:
+                admission.stop()
+            if post_executor:
+                post_executor.shutdown(wait=True)
+            if upload_pool:
+                upload_pool.shutdown()
+            if sheet_builder:
+                sheet_builder.shutdown()
+            if queue_subscription:
+                self.events.unsubscribe(queue_subscription, wait=True)
+            if self.tracer.enabled:
+                try:
+                    trace_file = self.tracer.save(self.config.get("trace_directory"))
+                    self.log(f"Zeitleiste gespeichert: {trace_file}")
+                except OSError as e:
+                    self.log(f"Zeitleiste konnte nicht gespeichert werden: {str(e)}")
             self.is_converting = False
     
+    def plan_session_pools(self, file_list: List[Dict], batch_settings: dict, output_format: str,
+                           split_large_files: bool) -> Tuple[List[List[Dict]], List[Dict]]:
+        """Fasst kurze Hardware-Clips mit gleichen Eigenschaften zu gemeinsamen Encoder-Prozessen zusammen"""
+        max_clip_s = float(self.config.get("session_pool_max_clip_s", 120))
+        health = self.get_encoder_health()
+        keys = []
+        for file_info in file_list:
+            input_file = file_info['path']
+            job = self.get_job_settings(input_file, batch_settings)
+            video_info = self.get_video_info(input_file)
+            eligible = (job['encoder'] != "libx264" and health.get(job['encoder']) is not False
+                        and job.get('rate_control', 'crf') != "2pass"
+                        and 0 < video_info.get('duration', 0) <= max_clip_s
+                        and not (split_large_files and self.should_split_file(input_file))
+                        and not self.get_keyframe_args(input_file, job['encoder'])
+                        and not self.config.get("thumbnails_enabled", False)
+                        and not (self.config.get("color_pipeline_enabled", True) and needs_conversion(video_info))
+                        and not self.config.get("filter_planner_enabled", False))
+            keys.append((file_info, pool_key(video_info, job, output_format) if eligible else None))
+        return group_clips(keys, int(self.config.get("session_pool_size", 16)))
+    
+    def build_pool_command(self, input_files: List[str], output_files: List[str], job: dict, threads: str,
+                           color_depth_mode: str, segment_pattern: str) -> List[str]:
+        """Baut den Befehl einer gemeinsamen Encoder-Sitzung (ein Segment pro Clip)"""
+        infos = [self.get_video_info(input_file) for input_file in input_files]
+        output_format = os.path.splitext(output_files[0])[1].lstrip('.').upper()
+        profile = self.get_optimal_profile(infos[0], job['profile'], color_depth_mode)
+        rate_control = self.get_effective_rate_control(job['encoder'], job['rate_control'], job['bitrate_k'])
+        encoder_args = self.get_video_encoder_args(job['encoder'], job['crf'], job['preset'], profile,
+                                                   threads, rate_control, job['bitrate_k'])
+        has_audio = any(s.get('codec_type') == 'audio' for s in infos[0].get('streams', []))
+        return build_pooled_command(list(zip(input_files, infos)), encoder_args, has_audio, output_format,
+                                    self.get_delivery_muxer_args(output_files[0]), segment_pattern)
+    
+    def convert_pooled_files(self, input_files: List[str], output_files: List[str], job: dict,
+                             threads: str, color_depth_mode: str = "auto") -> bool:
+        """Kodiert mehrere kurze Clips in einem FFmpeg-Prozess (eine Encoder-Sitzung) und trennt sie wieder"""
+        output_format = os.path.splitext(output_files[0])[1].lstrip('.').upper()
+        os.makedirs(os.path.dirname(output_files[0]), exist_ok=True)
+        pool_dir = tempfile.mkdtemp(prefix=".h264_pool_", dir=os.path.dirname(output_files[0]))
+        try:
+            pattern = os.path.join(pool_dir, f"segment_%04d.{output_format.lower()}")
+            cmd = self.build_pool_command(input_files, output_files, job, threads, color_depth_mode, pattern)
+            self.log(f"Gemeinsame Encoder-Sitzung ({job['encoder']}): {len(input_files)} Clips")
+            return_code, _ = self.run_ffmpeg(cmd, prefix="[Sitzung] ")
+            
+            # Genau ein Segment pro Clip, sonst stimmen die Schnittpunkte nicht
+            segments = [pattern % i for i in range(len(input_files))]
+            if (return_code != 0 or not all(os.path.exists(segment) for segment in segments)
+                    or os.path.exists(pattern % len(input_files))):
+                self.log(f"Gemeinsame Encoder-Sitzung fehlgeschlagen (Code: {return_code})")
+                return False
+            for segment, output_file in zip(segments, output_files):
+                os.replace(segment, output_file)
+                self.log(f"Konvertierung erfolgreich: {os.path.basename(output_file)}")
+            self.get_encoder_health().record(job['encoder'], True, source="job")
+            return True
+        finally:
+            shutil.rmtree(pool_dir, ignore_errors=True)
+    
+    def estimate_job_output_bytes(self, input_file: str, job: dict, split_large_files: bool) -> int:
+        """Schätzt den Speicherbedarf eines Jobs (bei Aufteilung zusätzlich für die Abschnitte)"""
+        estimate = estimate_output_bytes(self.get_video_info(input_file), os.path.getsize(input_file),
+                                         job['crf'], job['rate_control'], job['bitrate_k'])
+        if split_large_files and self.should_split_file(input_file):
+            estimate *= 2
+        return estimate
+    
+    def get_staging_directory(self, admission) -> str:
+        """Liefert ein lokales Zwischenverzeichnis, falls das Ziel zu langsam schreibt (sonst None)"""
+        mode = self.config.get("staging_mode", "off")
+        if mode == "off":
+            return None
+        
+        output_directory = os.path.abspath(self.config.get("output_directory"))
+        if mode == "auto":
+            # Ohne Zulassungssteuerung wird das Ziel nicht vermessen (kein Testschreiben pro Batch)
+            threshold = float(self.config.get("slow_destination_mb_s", 30))
+            if not admission or not admission.is_slow_destination(output_directory, threshold):
+                return None
+        
+        staging_dir = os.path.abspath(self.config.get("staging_directory") or
+                                      os.path.join(tempfile.gettempdir(), "h264_staging"))
+        if staging_dir == output_directory:
+            return None
+        os.makedirs(staging_dir, exist_ok=True)
+        self.log(f"Ausgaben werden lokal zwischengespeichert: {staging_dir}")
+        return staging_dir
+    
+    def get_work_path(self, output_file: str, staging_dir: str) -> str:
+        """Pfad, in den FFmpeg schreibt (Zwischenverzeichnis oder direkt das Ziel)"""
+        if not staging_dir:
+            return output_file
+        return os.path.join(staging_dir, os.path.basename(output_file))
+    
+    def get_preview_points(self, duration: float, points: int, seconds: float) -> List[float]:
+        """Verteilt die Vorschau-Stichproben gleichmäßig über die Laufzeit (ohne Anfang und Ende)"""
+        if duration <= seconds:
+            return [0.0]
+        return [round(duration * (k + 1) / (points + 1), 3) for k in range(max(1, points))
+                if duration * (k + 1) / (points + 1) + seconds <= duration]
+    
+    def preview_files(self, file_list: List[Dict], encoder: str, crf: int, 
+                      preset: str, profile: str, threads: str, output_format: str,
+                      color_depth_mode: str = "auto", rate_control: str = "crf", 
+                      bitrate_k: int = 0) -> dict:
+        """Kodiert kurze Stichproben jeder Datei und rechnet Dauer und Größe des ganzen Batches hoch"""
+        points = int(self.config.get("preview_points", 3))
+        seconds = float(self.config.get("preview_seconds", 4))
+        preview_dir = (self.config.get("preview_directory") or 
+                       os.path.join(tempfile.gettempdir(), "h264_preview"))
+        os.makedirs(preview_dir, exist_ok=True)
+        
+        batch_settings = {'encoder': encoder, 'crf': crf, 'preset': preset, 'profile': profile,
+                          'rate_control': rate_control, 'bitrate_k': bitrate_k}
+        report = {'files': [], 'total_time_s': 0.0, 'total_size_bytes': 0, 'preview_directory': preview_dir}
+        
+        for file_info in file_list:
+            input_file = file_info['path']
+            filename = os.path.splitext(os.path.basename(input_file))[0]
+            video_info = self.get_video_info(input_file)
+            duration = video_info.get('duration', 0)
+            job = self.get_job_settings(input_file, batch_settings)
+            optimal_profile = self.get_optimal_profile(video_info, job['profile'], color_depth_mode)
+            # Zwei-Pass wird in der Vorschau mit gleicher Zielbitrate in einem Durchgang angenähert
+            job_rate_control = self.get_effective_rate_control(job['encoder'], job['rate_control'], job['bitrate_k'])
+            if job_rate_control == "2pass":
+                job_rate_control = "vbr"
+            
+            entry = {'path': input_file, 'duration': duration, 'encoder': job['encoder'], 'error': None}
+            starts = self.get_preview_points(duration, points, seconds)
+            
+            def encode_sample(k, start):
+                sample_file = os.path.join(preview_dir, f"{filename}_preview{k + 1}.{output_format.lower()}")
+                cmd = self.build_ffmpeg_command(input_file, sample_file, job['encoder'], job['crf'], 
+                                                job['preset'], optimal_profile, threads,
+                                                input_args=['-ss', str(start)],
+                                                rate_control=job_rate_control, bitrate_k=job['bitrate_k'],
+                                                output_args=['-t', str(seconds)])
+                return_code, stderr_tail = self.run_ffmpeg(cmd, prefix=f"[Vorschau {k + 1}] ")
+                if return_code != 0:
+                    return None, (stderr_tail[-1] if stderr_tail else f"Code: {return_code}")
+                return sample_file, None
+            
+            # Stichproben einer Datei laufen parallel; gemessen wird die Gesamtzeit der Gruppe
+            self.log(f"Vorschau: {os.path.basename(input_file)} ({len(starts)} × {seconds:g}s)")
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(starts)) as executor:
+                results = list(executor.map(lambda args: encode_sample(*args), enumerate(starts)))
+            elapsed = time.perf_counter() - started
+            
+            samples = [path for path, _ in results if path]
+            errors = [error for _, error in results if error]
+            if errors or not samples:
+                entry['error'] = errors[0] if errors else "Keine Stichprobe erzeugt"
+                self.log(f"Vorschau fehlgeschlagen: {os.path.basename(input_file)} - {entry['error']}")
+                report['files'].append(entry)
+                continue
+            
+            sample_seconds = min(seconds, duration) * len(samples) if duration > 0 else seconds * len(samples)
+            sample_bytes = sum(os.path.getsize(path) for path in samples)
+            entry['speed'] = sample_seconds / max(elapsed, 1e-6)  # Vielfaches der Echtzeit
+            entry['fps'] = entry['speed'] * video_info.get('frame_rate', 0)
+            entry['bitrate_k'] = sample_bytes * 8 / sample_seconds / 1000
+            entry['projected_time_s'] = duration / entry['speed']
+            entry['projected_size_bytes'] = int(sample_bytes / sample_seconds * duration)
+            report['files'].append(entry)
+            report['total_time_s'] += entry['projected_time_s']
+            report['total_size_bytes'] += entry['projected_size_bytes']
+            self.log(f"  {entry['fps']:.1f} fps ({entry['speed']:.2f}x), {entry['bitrate_k']:.0f} kbit/s → "
+                     f"ca. {entry['projected_time_s'] / 60:.1f} min, "
+                     f"{entry['projected_size_bytes'] / 1024 ** 2:.0f} MB")
+        
+        self.log(f"Hochrechnung Batch: ca. {report['total_time_s'] / 60:.1f} min, "
+                 f"{report['total_size_bytes'] / 1024 ** 3:.2f} GB (Stichproben in {preview_dir})")
+        return report
+    
+    def post_process(self, verifier, deferred_faststart: bool, input_file: str, 
+                     output_files: List[str]) -> bool:
+        """Nachbearbeitung konvertierter Dateien (faststart-Remux und Prüfung)"""
+        with self.tracer.span("Nachbearbeitung", "postprocess", job=os.path.basename(input_file)):
+            for output_file in output_files:
+                if deferred_faststart and not self.apply_faststart(output_file):
+                    return False
+                if verifier and not self.verify_output(verifier, input_file, output_file):
+                    return False
+            return True
+    
+    def verify_output(self, verifier: OutputVerifier, input_file: str, output_file: str) -> bool:
+        """Prüft eine konvertierte Datei gegen die Quelle"""
+        ok, reason = verifier.verify(self.get_video_info(input_file), output_file)
+        if ok:
+            self.log(f"Prüfung bestanden: {os.path.basename(output_file)}")
+        else:
+            self.log(f"Prüfung fehlgeschlagen: {os.path.basename(output_file)} - {reason}")
+        return ok
+    
+    def job_active(self, job_id: str) -> bool:
+        """Prüft, ob die Konvertierung läuft und der Job nicht einzeln abgebrochen wurde"""
+        return self.is_converting and job_id not in self.cancelled_jobs
+    
+    def cancel_job(self, job_id: str):
+        """Bricht einen einzelnen Job ab (wartend oder laufend); die übrigen Jobs laufen weiter"""
+        self.cancelled_jobs.add(job_id)
+        self.log(f"Job wird abgebrochen: {os.path.basename(job_id)}")
+        # Clips einer gemeinsamen Sitzung: die ganze Sitzung beenden, die übrigen Clips laufen danach einzeln
+        get_supervisor().cancel(f"conversion/{self.job_groups.get(job_id, job_id)}", 1.0)
+    
     def stop_conversion(self):
-        """Stoppt die laufende Konvertierung"""
+        """Stoppt die laufende Konvertierung und beendet laufende FFmpeg-Prozesse"""
         self.is_converting = False
+        self.resume_event.set()
         self.log("Konvertierung wird gestoppt...")
+        # Teildateien behalten: FFmpeg bekommt Zeit, den Container abzuschließen; sonst nach 1 s hart beenden
+        if self.config.get("stop_partial_output", "delete") == "keep":
+            grace_s = float(self.config.get("stop_grace_s", 10))
+        else:
+            grace_s = 1.0
+        get_supervisor().cancel("conversion", grace_s)
+    
+    def pause_conversion(self):
+        """Hält laufende FFmpeg-Prozesse an und startet keine neuen Jobs"""
+        if not self.is_converting:
+            return
+        self.resume_event.clear()
+        get_supervisor().pause("conversion")
+        self.log("Konvertierung pausiert")
+    
+    def resume_conversion(self):
+        """Setzt pausierte FFmpeg-Prozesse und die Warteschlange fort"""
+        get_supervisor().resume("conversion")
+        self.resume_event.set()
+        self.log("Konvertierung fortgesetzt")
+    
+    def discard_partial_outputs(self, output_files: List[str], stopped: bool):
+        """Entfernt unvollständige Ausgaben oder behält sie nach einem Stopp als .partial-Datei"""
+        keep = stopped and self.config.get("stop_partial_output", "delete") == "keep"
+        for output_file in output_files:
+            if not os.path.exists(output_file):
+                continue
+            try:
+                if keep:
+                    base, ext = os.path.splitext(output_file)
+                    os.replace(output_file, f"{base}.partial{ext}")
+                    self.log(f"Teildatei behalten: {os.path.basename(base)}.partial{ext}")
+                else:
+                    os.remove(output_file)
+                    self.log(f"Unvollständige Ausgabe entfernt: {os.path.basename(output_file)}")
+            except OSError as e:
+                self.log(f"Unvollständige Ausgabe konnte nicht bereinigt werden: {str(e)}")
     
     def get_available_encoders(self) -> List[str]:
-        """Ermittelt verfügbare Hardware-Encoder"""
+        """Ermittelt verfügbare Hardware-Encoder (gespeicherte Ergebnisse, sonst parallele Test-Kodierungen)"""
         available = ["libx264"]  # Software-Encoder ist immer verfügbar
+        supervisor = get_supervisor()
+        health = self.get_encoder_health()
         
-        # Prüfe AMD (Priorität für AMD-Systeme)
-        try:
-            result = subprocess.run(['ffmpeg', '-encoders'], 
-                                  capture_output=True, text=True, timeout=10)
-            if 'h264_amf' in result.stdout:
-                # Teste ob der AMD Encoder tatsächlich funktioniert
-                test_result = subprocess.run([
-                    'ffmpeg', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=320x240:rate=1',
-                    '-c:v', 'h264_amf', '-t', '1', '-y', 'NUL'
-                ], capture_output=True, text=True, timeout=30)
-                if test_result.returncode == 0:
-                    available.append("h264_amf")
-                    self.log("AMD AMF Encoder: Verfügbar und funktionsfähig")
-                else:
-                    self.log("AMD AMF Encoder: Verfügbar aber nicht funktionsfähig (Treiber-Problem)")
-        except Exception as e:
-            self.log(f"Fehler beim Testen von AMD AMF: {str(e)}")
+        def test_encoder(encoder):
+            if health.get(encoder) is not None:
+                return None  # Ergebnis eines früheren Tests oder Jobs wiederverwenden
+            return supervisor.submit([
+                'ffmpeg', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=320x240:rate=1',
+                '-c:v', encoder, '-t', '1', '-f', 'null', '-'
+            ], timeout=30, group="encoder_test")
         
-        # Prüfe Intel Quick Sync
         try:
-            if 'h264_qsv' in result.stdout:
-                test_result = subprocess.run([
-                    'ffmpeg', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=320x240:rate=1',
-                    '-c:v', 'h264_qsv', '-t', '1', '-y', 'NUL'
-                ], capture_output=True, text=True, timeout=30)
-                if test_result.returncode == 0:
-                    available.append("h264_qsv")
-                    self.log("Intel QSV Encoder: Verfügbar und funktionsfähig")
+            result = supervisor.run(['ffmpeg', '-encoders'], timeout=10, capture_stdout=True,
+                                    capture_stderr=True)
+        except OSError as e:
+            self.log(f"Fehler beim Abfragen der Encoder: {str(e)}")
+            return available
+        # Gespeicherte Ergebnisse gelten nur für dieselbe FFmpeg-Version
+        health.set_ffmpeg_version(parse_ffmpeg_version(result.stderr))
+        
+        # AMD (Priorität für AMD-Systeme) und Intel Quick Sync gleichzeitig testen
+        tests = {encoder: test_encoder(encoder) for encoder in ("h264_amf", "h264_qsv")
+                 if encoder in result.stdout}
+        messages = {
+            "h264_amf": ("AMD AMF Encoder: Verfügbar und funktionsfähig",
+                         "AMD AMF Encoder: Verfügbar aber nicht funktionsfähig (Treiber-Problem)"),
+            "h264_qsv": ("Intel QSV Encoder: Verfügbar und funktionsfähig",
+                         "Intel QSV Encoder: Verfügbar aber nicht funktionsfähig"),
+            "h264_nvenc": ("NVIDIA NVENC Encoder: Verfügbar und funktionsfähig",
+                           "NVIDIA NVENC Encoder: Verfügbar aber nicht funktionsfähig (CUDA-Treiber fehlen)")
+        }
+        
+        def collect(encoder, future):
+            try:
+                if future is None:
+                    ok = health.get(encoder)
                 else:
-                    self.log("Intel QSV Encoder: Verfügbar aber nicht funktionsfähig")
-        except Exception as e:
-            self.log(f"Fehler beim Testen von Intel QSV: {str(e)}")
+                    ok = future.result().returncode == 0
+                    health.record(encoder, ok)
+                if ok:
+                    available.append(encoder)
+                    self.log(messages[encoder][0])
+                else:
+                    self.log(messages[encoder][1])
+            except Exception as e:
+                self.log(f"Fehler beim Testen von {encoder}: {str(e)}")
         
-        # NVIDIA nur prüfen wenn explizit gewünscht (für Hybrid-Systeme)
-        # Für reine AMD-Systeme überspringen wir NVIDIA
-        try:
-            # Prüfe ob wir auf einem AMD-System sind
-            if 'h264_amf' in available:
-                self.log("AMD-System erkannt - NVIDIA NVENC wird übersprungen")
-            else:
-                # Nur prüfen wenn AMD nicht verfügbar ist
-                if 'h264_nvenc' in result.stdout:
-                    test_result = subprocess.run([
-                        'ffmpeg', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=320x240:rate=1',
-                        '-c:v', 'h264_nvenc', '-t', '1', '-y', 'NUL'
-                    ], capture_output=True, text=True, timeout=30)
-                    if test_result.returncode == 0:
-                        available.append("h264_nvenc")
-                        self.log("NVIDIA NVENC Encoder: Verfügbar und funktionsfähig")
-                    else:
-                        self.log("NVIDIA NVENC Encoder: Verfügbar aber nicht funktionsfähig (CUDA-Treiber fehlen)")
-        except Exception as e:
-            self.log(f"Fehler beim Testen von NVIDIA NVENC: {str(e)}")
+        for encoder, future in tests.items():
+            collect(encoder, future)
+        
+        # NVIDIA nur prüfen wenn AMD nicht verfügbar ist (für reine AMD-Systeme überspringen)
+        if 'h264_amf' in available:
+            self.log("AMD-System erkannt - NVIDIA NVENC wird übersprungen")
+        elif 'h264_nvenc' in result.stdout:
+            collect("h264_nvenc", test_encoder("h264_nvenc"))
         
         return available
@@ -0,0 +1,79 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Versionszeile im FFmpeg-Banner, z.B. "ffmpeg version 6.1.1 Copyright ..."
+FFMPEG_VERSION_PATTERN = re.compile(r'ffmpeg version (\S+)')
+
+
+def parse_ffmpeg_version(banner: str) -> str:
+    """Liest die FFmpeg-Version aus dem Banner (leer, wenn nicht erkennbar)"""
+    match = FFMPEG_VERSION_PATTERN.search(banner)
+    return match.group(1) if match else ""
+
+
+class EncoderHealth:
+    """Merkt sich, ob Hardware-Encoder funktionieren (Test-Kodierungen und echte Jobs)"""
+
+    def __init__(self, health_file: str, ttl_h: float = 24, log_callback=None):
+        self.health_file = Path(health_file)
+        self.ttl_s = ttl_h * 3600
+        self.log_callback = log_callback
+        self.lock = threading.Lock()
+        self.ffmpeg_version = ""
+        self.encoders = {}
+        self.load()
+
+    def log(self, message: str):
+        """Sendet eine Log-Nachricht an den Callback"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def load(self):
+        """Lädt gespeicherte Ergebnisse"""
+        if not self.health_file.exists():
+            return
+        try:
+            with open(self.health_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.ffmpeg_version = data.get('ffmpeg_version', "")
+            self.encoders = data.get('encoders', {})
+        except (OSError, ValueError) as e:
+            self.log(f"Encoder-Status konnte nicht gelesen werden: {str(e)}")
+
+    def save(self):
+        """Schreibt die Ergebnisse atomar"""
+        try:
+            os.makedirs(self.health_file.parent, exist_ok=True)
+            tmp_file = self.health_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'ffmpeg_version': self.ffmpeg_version, 'encoders': self.encoders}, f, indent=2)
+            os.replace(tmp_file, self.health_file)
+        except OSError as e:
+            self.log(f"Encoder-Status konnte nicht gespeichert werden: {str(e)}")
+
+    def set_ffmpeg_version(self, version: str):
+        """Verwirft alle Ergebnisse, wenn sich die FFmpeg-Version geändert hat"""
+        with self.lock:
+            if version and version != self.ffmpeg_version:
+                self.ffmpeg_version = version
+                self.encoders = {}
+                self.save()
+
+    def get(self, encoder: str) -> Optional[bool]:
+        """Letztes Ergebnis, solange es nicht abgelaufen ist (sonst None)"""
+        with self.lock:
+            entry = self.encoders.get(encoder)
+        if not entry or time.time() - entry['checked'] > self.ttl_s:
+            return None
+        return entry['ok']
+
+    def record(self, encoder: str, ok: bool, source: str = "test"):
+        """Hält fest, ob ein Encoder funktioniert hat (source: test oder job)"""
+        with self.lock:
+            self.encoders[encoder] = {'ok': ok, 'checked': time.time(), 'source': source}
+            self.save()
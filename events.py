@@ -0,0 +1,207 @@
+import json
+import queue
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, Optional
+
+# Maximaler Rückstand eines Abonnenten, ab dem Fortschritts-Ereignisse verworfen werden
+MAX_PROGRESS_BACKLOG = 200
+
+
+@dataclass(frozen=True)
+class Event:
+    """Basis aller Ereignisse"""
+    timestamp: float = field(default_factory=time.time, init=False)
+
+    @property
+    def type(self) -> str:
+        return type(self).__name__
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data['type'] = self.type
+        return data
+
+
+@dataclass(frozen=True)
+class LogMessage(Event):
+    """Protokollzeile (level: info, warning, error, detail)"""
+    message: str = ""
+    level: str = "info"
+
+
+@dataclass(frozen=True)
+class JobQueued(Event):
+    job_id: str = ""
+    input_file: str = ""
+
+
+@dataclass(frozen=True)
+class JobStarted(Event):
+    job_id: str = ""
+    input_file: str = ""
+    encoder: str = ""
+
+
+@dataclass(frozen=True)
+class Progress(Event):
+    """Fortschritt eines laufenden FFmpeg-Prozesses"""
+    job_id: str = ""
+    percent: float = 0.0
+    out_time_s: float = 0.0
+    fps: float = 0.0
+    speed: float = 0.0
+
+
+@dataclass(frozen=True)
+class JobFinished(Event):
+    job_id: str = ""
+    input_file: str = ""
+    output_files: List[str] = field(default_factory=list)
+    elapsed_s: float = 0.0
+    output_bytes: int = 0
+
+
+@dataclass(frozen=True)
+class JobFailed(Event):
+    job_id: str = ""
+    input_file: str = ""
+    reason: str = ""
+
+
+@dataclass(frozen=True)
+class JobSkipped(Event):
+    """Job wurde nicht ausgeführt (z.B. Ausgabedatei existiert bereits)"""
+    job_id: str = ""
+    input_file: str = ""
+    reason: str = ""
+
+
+@dataclass(frozen=True)
+class BatchStats(Event):
+    """Stand des Batches nach jedem abgeschlossenen Job"""
+    total: int = 0
+    done: int = 0
+    successful: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+    finished: bool = False
+
+
+class Subscription:
+    """Eigene Warteschlange und eigener Thread pro Abonnent"""
+
+    def __init__(self, handler: Callable[[Event], None], name: str):
+        self.handler = handler
+        self.queue = queue.SimpleQueue()
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.run, name=f"EventSubscriber-{name}", daemon=True)
+        self.thread.start()
+
+    def offer(self, event: Optional[Event]):
+        """Stellt ein Ereignis zu; Fortschritt wird bei großem Rückstand verworfen"""
+        if isinstance(event, Progress) and self.queue.qsize() > MAX_PROGRESS_BACKLOG:
+            self.dropped += 1
+            return
+        self.queue.put(event)
+
+    def run(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                break
+            try:
+                self.handler(event)
+            except Exception as e:
+                print(f"Fehler im Ereignis-Abonnenten {self.thread.name}: {str(e)}", file=sys.stderr)
+
+
+class EventBus:
+    """Verteilt Ereignisse an alle Abonnenten, ohne dass langsame Abonnenten den Absender blockieren"""
+
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+
+    def subscribe(self, handler: Callable[[Event], None], name: str = "") -> Subscription:
+        """Registriert einen Abonnenten (wird in einem eigenen Thread aufgerufen)"""
+        subscription = Subscription(handler, name or getattr(handler, '__name__', 'handler'))
+        # Kopie ersetzen statt verändern: publish iteriert ohne Sperre
+        self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, wait: bool = False):
+        """Entfernt einen Abonnenten und beendet dessen Thread (wait: ausstehende Ereignisse abarbeiten)"""
+        self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+        subscription.offer(None)
+        if wait:
+            subscription.thread.join()
+
+    def publish(self, event: Event):
+        """Stellt ein Ereignis allen Abonnenten zu"""
+        for subscription in self.subscriptions:
+            subscription.offer(event)
+
+
+class ConsoleSubscriber:
+    """Gibt Protokollzeilen als Text aus (bisheriges Verhalten)"""
+
+    def __call__(self, event: Event):
+        if isinstance(event, LogMessage) and event.level != "detail":
+            print(f"[{time.strftime('%H:%M:%S', time.localtime(event.timestamp))}] {event.message}")
+
+
+class JsonLinesSubscriber:
+    """Schreibt jedes Ereignis als JSON-Zeile (für Skripte und die Kommandozeile)"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def __call__(self, event: Event):
+        self.stream.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+class FileLogSubscriber:
+    """Hängt alle Ereignisse als JSON-Zeilen an eine Protokolldatei an"""
+
+    def __init__(self, log_file: str):
+        self.log_file = log_file
+
+    def __call__(self, event: Event):
+        if isinstance(event, Progress):
+            return  # Fortschritt würde die Datei aufblähen
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+
+
+class MetricsSubscriber:
+    """Zählt abgeschlossene Jobs, Ausgabemenge und Kodierzeit"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {'jobs_queued': 0, 'jobs_started': 0, 'jobs_finished': 0, 'jobs_failed': 0,
+                         'jobs_skipped': 0, 'output_bytes': 0, 'encode_seconds': 0.0, 'last_fps': 0.0}
+
+    def __call__(self, event: Event):
+        with self.lock:
+            if isinstance(event, JobQueued):
+                self.counters['jobs_queued'] += 1
+            elif isinstance(event, JobStarted):
+                self.counters['jobs_started'] += 1
+            elif isinstance(event, JobFinished):
+                self.counters['jobs_finished'] += 1
+                self.counters['output_bytes'] += event.output_bytes
+                self.counters['encode_seconds'] += event.elapsed_s
+            elif isinstance(event, JobFailed):
+                self.counters['jobs_failed'] += 1
+            elif isinstance(event, JobSkipped):
+                self.counters['jobs_skipped'] += 1
+            elif isinstance(event, Progress) and event.fps:
+                self.counters['last_fps'] = event.fps
+
+    def snapshot(self) -> dict:
+        """Aktuelle Zählerstände"""
+        with self.lock:
+            return dict(self.counters)
@@ -0,0 +1,159 @@
+import re
+from collections import Counter
+from typing import List, Optional
+
+from profiles import get_bit_depth
+from supervisor import get_supervisor
+
+CROP_PATTERN = re.compile(r'crop=(\d+):(\d+):(\d+):(\d+)')
+IDET_PATTERN = re.compile(r'Multi frame detection:\s*TFF:\s*(\d+)\s*BFF:\s*(\d+)\s*Progressive:\s*(\d+)')
+
+# Ränder unterhalb dieser Größe (Pixel) werden nicht abgeschnitten
+MIN_CROP_PX = 8
+
+# Anteil halbbildbasierter Frames, ab dem eine Quelle als interlaced gilt
+INTERLACED_RATIO = 0.3
+
+# CUVID-Decoder, die Zuschneiden, Deinterlacing und Skalieren auf der GPU übernehmen
+CUVID_DECODERS = {
+    "h264": "h264_cuvid",
+    "hevc": "hevc_cuvid",
+    "mpeg2video": "mpeg2_cuvid",
+    "mpeg4": "mpeg4_cuvid",
+    "vc1": "vc1_cuvid",
+    "vp9": "vp9_cuvid",
+    "av1": "av1_cuvid"
+}
+
+
+def parse_cropdetect(output: str) -> Optional[List[int]]:
+    """Häufigster Vorschlag von cropdetect als [Breite, Höhe, X, Y]"""
+    crops = CROP_PATTERN.findall(output)
+    if not crops:
+        return None
+    return [int(value) for value in Counter(crops).most_common(1)[0][0]]
+
+
+def parse_idet(output: str) -> dict:
+    """Zählt die Halbbild-Erkennung von idet (letzte Zusammenfassung)"""
+    matches = IDET_PATTERN.findall(output)
+    if not matches:
+        return {'tff': 0, 'bff': 0, 'progressive': 0}
+    tff, bff, progressive = (int(value) for value in matches[-1])
+    return {'tff': tff, 'bff': bff, 'progressive': progressive}
+
+
+def analyze_sample(input_file: str, start: float, seconds: float, timeout: int = 120) -> dict:
+    """Führt cropdetect und idet auf einem kurzen Ausschnitt aus"""
+    cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-ss', f'{start:.3f}', '-t', f'{seconds:.3f}',
+           '-i', input_file, '-map', '0:v:0', '-an', '-sn',
+           '-vf', 'idet,cropdetect=limit=24:round=2:reset=0', '-f', 'null', '-']
+    result = get_supervisor().run(cmd, timeout=timeout, capture_stderr=True, group="analysis")
+    return {'crop': parse_cropdetect(result.stderr), 'idet': parse_idet(result.stderr)}
+
+
+def combine_samples(samples: List[dict], width: int, height: int) -> dict:
+    """Fasst die Ausschnitte zusammen: Bildbereich ist die Vereinigung aller Vorschläge"""
+    crops = [s['crop'] for s in samples if s['crop']]
+    if crops:
+        left = min(c[2] for c in crops)
+        top = min(c[3] for c in crops)
+        right = max(c[2] + c[0] for c in crops)
+        bottom = max(c[3] + c[1] for c in crops)
+        crop = [right - left, bottom - top, left, top]
+    else:
+        crop = [width, height, 0, 0]
+
+    tff = sum(s['idet']['tff'] for s in samples)
+    bff = sum(s['idet']['bff'] for s in samples)
+    progressive = sum(s['idet']['progressive'] for s in samples)
+    interlaced_frames = tff + bff
+    interlaced = interlaced_frames > 0 and interlaced_frames >= INTERLACED_RATIO * (interlaced_frames + progressive)
+    return {'crop': crop, 'interlaced': interlaced, 'field_order': 'tff' if tff >= bff else 'bff'}
+
+
+def even(value: float) -> int:
+    """Rundet auf eine gerade Pixelzahl (H.264 mit 4:2:0)"""
+    return max(2, int(round(value / 2)) * 2)
+
+
+def plan_filters(video_info: dict, analysis: Optional[dict], max_height: int, encoder: str,
+                 hardware_filters: bool = True, color: Optional[dict] = None) -> dict:
+    """Plant Zuschneiden, Deinterlacing, Verkleinern und Farbumwandlung (GPU, falls möglich); leer = keine Filter"""
+    width, height = video_info.get('width', 0), video_info.get('height', 0)
+    plan = {'input_args': [], 'output_args': [], 'description': []}
+    if not width or not height:
+        return plan
+
+    crop = None
+    interlaced = False
+    if analysis:
+        crop_w, crop_h, crop_x, crop_y = analysis['crop']
+        if (width - crop_w >= MIN_CROP_PX or height - crop_h >= MIN_CROP_PX) and crop_w > 0 and crop_h > 0:
+            crop = (crop_w, crop_h, crop_x, crop_y)
+            plan['description'].append(f"Zuschneiden {width}x{height} → {crop_w}x{crop_h}")
+        interlaced = analysis['interlaced']
+        if interlaced:
+            plan['description'].append(f"Deinterlacing ({analysis['field_order'].upper()})")
+
+    visible_w, visible_h = (crop[0], crop[1]) if crop else (width, height)
+    scale = None
+    if max_height and visible_h > max_height:
+        scale = (even(visible_w * max_height / visible_h), even(max_height))
+        plan['description'].append(f"Verkleinern auf {scale[0]}x{scale[1]}")
+
+    # Umwandlung auf 8 Bit (mit Tone-Mapping) nach dem Verkleinern, dann auf weniger Pixeln
+    convert = bool(color and color['filters'])
+    if convert:
+        plan['description'].extend(color['description'])
+        plan['output_args'] = list(color['output_args'])
+
+    if not (crop or interlaced or scale or convert):
+        return plan
+
+    # GPU-Pfad nur für 8-Bit-Quellen (H.264-Hardware-Encoder kodieren kein 10-Bit), außer vpp_qsv wandelt um
+    codec = video_info.get('codec_name', '')
+    gpu_possible = hardware_filters and get_bit_depth(video_info) == 8
+    if gpu_possible and not convert and encoder == "h264_nvenc" and codec in CUVID_DECODERS:
+        # NVDEC schneidet zu, deinterlaced und skaliert bereits beim Dekodieren
+        args = ['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda', '-c:v', CUVID_DECODERS[codec]]
+        if crop:
+            top, left = crop[3], crop[2]
+            bottom, right = height - crop[1] - top, width - crop[0] - left
+            args.extend(['-crop', f'{top}x{bottom}x{left}x{right}'])
+        if interlaced:
+            # Ein Bild pro Vollbild (wie bwdif=mode=send_frame), sonst verdoppelt cuvid die Bildrate
+            args.extend(['-deint', 'adaptive', '-drop_second_field', '1'])
+        if scale:
+            args.extend(['-resize', f'{scale[0]}x{scale[1]}'])
+        plan['input_args'] = args
+        plan['description'].append("auf der GPU (NVDEC)")
+        return plan
+
+    if (gpu_possible or (hardware_filters and convert)) and encoder == "h264_qsv":
+        # Quick Sync: Dekodieren und vpp_qsv ohne Umweg über den Arbeitsspeicher
+        options = list(color['qsv']) if convert else []
+        if crop:
+            options.extend([f'cw={crop[0]}', f'ch={crop[1]}', f'cx={crop[2]}', f'cy={crop[3]}'])
+        if interlaced:
+            options.append('deinterlace=2')
+        if scale:
+            options.extend([f'w={scale[0]}', f'h={scale[1]}'])
+        plan['input_args'] = ['-hwaccel', 'qsv', '-hwaccel_output_format', 'qsv']
+        plan['output_args'] = ['-vf', 'vpp_qsv=' + ':'.join(options)] + plan['output_args']
+        plan['description'].append("auf der GPU (vpp_qsv)")
+        return plan
+
+    # Software-Filter (auch für AMF und libx264)
+    filters = []
+    if interlaced:
+        # Vor dem Zuschneiden, damit die Halbbilder nicht vermischt werden
+        filters.append(f"bwdif=mode=send_frame:parity={analysis['field_order']}")
+    if crop:
+        filters.append(f'crop={crop[0]}:{crop[1]}:{crop[2]}:{crop[3]}')
+    if scale:
+        filters.append(f'scale={scale[0]}:{scale[1]}')
+    if convert:
+        filters.extend(color['filters'])
+    plan['output_args'] = ['-vf', ','.join(filters)] + plan['output_args']
+    return plan
@@ -2,13 +2,27 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 import os
+from array import array
 from config import INPUT_FORMATS
+from job_store import JobStore
+
+# Anzeige des Zustands hinter dem Dateinamen (wartende Einträge ohne Zusatz)
+STATE_LABELS = {
+    'done': "fertig",
+    'skipped': "übersprungen",
+    'cancelled': "abgebrochen",
+    'failed': "fehlgeschlagen"
+}
 
 class FileListFrame(ttk.Frame):
-    def __init__(self, parent, **kwargs):
+    def __init__(self, parent, queue_file, **kwargs):
         super().__init__(parent, **kwargs)
-        self.file_list = []
+        # Warteschlange liegt auf der Festplatte; im Speicher nur die IDs in Anzeigereihenfolge
+        self.store = JobStore(queue_file)
+        self.job_ids = array('q')
         self.setup_ui()
+        self.restored_count = self.store.restore()
+        self.refresh()
     
     def setup_ui(self):
         """Erstellt die Benutzeroberfläche"""
@@ -49,6 +63,11 @@ class FileListFrame(ttk.Frame):
                                command=self.remove_selected)
         remove_btn.pack(side=tk.LEFT, padx=(0, 2))
         
+        # Erledigte Einträge entfernen
+        remove_done_btn = ttk.Button(button_frame, text="Erledigte entfernen", 
+                                     command=self.remove_done)
+        remove_done_btn.pack(side=tk.LEFT, padx=(0, 2))
+        
         # Liste leeren
         clear_btn = ttk.Button(button_frame, text="Liste leeren", 
                               command=self.clear_list)
@@ -69,8 +88,7 @@ class FileListFrame(ttk.Frame):
         )
         
         if files:
-            for file_path in files:
-                self.add_file(file_path)
+            self.add_paths(files)
     
     def add_folder(self):
         """Fügt alle Videodateien aus einem Ordner hinzu"""
@@ -83,23 +101,47 @@ class FileListFrame(ttk.Frame):
                 video_files.extend(Path(folder).glob(f"*{ext.upper()}"))
             
             if video_files:
-                for file_path in video_files:
-                    self.add_file(str(file_path))
+                self.add_paths(str(file_path) for file_path in video_files)
             else:
                 messagebox.showinfo("Info", "Keine Videodateien im ausgewählten Ordner gefunden.")
     
     def add_file(self, file_path):
         """Fügt eine einzelne Datei zur Liste hinzu"""
-        if file_path not in [f['path'] for f in self.file_list]:
-            file_info = {
-                'path': file_path,
-                'name': os.path.basename(file_path),
-                'size': self.get_file_size(file_path)
-            }
-            
-            self.file_list.append(file_info)
-            self.file_listbox.insert(tk.END, f"{file_info['name']} ({file_info['size']})")
-            self.update_status()
+        self.add_paths([file_path])
+    
+    def add_paths(self, file_paths):
+        """Fügt Dateien zur Warteschlange hinzu (erledigte werden erneut eingereiht, wartende übersprungen)"""
+        last_shown = self.job_ids[-1] if self.job_ids else 0
+        job_ids = self.store.add(file_paths, requeue=True)
+        if any(job_id <= last_shown for job_id in job_ids):
+            # Bereits angezeigte Einträge wurden wieder eingereiht - Zustand neu anzeigen
+            self.refresh()
+            return
+        for job_id in job_ids:
+            self.show_entry(self.store.get(job_id))
+        self.update_status()
+    
+    def show_entry(self, entry):
+        """Zeigt einen Eintrag der Warteschlange in der Liste an"""
+        self.job_ids.append(entry['id'])
+        size = self.format_size(entry['size_bytes']) if entry['size_bytes'] else "Unbekannt"
+        text = f"{os.path.basename(entry['path'])} ({size})"
+        if entry['state'] in STATE_LABELS:
+            text += f" - {STATE_LABELS[entry['state']]}"
+        self.file_listbox.insert(tk.END, text)
+    
+    def refresh(self):
+        """Lädt die Liste neu und zeigt den Zustand der Einträge an (erledigte bleiben sichtbar)"""
+        self.job_ids = array('q')
+        self.file_listbox.delete(0, tk.END)
+        for entry in self.store.entries():
+            self.show_entry(entry)
+        self.update_status()
+    
+    def remove_done(self):
+        """Entfernt erledigte Dateien aus der Liste (fehlgeschlagene bleiben für einen neuen Versuch)"""
+        if self.store.remove_done():
+            self.refresh()
     
     def remove_selected(self):
         """Entfernt ausgewählte Dateien aus der Liste"""
@@ -108,39 +150,44 @@ class FileListFrame(ttk.Frame):
             messagebox.showinfo("Info", "Bitte wählen Sie Dateien zum Entfernen aus.")
             return
         
+        self.store.remove([self.job_ids[index] for index in selection])
         # Entferne in umgekehrter Reihenfolge (damit sich die Indizes nicht ändern)
         for index in reversed(selection):
-            self.file_list.pop(index)
+            del self.job_ids[index]
             self.file_listbox.delete(index)
         
         self.update_status()
     
     def clear_list(self):
         """Leert die gesamte Dateiliste"""
-        if self.file_list:
+        if self.job_ids:
             if messagebox.askyesno("Bestätigung", "Möchten Sie wirklich alle Dateien aus der Liste entfernen?"):
-                self.file_list.clear()
+                self.store.clear()
+                self.job_ids = array('q')
                 self.file_listbox.delete(0, tk.END)
                 self.update_status()
     
     def get_file_size(self, file_path):
         """Ermittelt die Dateigröße in lesbarer Form"""
         try:
-            size_bytes = os.path.getsize(file_path)
-            if size_bytes < 1024:
-                return f"{size_bytes} B"
-            elif size_bytes < 1024 * 1024:
-                return f"{size_bytes / 1024:.1f} KB"
-            elif size_bytes < 1024 * 1024 * 1024:
-                return f"{size_bytes / (1024 * 1024):.1f} MB"
-            else:
-                return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
+            return self.format_size(os.path.getsize(file_path))
         except:
             return "Unbekannt"
     
+    def format_size(self, size_bytes):
+        """Formatiert eine Dateigröße in lesbarer Form"""
+        if size_bytes < 1024:
+            return f"{size_bytes} B"
+        elif size_bytes < 1024 * 1024:
+            return f"{size_bytes / 1024:.1f} KB"
+        elif size_bytes < 1024 * 1024 * 1024:
+            return f"{size_bytes / (1024 * 1024):.1f} MB"
+        else:
+            return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
+    
     def update_status(self):
         """Aktualisiert den Status-Text"""
-        count = len(self.file_list)
+        count = len(self.job_ids)
         if count == 0:
             self.status_label.config(text="Keine Dateien ausgewählt")
         elif count == 1:
@@ -149,9 +196,9 @@ class FileListFrame(ttk.Frame):
             self.status_label.config(text=f"{count} Dateien ausgewählt")
     
     def get_file_list(self):
-        """Gibt die aktuelle Dateiliste zurück"""
-        return self.file_list.copy()
+        """Gibt die Warteschlange zurück (JobStore, wird seitenweise gelesen)"""
+        return self.store
     
     def has_files(self):
-        """Prüft, ob Dateien in der Liste sind"""
-        return len(self.file_list) > 0
+        """Prüft, ob noch zu konvertierende Dateien in der Liste sind"""
+        return len(self.store) > 0
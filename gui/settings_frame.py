@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
-from config import ENCODERS, PRESETS, OUTPUT_FORMATS, ENCODING_PROFILES, THREAD_OPTIONS, COLOR_DEPTH_MODES, COLOR_DEPTH_DESCRIPTIONS
+from config import ENCODERS, PRESETS, OUTPUT_FORMATS, ENCODING_PROFILES, THREAD_OPTIONS, COLOR_DEPTH_MODES, COLOR_DEPTH_DESCRIPTIONS, RATE_CONTROL_MODES
 
 class SettingsFrame(ttk.LabelFrame):
     def __init__(self, parent, config, **kwargs):
@@ -62,6 +62,27 @@ class SettingsFrame(ttk.LabelFrame):
         self.profile_info = ttk.Label(row2, text="", foreground="blue", font=("Arial", 7))
         self.profile_info.pack(side=tk.LEFT, padx=(5, 0))
         
+        # Zeile für Ratenkontrolle und Zielbitrate
+        row_rate = ttk.Frame(self)
+        row_rate.pack(fill=tk.X, pady=1)
+        
+        ttk.Label(row_rate, text="Ratenkontrolle:", font=("Arial", 8)).pack(side=tk.LEFT)
+        self.rate_control_var = tk.StringVar()
+        self.rate_control_combo = ttk.Combobox(row_rate, textvariable=self.rate_control_var, 
+                                              values=list(RATE_CONTROL_MODES.keys()), 
+                                              state="readonly", width=8)
+        self.rate_control_combo.pack(side=tk.LEFT, padx=(3, 10))
+        self.rate_control_combo.bind('<<ComboboxSelected>>', self.on_rate_control_change)
+        
+        ttk.Label(row_rate, text="Bitrate (kbit/s):", font=("Arial", 8)).pack(side=tk.LEFT)
+        self.bitrate_var = tk.IntVar()
+        self.bitrate_spin = ttk.Spinbox(row_rate, from_=100, to=100000, increment=500, 
+                                        textvariable=self.bitrate_var, width=8)
+        self.bitrate_spin.pack(side=tk.LEFT, padx=(3, 0))
+        
+        self.rate_control_desc = ttk.Label(row_rate, text="", foreground="blue", font=("Arial", 7))
+        self.rate_control_desc.pack(side=tk.LEFT, padx=(5, 0))
+        
         # Dritte Zeile: Ausgabeformat, Threads und Farbtiefe
         row3 = ttk.Frame(self)
         row3.pack(fill=tk.X, pady=1)
@@ -153,6 +174,20 @@ class SettingsFrame(ttk.LabelFrame):
         description = COLOR_DEPTH_DESCRIPTIONS.get(mode, "")
         self.color_depth_desc.config(text=description)
     
+    def on_rate_control_change(self, event=None):
+        """Wird aufgerufen, wenn sich die Ratenkontrolle ändert"""
+        mode = self.rate_control_var.get()
+        self.rate_control_desc.config(text=RATE_CONTROL_MODES.get(mode, ""))
+        # Bitrate ist nur bei Zielbitrate/Zwei-Pass relevant
+        self.bitrate_spin.config(state=tk.DISABLED if mode == "crf" else tk.NORMAL)
+    
+    def get_bitrate(self):
+        """Liefert die eingegebene Zielbitrate (0 bei ungültiger Eingabe)"""
+        try:
+            return max(0, int(self.bitrate_var.get()))
+        except (tk.TclError, ValueError):
+            return 0
+    
     def on_encoder_change(self, event=None):
         """Wird aufgerufen, wenn sich der Encoder ändert"""
         self.update_preset_warning()
@@ -233,6 +268,9 @@ class SettingsFrame(ttk.LabelFrame):
         self.optimize_var.set(self.config.get("auto_optimize_large_files", True))
         self.split_var.set(self.config.get("split_large_files", True))
         self.color_depth_var.set(self.config.get("color_depth_mode", "auto"))
+        self.rate_control_var.set(self.config.get("default_rate_control", "crf"))
+        self.bitrate_var.set(self.config.get("default_bitrate_k", 4000))
+        self.on_rate_control_change()
         
         # Aktualisiere die Preset-Warnung
         self.update_preset_warning()
@@ -240,18 +278,22 @@ class SettingsFrame(ttk.LabelFrame):
         self.update_color_depth_description() # Aktualisiere die Farbtiefe-Beschreibung beim Laden
     
     def save_settings(self):
-        """Speichert die aktuellen Einstellungen in der Konfiguration"""
-        self.config.set("default_encoder", self.encoder_var.get())
-        self.config.set("default_preset", self.preset_var.get())
-        self.config.set("default_crf", self.crf_var.get())
-        self.config.set("default_profile", self.profile_var.get())
-        self.config.set("default_output_format", self.output_format_var.get())
-        self.config.set("max_threads", self.threads_var.get())
-        self.config.set("output_directory", self.output_dir_var.get())
-        self.config.set("overwrite_files", self.overwrite_var.get())
-        self.config.set("auto_optimize_large_files", self.optimize_var.get())
-        self.config.set("split_large_files", self.split_var.get())
-        self.config.set("color_depth_mode", self.color_depth_var.get())
+        """Speichert die aktuellen Einstellungen in der Konfiguration (ein Schreibvorgang)"""
+        self.config.update({
+            "default_encoder": self.encoder_var.get(),
+            "default_preset": self.preset_var.get(),
+            "default_crf": self.crf_var.get(),
+            "default_profile": self.profile_var.get(),
+            "default_output_format": self.output_format_var.get(),
+            "max_threads": self.threads_var.get(),
+            "output_directory": self.output_dir_var.get(),
+            "overwrite_files": self.overwrite_var.get(),
+            "auto_optimize_large_files": self.optimize_var.get(),
+            "split_large_files": self.split_var.get(),
+            "color_depth_mode": self.color_depth_var.get(),
+            "default_rate_control": self.rate_control_var.get(),
+            "default_bitrate_k": self.get_bitrate()
+        })
     
     def get_conversion_settings(self):
         """Gibt die aktuellen Konvertierungseinstellungen zurück"""
@@ -266,5 +308,7 @@ class SettingsFrame(ttk.LabelFrame):
             'overwrite': self.overwrite_var.get(),
             'optimize_large_files': self.optimize_var.get(),
             'split_large_files': self.split_var.get(),
-            'color_depth_mode': self.color_depth_var.get()
+            'color_depth_mode': self.color_depth_var.get(),
+            'rate_control': self.rate_control_var.get(),
+            'bitrate_k': self.get_bitrate()
         }
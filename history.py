@@ -0,0 +1,154 @@
+import heapq
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from profiles import get_bit_depth
+
+# Anzahl der ähnlichsten Einträge, aus denen geschätzt wird
+NEAREST_ENTRIES = 8
+
+
+class EncodeHistory:
+    """Speichert Messwerte abgeschlossener Konvertierungen und schätzt daraus Dauer und Größe"""
+
+    def __init__(self, history_file: str, max_entries: int = 5000, log_callback=None):
+        self.history_file = Path(history_file)
+        self.max_entries = max_entries
+        self.log_callback = log_callback
+        self.lock = threading.Lock()
+        self.entries = self.load()
+
+    def log(self, message: str):
+        """Sendet eine Log-Nachricht an den Callback"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def load(self) -> List[dict]:
+        """Lädt die Historie (eine JSON-Zeile pro Konvertierung)"""
+        entries = []
+        if not self.history_file.exists():
+            return entries
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # Unvollständige Zeile nach Absturz überspringen
+        except OSError as e:
+            self.log(f"Historie konnte nicht gelesen werden: {str(e)}")
+        return entries[-self.max_entries:]
+
+    def compact(self):
+        """Schreibt die Historie atomar neu und verwirft die ältesten Einträge"""
+        tmp_file = self.history_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_file, self.history_file)
+
+    def record(self, video_info: dict, job: dict, elapsed_s: float, output_bytes: int,
+               split: bool = False, parallel_jobs: int = 1):
+        """Hält Einstellungen, Quelleigenschaften und gemessene Leistung einer Konvertierung fest"""
+        duration = video_info.get('duration', 0)
+        if duration <= 0 or elapsed_s <= 0:
+            return
+        entry = {
+            'time': int(time.time()),
+            'encoder': job['encoder'],
+            'preset': job['preset'],
+            'crf': job['crf'],
+            'profile': job['profile'],
+            'rate_control': job.get('rate_control', 'crf'),
+            'bitrate_k': job.get('bitrate_k', 0),
+            'width': video_info.get('width', 0),
+            'height': video_info.get('height', 0),
+            'bit_depth': get_bit_depth(video_info),
+            'codec': video_info.get('codec_name', ''),
+            'duration': duration,
+            'split': split,
+            'parallel_jobs': parallel_jobs,
+            'fps': duration * video_info.get('frame_rate', 0) / elapsed_s,
+            'speed': duration / elapsed_s,
+            'output_bitrate_k': output_bytes * 8 / duration / 1000
+        }
+        with self.lock:
+            self.entries.append(entry)
+            try:
+                os.makedirs(self.history_file.parent, exist_ok=True)
+                if len(self.entries) > self.max_entries * 1.2:
+                    self.entries = self.entries[-self.max_entries:]
+                    self.compact()
+                else:
+                    with open(self.history_file, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as e:
+                self.log(f"Historie konnte nicht gespeichert werden: {str(e)}")
+
+    def distance(self, entry: dict, video_info: dict, job: dict, split: bool) -> float:
+        """Ähnlichkeit eines Eintrags zur geplanten Konvertierung (kleiner = ähnlicher)"""
+        pixels = max(1, video_info.get('width', 0) * video_info.get('height', 0))
+        entry_pixels = max(1, entry['width'] * entry['height'])
+        distance = abs(pixels - entry_pixels) / max(pixels, entry_pixels)
+        distance += abs(entry['crf'] - job['crf']) / 6
+        distance += 0.5 * (entry['bit_depth'] != get_bit_depth(video_info))
+        distance += 0.5 * (entry['codec'] != video_info.get('codec_name', ''))
+        distance += 0.5 * (entry['profile'] != job['profile'])
+        distance += 0.5 * (entry['split'] != split)
+        return distance
+
+    def estimate(self, video_info: dict, job: dict, split: bool = False) -> Optional[dict]:
+        """Schätzt Dauer (s) und Größe (Bytes) aus ähnlichen Einträgen mit gleichem Encoder und Preset"""
+        duration = video_info.get('duration', 0)
+        if duration <= 0:
+            return None
+        rate_control = job.get('rate_control', 'crf')
+        with self.lock:
+            candidates = [e for e in self.entries
+                          if e['encoder'] == job['encoder'] and e['preset'] == job['preset']
+                          and (e['rate_control'] == 'crf') == (rate_control == 'crf')]
+        if not candidates:
+            return None
+
+        nearest = heapq.nsmallest(NEAREST_ENTRIES, candidates,
+                                  key=lambda e: self.distance(e, video_info, job, split))
+        pixels = max(1, video_info.get('width', 0) * video_info.get('height', 0))
+        weights, pixel_rates, bits_per_pixel = [], [], []
+        for entry in nearest:
+            entry_pixels = max(1, entry['width'] * entry['height'])
+            weights.append(1 / (1 + self.distance(entry, video_info, job, split)))
+            # Kodiergeschwindigkeit skaliert etwa umgekehrt zur Pixelzahl
+            pixel_rates.append(entry['speed'] * entry_pixels)
+            # Bitrate pro Pixel, auf den CRF-Wert der geplanten Konvertierung umgerechnet
+            crf_factor = 2 ** ((entry['crf'] - job['crf']) / 6) if rate_control == 'crf' else 1
+            bits_per_pixel.append(entry['output_bitrate_k'] * crf_factor / entry_pixels)
+
+        total_weight = sum(weights)
+        speed = sum(w * r for w, r in zip(weights, pixel_rates)) / total_weight / pixels
+        if rate_control == 'crf':
+            bitrate_k = sum(w * b for w, b in zip(weights, bits_per_pixel)) / total_weight * pixels
+        else:
+            bitrate_k = job.get('bitrate_k', 0) or nearest[0]['output_bitrate_k']
+        return {
+            'time_s': duration / max(speed, 1e-6),
+            'size_bytes': int(bitrate_k * 1000 / 8 * duration),
+            'samples': len(nearest)
+        }
+
+
+def lpt_order(durations: List[Tuple[int, float]]) -> List[int]:
+    """Sortiert Jobs nach absteigender Dauer (Longest Processing Time first)"""
+    return [index for index, _ in sorted(durations, key=lambda item: item[1], reverse=True)]
+
+
+def makespan(durations: List[float], workers: int) -> float:
+    """Gesamtdauer bei Verteilung der Jobs in gegebener Reihenfolge auf freie Worker"""
+    finish_times = [0.0] * max(1, workers)
+    for duration in durations:
+        earliest = heapq.heappop(finish_times)
+        heapq.heappush(finish_times, earliest + duration)
+    return max(finish_times)
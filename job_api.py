@@ -0,0 +1,367 @@
+import json
+import os
+import queue
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from converter import VideoConverter
+from events import BatchStats, Event, JobFailed, JobFinished, JobQueued, JobSkipped, JobStarted, Progress
+from job_store import JobStore, QueueBatch
+
+# Einstellungen eines Auftrags und die Konfigurationswerte, aus denen ihre Standardwerte stammen
+SETTING_KEYS = {
+    "encoder": "default_encoder",
+    "crf": "default_crf",
+    "preset": "default_preset",
+    "profile": "default_profile",
+    "threads": "max_threads",
+    "output_format": "default_output_format",
+    "overwrite": "overwrite_files",
+    "color_depth_mode": "color_depth_mode",
+    "rate_control": "default_rate_control",
+    "bitrate_k": "default_bitrate_k"
+}
+
+# Ereignisse, die an Event-Stream-Clients gehen (Protokollzeilen bleiben lokal)
+STREAM_EVENTS = (JobQueued, JobStarted, Progress, JobFinished, JobFailed, JobSkipped, BatchStats)
+
+# Sekunden ohne Ereignis, nach denen ein Kommentar die Verbindung offen hält
+KEEPALIVE_S = 15
+
+JOB_PATH = re.compile(r'^/jobs/(\d+)$')
+
+
+class ApiError(Exception):
+    """Fehler einer Anfrage mit HTTP-Status"""
+
+    def __init__(self, status: int, message: str, headers: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class EventStream:
+    """Begrenzte Warteschlange eines Event-Stream-Clients; ein zu langsamer Client wird getrennt"""
+
+    def __init__(self, api, job_id: Optional[int], max_backlog: int):
+        self.api = api
+        self.job_id = job_id
+        self.queue = queue.Queue(maxsize=max_backlog)
+        self.overflow = False
+
+    def __call__(self, event: Event):
+        if not isinstance(event, STREAM_EVENTS):
+            return
+        data = event.to_dict()
+        if hasattr(event, 'job_id'):
+            data['id'] = self.api.get_job_id(event.job_id)
+            if self.job_id is not None and data['id'] != self.job_id:
+                return
+        elif self.job_id is not None:
+            return
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            # Fortschritt darf verloren gehen, Zustandswechsel nicht: dann muss der Client neu abfragen
+            if not isinstance(event, Progress):
+                self.overflow = True
+
+
+class JobApiServer:
+    """Lokale HTTP-Schnittstelle vor dem VideoConverter: Aufträge, Abfragen, Abbruch, Prioritäten, Ereignisse"""
+
+    def __init__(self, config, host: str = None, port: int = None):
+        self.config = config
+        self.store = JobStore(config.get("api_queue_file"))
+        self.converter = VideoConverter(config=config)
+        self.job_ids = {}  # Eingabepfad -> Job-ID (für Ereignisse)
+        self.streams = 0
+        self.streams_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        restored = self.store.restore()
+        if restored:
+            self.converter.log(f"{restored} Job(s) aus der API-Warteschlange wiederhergestellt")
+        self.httpd = ThreadingHTTPServer((host or config.get("api_host", "127.0.0.1"),
+                                          config.get("api_port", 8765) if port is None else port), ApiRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.api = self
+        self.dispatcher = threading.Thread(target=self.dispatch, name="JobApiDispatcher", daemon=True)
+
+    @property
+    def address(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Startet Verteiler und HTTP-Server im Hintergrund"""
+        self.dispatcher.start()
+        threading.Thread(target=self.httpd.serve_forever, name="JobApiServer", daemon=True).start()
+        self.converter.log(f"Job-API bereit: {self.address}")
+
+    def serve_forever(self):
+        """Startet den Verteiler und bedient Anfragen bis zum Abbruch (Strg+C)"""
+        self.dispatcher.start()
+        self.converter.log(f"Job-API bereit: {self.address}")
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Beendet Server und laufende Konvertierung; reservierte Jobs bleiben in der Warteschlange"""
+        self.stopping.set()
+        self.wakeup.set()
+        self.converter.stop_conversion()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.dispatcher.is_alive():
+            self.dispatcher.join(timeout=float(self.config.get("stop_grace_s", 10)) + 5)
+        self.store.release_claimed()
+
+    def dispatch(self):
+        """Arbeitet die Warteschlange ab: je Einstellungssatz ein Batch, der Jobs erst beim Start reserviert"""
+        while not self.stopping.is_set():
+            self.wakeup.clear()
+            settings = self.store.next_settings()
+            if settings is None:
+                self.wakeup.wait(timeout=5)
+                continue
+            # Bei parallelen Jobs die größten zuerst (LPT, die Dateigröße ersetzt die noch fehlende Analyse)
+            largest_first = (int(self.config.get("max_parallel_jobs", 1)) > 1 and
+                             self.config.get("lpt_scheduling", True))
+            try:
+                self.converter.convert_files(QueueBatch(self.store, settings, largest_first), **json.loads(settings))
+            except Exception as e:
+                self.converter.log(f"Fehler im Job-Verteiler: {str(e)}", level="error")
+                self.stopping.wait(timeout=1)
+            finally:
+                self.store.release_claimed()
+
+    def get_job_id(self, path: str) -> Optional[int]:
+        """Job-ID zu einem Eingabepfad (Ereignisse tragen den Pfad)"""
+        job_id = self.job_ids.get(path)
+        if job_id is None:
+            job_id = self.store.find(path)
+            if job_id is not None:
+                self.job_ids[path] = job_id
+        return job_id
+
+    def get_settings(self, requested: dict) -> str:
+        """Ergänzt die Einstellungen eines Auftrags um die Standardwerte und prüft sie"""
+        unknown = sorted(set(requested) - set(SETTING_KEYS))
+        if unknown:
+            raise ApiError(400, f"Unbekannte Einstellungen: {', '.join(unknown)}")
+        settings = {}
+        for name, key in SETTING_KEYS.items():
+            if name not in requested:
+                settings[name] = self.config.get(key)
+                continue
+            error = self.config.validate(key, requested[name])
+            if error:
+                raise ApiError(400, f"Ungültige Einstellung '{name}': {requested[name]}")
+            settings[name] = requested[name]
+        # Gleiche Einstellungen ergeben denselben Text und landen im selben Batch
+        return json.dumps(settings, sort_keys=True)
+
+    def submit(self, body: dict) -> dict:
+        """Nimmt einen Auftrag an (Dateien, Einstellungen, Priorität)"""
+        files = body.get('files')
+        if not isinstance(files, list) or not files or not all(isinstance(path, str) for path in files):
+            raise ApiError(400, "'files' muss eine nicht leere Liste von Pfaden sein")
+        priority = body.get('priority', 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ApiError(400, "'priority' muss eine ganze Zahl sein")
+        settings = body.get('settings', {})
+        if not isinstance(settings, dict):
+            raise ApiError(400, "'settings' muss ein Objekt sein")
+        settings = self.get_settings(settings)
+        paths = [os.path.abspath(path) for path in files]
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if missing:
+            raise ApiError(400, f"Dateien nicht gefunden: {', '.join(missing[:10])}")
+
+        # Gegendruck: volle Warteschlange lehnt neue Aufträge ab, statt unbegrenzt zu wachsen
+        pending = self.store.count(('queued', 'claimed', 'running'))
+        max_queued = int(self.config.get("api_max_queued", 10000))
+        if pending + len(paths) > max_queued:
+            raise ApiError(429, f"Warteschlange voll ({pending}/{max_queued} Jobs)",
+                           {'Retry-After': str(int(self.config.get("api_retry_after_s", 30)))})
+
+        ids = self.store.add(paths, settings=settings, priority=priority, requeue=True)
+        for path in paths:
+            self.converter.cancelled_jobs.discard(path)
+        self.wakeup.set()
+        return {'ids': ids, 'duplicates': len(paths) - len(ids)}
+
+    def get_job(self, job_id: int) -> dict:
+        entry = self.store.get(job_id)
+        if entry is None:
+            raise ApiError(404, f"Job {job_id} nicht gefunden")
+        return entry
+
+    def cancel(self, job_id: int) -> dict:
+        """Bricht einen wartenden oder laufenden Job ab"""
+        previous = self.store.cancel(job_id)
+        if previous is None:
+            raise ApiError(404, f"Job {job_id} nicht gefunden")
+        if previous in ('done', 'skipped', 'cancelled', 'failed'):
+            raise ApiError(409, f"Job {job_id} ist bereits abgeschlossen ({previous})")
+        if previous in ('claimed', 'running'):
+            # Bereits an den Converter übergeben: dort abbrechen bzw. nicht mehr starten
+            self.converter.cancel_job(self.store.get(job_id)['path'])
+        return {'id': job_id, 'state': 'cancelled', 'previous': previous}
+
+    def set_priority(self, job_id: int, body: dict) -> dict:
+        """Ändert die Priorität eines wartenden Jobs"""
+        priority = body.get('priority')
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ApiError(400, "'priority' muss eine ganze Zahl sein")
+        entry = self.get_job(job_id)
+        if not self.store.set_priority(job_id, priority):
+            raise ApiError(409, f"Job {job_id} wartet nicht mehr ({entry['state']})")
+        return self.get_job(job_id)
+
+    def list_jobs(self, query: dict) -> dict:
+        try:
+            after = int(query.get('after', ['0'])[0])
+            limit = min(int(query.get('limit', ['100'])[0]), 1000)
+        except ValueError:
+            raise ApiError(400, "'after' und 'limit' müssen ganze Zahlen sein")
+        jobs = self.store.list(query.get('state', [None])[0], after, limit)
+        return {'jobs': jobs, 'next': jobs[-1]['id'] if len(jobs) == limit else None}
+
+    def status(self) -> dict:
+        return {'converting': self.converter.is_converting, 'counts': self.store.counts(),
+                'metrics': self.converter.metrics.snapshot()}
+
+    def open_stream(self, job_id: Optional[int]):
+        """Meldet einen Event-Stream-Client an (begrenzte Anzahl gleichzeitiger Clients)"""
+        with self.streams_lock:
+            if self.streams >= int(self.config.get("api_max_event_clients", 16)):
+                raise ApiError(503, "Zu viele Event-Stream-Clients", {'Retry-After': '5'})
+            self.streams += 1
+        stream = EventStream(self, job_id, int(self.config.get("api_event_backlog", 1000)))
+        return stream, self.converter.events.subscribe(stream, "api-stream")
+
+    def close_stream(self, subscription):
+        self.converter.events.unsubscribe(subscription)
+        with self.streams_lock:
+            self.streams -= 1
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """JSON-Anfragen der Job-API; /events liefert Server-Sent Events"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "H264ConverterAPI"
+
+    @property
+    def api(self) -> JobApiServer:
+        return self.server.api
+
+    def log_message(self, format, *args):
+        self.api.converter.log(f"API {self.address_string()} {format % args}", level="detail")
+
+    def send_json(self, status: int, data, headers: Optional[dict] = None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > int(self.api.config.get("api_max_body_kb", 1024)) * 1024:
+            self.close_connection = True
+            raise ApiError(413, "Anfrage zu groß")
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ApiError(400, "Ungültiges JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "JSON-Objekt erwartet")
+        return body
+
+    def handle_request(self, method: str):
+        url = urlsplit(self.path)
+        match = JOB_PATH.match(url.path)
+        try:
+            if url.path == "/events" and method == "GET":
+                query = parse_qs(url.query)
+                self.stream_events(int(query['job'][0]) if 'job' in query else None)
+                return
+            if url.path == "/jobs" and method == "POST":
+                self.send_json(202, self.api.submit(self.read_json()))
+            elif url.path == "/jobs" and method == "GET":
+                self.send_json(200, self.api.list_jobs(parse_qs(url.query)))
+            elif url.path == "/status" and method == "GET":
+                self.send_json(200, self.api.status())
+            elif match and method == "GET":
+                self.send_json(200, self.api.get_job(int(match.group(1))))
+            elif match and method == "DELETE":
+                self.send_json(200, self.api.cancel(int(match.group(1))))
+            elif match and method == "PATCH":
+                self.send_json(200, self.api.set_priority(int(match.group(1)), self.read_json()))
+            else:
+                raise ApiError(404, f"Unbekannter Pfad: {method} {url.path}")
+        except ApiError as e:
+            self.send_json(e.status, {'error': str(e)}, e.headers)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+
+    def stream_events(self, job_id: Optional[int]):
+        """Server-Sent Events bis der Client die Verbindung trennt"""
+        stream, subscription = self.api.open_stream(job_id)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            self.wfile.write(b": verbunden\n\n")
+            self.wfile.flush()
+            while not self.api.stopping.is_set():
+                if stream.overflow:
+                    self.wfile.write(b"event: overflow\ndata: {}\n\n")
+                    self.wfile.flush()
+                    return
+                try:
+                    data = stream.queue.get(timeout=KEEPALIVE_S)
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    self.wfile.write(f"event: {data['type']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                                     .encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.api.close_stream(subscription)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_PATCH(self):
+        self.handle_request("PATCH")
+
+    def do_DELETE(self):
+        self.handle_request("DELETE")
+
+
+def serve_cli(host: str = None, port: int = None):
+    """Startet die Job-API ohne Oberfläche (gespeicherte Einstellungen als Standardwerte)"""
+    from config import Config
+    JobApiServer(Config(), host, port).serve_forever()
@@ -0,0 +1,342 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from events import JobFailed, JobFinished, JobSkipped, JobStarted
+
+# Einträge pro Datenbankabfrage beim Durchlaufen der Warteschlange
+PAGE_SIZE = 500
+
+# Zustände eines Eintrags; "done" verlässt die Warteschlange
+PENDING_STATES = ('queued', 'running', 'failed')
+
+# Abgeschlossene Zustände (erneutes Hinzufügen reiht wieder ein)
+FINAL_STATES = ('done', 'skipped', 'cancelled', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    reason TEXT NOT NULL DEFAULT '',
+    updated REAL NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 0,
+    settings TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS queue_state ON queue (state, id);
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (path, size, mtime_ns, kind)
+);
+"""
+
+
+class JobStore:
+    """Warteschlange, Job-Zustand und Analyse-Ergebnisse in einer SQLite-Datei"""
+
+    def __init__(self, db_file: str, max_probes: int = 100000):
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+        self.db_file = db_file
+        self.max_probes = max_probes
+        self.lock = threading.Lock()
+        # Eine Verbindung für alle Threads, Zugriffe sind durch die Sperre serialisiert
+        self.db = sqlite3.connect(db_file, check_same_thread=False, timeout=30)
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(SCHEMA)
+            # Warteschlangen älterer Versionen um Priorität und Einstellungen ergänzen
+            columns = {row[1] for row in self.db.execute("PRAGMA table_info(queue)")}
+            if 'priority' not in columns:
+                self.db.execute("ALTER TABLE queue ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+            if 'settings' not in columns:
+                self.db.execute("ALTER TABLE queue ADD COLUMN settings TEXT NOT NULL DEFAULT ''")
+            self.db.execute("CREATE INDEX IF NOT EXISTS queue_next ON queue (state, settings, priority, id)")
+            self.db.commit()
+
+    def add(self, paths: Iterable[str], settings: str = '', priority: int = 0, requeue: bool = False) -> List[int]:
+        """Fügt Dateien hinzu und liefert die neuen IDs (requeue: abgeschlossene Einträge erneut einreihen)"""
+        added = []
+        with self.lock:
+            for path in paths:
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    size = 0
+                cursor = self.db.execute("INSERT OR IGNORE INTO queue (path, size, updated, priority, settings) "
+                                         "VALUES (?, ?, ?, ?, ?)", (path, size, time.time(), priority, settings))
+                if cursor.rowcount:
+                    added.append(cursor.lastrowid)
+                elif requeue:
+                    cursor = self.db.execute(f"UPDATE queue SET state = 'queued', reason = '', size = ?, updated = ?, "
+                                             f"priority = ?, settings = ? WHERE path = ? AND state IN {FINAL_STATES}",
+                                             (size, time.time(), priority, settings, path))
+                    if cursor.rowcount:
+                        added.append(self.db.execute("SELECT id FROM queue WHERE path = ?", (path,)).fetchone()[0])
+            self.db.commit()
+        return added
+
+    def remove(self, ids: Sequence[int]):
+        """Entfernt Einträge aus der Warteschlange"""
+        with self.lock:
+            self.db.executemany("DELETE FROM queue WHERE id = ?", [(job_id,) for job_id in ids])
+            self.db.commit()
+
+    def clear(self):
+        """Leert die Warteschlange"""
+        with self.lock:
+            self.db.execute("DELETE FROM queue")
+            self.db.commit()
+
+    def remove_done(self) -> int:
+        """Entfernt erledigte Einträge (fehlgeschlagene bleiben für einen neuen Versuch)"""
+        with self.lock:
+            cursor = self.db.execute("DELETE FROM queue WHERE state IN ('done', 'skipped', 'cancelled')")
+            self.db.commit()
+            return cursor.rowcount
+
+    def restore(self) -> int:
+        """Nach einem Neustart: unterbrochene Jobs wieder einreihen, abgeschlossene entfernen"""
+        with self.lock:
+            self.db.execute("UPDATE queue SET state = 'queued' WHERE state IN ('running', 'claimed')")
+            self.db.execute("DELETE FROM queue WHERE state IN ('done', 'skipped', 'cancelled')")
+            self.db.commit()
+        return len(self)
+
+    def set_state(self, path: str, state: str, reason: str = ""):
+        """Hält den Zustand eines Jobs fest (abgebrochene Jobs bleiben abgebrochen)"""
+        with self.lock:
+            self.db.execute("UPDATE queue SET state = ?, reason = ?, updated = ? WHERE path = ? "
+                            "AND state != 'cancelled'", (state, reason, time.time(), path))
+            self.db.commit()
+
+    def __call__(self, event):
+        """Abonnent des Ereignis-Busses: überträgt Job-Ereignisse in die Warteschlange"""
+        if isinstance(event, JobStarted):
+            self.set_state(event.input_file, 'running')
+        elif isinstance(event, JobFinished):
+            self.set_state(event.input_file, 'done')
+        elif isinstance(event, JobFailed):
+            self.set_state(event.input_file, 'failed', event.reason)
+        elif isinstance(event, JobSkipped):
+            self.set_state(event.input_file, 'skipped', event.reason)
+
+    def cancel(self, job_id: int) -> Optional[str]:
+        """Bricht einen Eintrag ab und liefert den vorherigen Zustand (None, wenn unbekannt)"""
+        with self.lock:
+            row = self.db.execute("SELECT state FROM queue WHERE id = ?", (job_id,)).fetchone()
+            if row and row[0] not in FINAL_STATES:
+                self.db.execute("UPDATE queue SET state = 'cancelled', reason = 'Abgebrochen', updated = ? "
+                                "WHERE id = ?", (time.time(), job_id))
+                self.db.commit()
+        return row[0] if row else None
+
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        """Ändert die Priorität eines wartenden Eintrags (höhere Werte zuerst)"""
+        with self.lock:
+            cursor = self.db.execute("UPDATE queue SET priority = ?, updated = ? WHERE id = ? AND state = 'queued'",
+                                     (priority, time.time(), job_id))
+            self.db.commit()
+        return cursor.rowcount > 0
+
+    def next_settings(self) -> Optional[str]:
+        """Einstellungen des wartenden Eintrags mit der höchsten Priorität"""
+        with self.lock:
+            row = self.db.execute("SELECT settings FROM queue WHERE state = 'queued' "
+                                  "ORDER BY priority DESC, id LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def claim_next(self, settings: str, largest_first: bool = False) -> Optional[dict]:
+        """Reserviert den nächsten wartenden Eintrag mit diesen Einstellungen (höchste Priorität zuerst)"""
+        # largest_first: innerhalb einer Priorität die größte Datei zuerst (LPT mit der Größe als Aufwand)
+        order = "priority DESC, size DESC, id" if largest_first else "priority DESC, id"
+        with self.lock:
+            row = self.db.execute(f"SELECT id, path, size, priority FROM queue WHERE state = 'queued' "
+                                  f"AND settings = ? ORDER BY {order} LIMIT 1", (settings,)).fetchone()
+            if row is None:
+                return None
+            other = self.db.execute("SELECT priority, id FROM queue WHERE state = 'queued' AND settings != ? "
+                                    "ORDER BY priority DESC, id LIMIT 1", (settings,)).fetchone()
+            # Vorrang für andere Einstellungen (höhere Priorität bzw. gleiche und früher eingereiht): Batch beenden
+            if other and other[0] >= row[3]:
+                oldest = self.db.execute("SELECT MIN(id) FROM queue WHERE state = 'queued' AND settings = ? "
+                                         "AND priority = ?", (settings, row[3])).fetchone()[0]
+                if other[0] > row[3] or other[1] < oldest:
+                    return None
+            self.db.execute("UPDATE queue SET state = 'claimed', updated = ? WHERE id = ?", (time.time(), row[0]))
+            self.db.commit()
+        return {'id': row[0], 'path': row[1], 'size_bytes': row[2]}
+
+    def release_claimed(self) -> int:
+        """Reserviert, aber nicht gestartet (z.B. nach einem Stopp): wieder einreihen"""
+        with self.lock:
+            cursor = self.db.execute("UPDATE queue SET state = 'queued' WHERE state = 'claimed'")
+            self.db.commit()
+            return cursor.rowcount
+
+    def count(self, states: Sequence[str], settings: Optional[str] = None) -> int:
+        """Anzahl der Einträge in den angegebenen Zuständen"""
+        placeholders = ', '.join('?' * len(states))
+        query = f"SELECT COUNT(*) FROM queue WHERE state IN ({placeholders})"
+        params = list(states)
+        if settings is not None:
+            query += " AND settings = ?"
+            params.append(settings)
+        with self.lock:
+            return self.db.execute(query, params).fetchone()[0]
+
+    def counts(self) -> dict:
+        """Anzahl der Einträge pro Zustand"""
+        with self.lock:
+            return dict(self.db.execute("SELECT state, COUNT(*) FROM queue GROUP BY state").fetchall())
+
+    def list(self, state: Optional[str] = None, after: int = 0, limit: int = 100) -> List[dict]:
+        """Einträge ab einer ID (seitenweise), optional nur in einem Zustand"""
+        query = "SELECT id FROM queue WHERE id > ?"
+        params = [after]
+        if state:
+            query += " AND state = ?"
+            params.append(state)
+        with self.lock:
+            ids = [row[0] for row in self.db.execute(query + " ORDER BY id LIMIT ?", params + [limit])]
+        return [entry for entry in map(self.get, ids) if entry]
+
+    def __len__(self) -> int:
+        """Anzahl offener Einträge"""
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM queue WHERE state IN {PENDING_STATES}").fetchone()[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        """Durchläuft die offenen Einträge seitenweise (der Speicherbedarf bleibt konstant)"""
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute(f"SELECT id, path, size FROM queue WHERE state IN {PENDING_STATES} "
+                                       f"AND id > ? ORDER BY id LIMIT ?", (last_id, PAGE_SIZE)).fetchall()
+            if not rows:
+                return
+            for job_id, path, size in rows:
+                yield {'id': job_id, 'path': path, 'size_bytes': size}
+            last_id = rows[-1][0]
+
+    def entries(self) -> Iterator[dict]:
+        """Durchläuft alle Einträge samt Zustand seitenweise (auch erledigte, für die Anzeige)"""
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute("SELECT id, path, size, state FROM queue WHERE id > ? ORDER BY id LIMIT ?",
+                                       (last_id, PAGE_SIZE)).fetchall()
+            if not rows:
+                return
+            for job_id, path, size, state in rows:
+                yield {'id': job_id, 'path': path, 'size_bytes': size, 'state': state}
+            last_id = rows[-1][0]
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """Liefert einen einzelnen Eintrag"""
+        with self.lock:
+            row = self.db.execute("SELECT id, path, size, state, reason, priority, updated FROM queue WHERE id = ?",
+                                  (job_id,)).fetchone()
+        if not row:
+            return None
+        return {'id': row[0], 'path': row[1], 'size_bytes': row[2], 'state': row[3], 'reason': row[4],
+                'priority': row[5], 'updated': row[6]}
+
+    def find(self, path: str) -> Optional[int]:
+        """ID eines Eintrags anhand des Pfads"""
+        with self.lock:
+            row = self.db.execute("SELECT id FROM queue WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def get_probe(self, path: str, size: int, mtime_ns: int, kind: str):
+        """Gespeichertes Analyse-Ergebnis (KeyError, wenn unbekannt)"""
+        with self.lock:
+            row = self.db.execute("SELECT data FROM probes WHERE path = ? AND size = ? AND mtime_ns = ? "
+                                  "AND kind = ?", (path, size, mtime_ns, kind)).fetchone()
+        if row is None:
+            raise KeyError(path)
+        return json.loads(row[0])
+
+    def put_probe(self, path: str, size: int, mtime_ns: int, kind: str, data):
+        """Speichert ein Analyse-Ergebnis; die ältesten werden oberhalb von max_probes verworfen"""
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO probes (path, size, mtime_ns, kind, data) "
+                            "VALUES (?, ?, ?, ?, ?)", (path, size, mtime_ns, kind, json.dumps(data)))
+            self.db.execute("DELETE FROM probes WHERE rowid <= (SELECT MAX(rowid) FROM probes) - ?",
+                            (self.max_probes,))
+            self.db.commit()
+
+
+class QueueBatch:
+    """Laufende Sicht auf die wartenden Einträge gleicher Einstellungen (höchste Priorität zuerst)"""
+
+    def __init__(self, store: JobStore, settings: str, largest_first: bool = False):
+        self.store = store
+        self.settings = settings
+        self.largest_first = largest_first
+
+    def __len__(self) -> int:
+        return self.store.count(('queued', 'claimed'), self.settings)
+
+    def __iter__(self) -> Iterator[dict]:
+        """Reserviert erst beim Abruf: spätere Prioritätsänderungen wirken bis zum Start eines Jobs"""
+        while True:
+            entry = self.store.claim_next(self.settings, self.largest_first)
+            if entry is None:
+                return
+            yield entry
+
+    def __call__(self, event):
+        self.store(event)
+
+
+class ProbeCache:
+    """Begrenzter Speicher-Cache für Analyse-Ergebnisse, dahinter optional die SQLite-Datei"""
+
+    def __init__(self, store: Optional[JobStore] = None, max_entries: int = 512):
+        self.store = store
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def split_key(self, key: tuple):
+        """(Pfad, Größe, mtime[, Art]) -> Spalten der Datenbank"""
+        return key[0], key[1], key[2], key[3] if len(key) > 3 else 'video_info'
+
+    def __contains__(self, key) -> bool:
+        if key is None:
+            return False
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return True
+        if self.store is None:
+            return False
+        try:
+            value = self.store.get_probe(*self.split_key(key))
+        except KeyError:
+            return False
+        self.remember(key, value)
+        return True
+
+    def __getitem__(self, key):
+        return self.entries[key]
+
+    def __setitem__(self, key, value):
+        self.remember(key, value)
+        # Fehlgeschlagene Analysen nur für diese Sitzung merken
+        if self.store is not None and value is not None:
+            self.store.put_probe(*self.split_key(key), value)
+
+    def remember(self, key, value):
+        """Legt einen Eintrag im Speicher ab und verdrängt den am längsten unbenutzten"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -5,33 +5,54 @@ H.264 AVC Converter - H.265(HEVC) zu libx264
 Ein Tool zur Konvertierung von Video-Dateien in das H.264/AVC Format
 """
 
+import time
+
+# Zeitpunkt des Programmstarts für die Messung der Startzeit
+STARTUP_TIME = time.perf_counter()
+
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
 import os
 import sys
-from pathlib import Path
+from typing import Tuple
 
-# Importiere lokale Module
+# Importiere lokale Module (der Konverter wird erst nach dem Anzeigen des Fensters geladen)
 from config import Config, ENCODERS
-from converter import VideoConverter
 from gui.file_list import FileListFrame
 from gui.settings_frame import SettingsFrame
 from gui.log_frame import LogFrame
 
 class H264ConverterApp:
-    def __init__(self):
+    def __init__(self, benchmark_startup: bool = False):
         self.root = tk.Tk()
         self.config = Config()
         self.converter = None
+        self.converter_lock = threading.Lock()
+        self.benchmark_startup = benchmark_startup
+        self.window_ready_ms = None
+        self.available_encoders = None
         
         self.setup_main_window()
         self.setup_menu()
         self.setup_ui()
-        self.setup_converter()
         
-        # Prüfe FFmpeg
-        self.check_ffmpeg()
+        # Warnungen aus dem Laden der Konfiguration anzeigen
+        for error in self.config.load_errors:
+            self.log_frame.add_warning(error)
+        
+        # Aus der letzten Sitzung übernommene Warteschlange melden
+        if self.file_list_frame.restored_count:
+            self.log_frame.add_info(f"{self.file_list_frame.restored_count} Datei(en) aus der letzten Sitzung "
+                                    f"in der Warteschlange")
+        
+        # Fenster-Zeitpunkt festhalten; gemessen wird bis der Konverter geladen ist
+        if benchmark_startup:
+            self.root.after_idle(self.record_window_ready)
+        
+        # Konverter laden und FFmpeg prüfen, nachdem das Fenster angezeigt wird
+        self.root.after_idle(self.setup_converter)
     
     def setup_main_window(self):
         """Konfiguriert das Hauptfenster"""
@@ -59,6 +80,7 @@ class H264ConverterApp:
         menubar.add_cascade(label="Datei", menu=file_menu)
         file_menu.add_command(label="Dateien hinzufügen", command=self.add_files)
         file_menu.add_command(label="Ordner hinzufügen", command=self.add_folder)
+        file_menu.add_command(label="Befehlsplan exportieren...", command=self.export_plan)
         file_menu.add_separator()
         file_menu.add_command(label="Beenden", command=self.root.quit)
         
@@ -89,7 +111,7 @@ class H264ConverterApp:
         left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
         
         # Dateiliste
-        self.file_list_frame = FileListFrame(left_frame)
+        self.file_list_frame = FileListFrame(left_frame, self.config.get("queue_file"))
         self.file_list_frame.pack(fill=tk.BOTH, expand=True)
         
         # Rechte Seite: Einstellungen (kompakter)
@@ -129,6 +151,16 @@ class H264ConverterApp:
                                   command=self.stop_conversion, state=tk.DISABLED)
         self.stop_btn.pack(side=tk.LEFT, padx=(0, 3))  # Kleinerer Abstand von 5 auf 3
         
+        # Pause-Button (hält FFmpeg an, ohne den Fortschritt zu verlieren)
+        self.pause_btn = ttk.Button(button_frame, text="Pausieren", 
+                                   command=self.toggle_pause, state=tk.DISABLED)
+        self.pause_btn.pack(side=tk.LEFT, padx=(0, 3))
+        
+        # Vorschau-Button (Stichproben kodieren, Dauer und Größe hochrechnen)
+        self.preview_btn = ttk.Button(button_frame, text="Vorschau", 
+                                     command=self.start_preview)
+        self.preview_btn.pack(side=tk.LEFT, padx=(0, 3))
+        
         # Einstellungen speichern
         save_btn = ttk.Button(button_frame, text="Einstellungen speichern", 
                              command=self.save_settings)
@@ -152,26 +184,57 @@ class H264ConverterApp:
         version_label.pack(side=tk.RIGHT, padx=5)
     
     def setup_converter(self):
-        """Initialisiert den Video-Konverter"""
-        self.converter = VideoConverter(
-            config=self.config,
-            progress_callback=self.update_progress,
-            log_callback=self.update_log
-        )
+        """Lädt den Video-Konverter und prüft FFmpeg im Hintergrund (das Fenster bleibt bedienbar)"""
+        threading.Thread(target=self.check_ffmpeg, daemon=True).start()
+    
+    def get_converter(self):
+        """Liefert den Video-Konverter (wird beim ersten Zugriff importiert und erzeugt)"""
+        with self.converter_lock:
+            if self.converter is None:
+                # Import und Aufbau (SQLite, Supervisor) sind teuer - normalerweise im Hintergrund-Thread
+                from converter import VideoConverter
+                converter = VideoConverter(config=self.config)
+                converter.events.subscribe(self.on_event, "gui")
+                self.converter = converter
+        return self.converter
     
     def check_ffmpeg(self):
-        """Überprüft den FFmpeg-Status"""
-        if self.converter.check_ffmpeg():
+        """Lädt den Konverter, überprüft FFmpeg und die Encoder (im Hintergrund, Anzeige im Hauptthread)"""
+        self.get_converter()
+        if self.benchmark_startup:
+            self.root.after(0, self.report_startup_time)
+            return
+        ffmpeg_available = self.converter.check_ffmpeg()
+        available_encoders = self.converter.get_available_encoders() if ffmpeg_available else []
+        self.root.after(0, lambda: self.show_ffmpeg_check(ffmpeg_available, available_encoders))
+    
+    def show_ffmpeg_check(self, ffmpeg_available, available_encoders):
+        """Zeigt das Ergebnis der FFmpeg-Prüfung an"""
+        if ffmpeg_available:
             self.ffmpeg_status.config(text="FFmpeg: Verfügbar", foreground="green")
-            self.update_encoder_status()
+            self.update_encoder_status(available_encoders)
         else:
             self.ffmpeg_status.config(text="FFmpeg: Nicht verfügbar", foreground="red")
             self.encoder_status.config(text="Encoder: FFmpeg erforderlich")
             self.log_frame.add_error("FFmpeg ist nicht installiert oder nicht im PATH verfügbar!")
     
-    def update_encoder_status(self):
+    def record_window_ready(self):
+        """Hält fest, wann das Fenster angezeigt wird"""
+        self.root.update_idletasks()
+        self.window_ready_ms = (time.perf_counter() - STARTUP_TIME) * 1000
+    
+    def report_startup_time(self):
+        """Gibt die Zeit bis zum Fenster und bis zum geladenen Konverter aus und beendet das Programm"""
+        self.root.update_idletasks()
+        elapsed_ms = (time.perf_counter() - STARTUP_TIME) * 1000
+        if self.window_ready_ms is not None:
+            print(f"Startzeit bis Fenster: {self.window_ready_ms:.0f} ms")
+        print(f"Startzeit bis interaktiv (Konverter geladen): {elapsed_ms:.0f} ms")
+        self.root.after(0, self.root.destroy)
+    
+    def update_encoder_status(self, available_encoders):
         """Aktualisiert den Encoder-Status"""
-        available_encoders = self.converter.get_available_encoders()
+        self.available_encoders = available_encoders
         encoder_text = f"Encoder: {', '.join(available_encoders)}"
         self.encoder_status.config(text=encoder_text)
         
@@ -205,25 +268,64 @@ class H264ConverterApp:
         if messagebox.askyesno("Bestätigung", "Möchten Sie wirklich alle Einstellungen auf Standardwerte zurücksetzen?"):
             # Lösche die Konfigurationsdatei
             try:
-                if self.config.config_file.exists():
-                    self.config.config_file.unlink()
+                self.config.reset()
                 
                 # Lade die Standardeinstellungen neu
-                self.config = Config()
-                self.settings_frame.config = self.config
                 self.settings_frame.load_current_settings()
                 
                 self.log_frame.add_success("Einstellungen auf Standardwerte zurückgesetzt")
             except Exception as e:
                 self.log_frame.add_error(f"Fehler beim Zurücksetzen der Einstellungen: {str(e)}")
     
+    def export_plan(self):
+        """Exportiert den Ausführungsplan (Probelauf) als JSON oder Shell-Skript"""
+        if not self.file_list_frame.has_files():
+            messagebox.showwarning("Warnung", "Bitte fügen Sie zuerst Videodateien hinzu!")
+            return
+        
+        plan_file = filedialog.asksaveasfilename(title="Befehlsplan exportieren", defaultextension=".json",
+                                                 filetypes=[("JSON", "*.json"), ("Shell-Skript", "*.sh")])
+        if not plan_file:
+            return
+        
+        settings = self.settings_frame.get_conversion_settings()
+        self.log_frame.add_info("Befehlsplan wird erstellt...")
+        threading.Thread(target=self.run_plan_export, args=(settings, plan_file), daemon=True).start()
+    
+    def run_plan_export(self, settings, plan_file):
+        """Erstellt den Ausführungsplan in einem separaten Thread"""
+        from command_plan import save_plan
+        try:
+            plan = self.get_converter().plan_files(
+                file_list=self.file_list_frame.get_file_list(),
+                encoder=settings['encoder'],
+                crf=settings['crf'],
+                preset=settings['preset'],
+                profile=settings['profile'],
+                threads=settings['threads'],
+                output_format=settings['output_format'],
+                overwrite=settings['overwrite'],
+                color_depth_mode=settings['color_depth_mode'],
+                split_large_files=settings['split_large_files'],
+                rate_control=settings['rate_control'],
+                bitrate_k=settings['bitrate_k']
+            )
+            save_plan(plan, plan_file)
+            message = (f"Befehlsplan gespeichert: {plan_file} "
+                       f"({len(plan['jobs'])} Job(s), {plan['skipped']} übersprungen)")
+            # Log-Widget nur im Hauptthread ändern
+            self.root.after(0, lambda: self.log_frame.add_success(message))
+        except Exception as e:
+            message = f"Befehlsplan konnte nicht erstellt werden: {str(e)}"
+            self.root.after(0, lambda: self.log_frame.add_error(message))
+    
     def start_conversion(self):
         """Startet die Konvertierung"""
         if not self.file_list_frame.has_files():
             messagebox.showwarning("Warnung", "Bitte fügen Sie zuerst Videodateien hinzu!")
             return
         
-        if not self.converter.check_ffmpeg():
+        if not self.get_converter().check_ffmpeg():
             messagebox.showerror("Fehler", "FFmpeg ist nicht verfügbar!")
             return
         
@@ -235,14 +337,33 @@ class H264ConverterApp:
             messagebox.showerror("Fehler", "Bitte wählen Sie ein Ausgabeverzeichnis aus!")
             return
         
-        # Bestätigung
+        # Schätzung braucht ffprobe pro Datei: im Hintergrund berechnen, danach bestätigen lassen
+        self.start_btn.config(state=tk.DISABLED)
+        self.log_frame.add_info("Schätzung wird berechnet...")
+        threading.Thread(target=self.run_estimate, args=(settings,), daemon=True).start()
+    
+    def run_estimate(self, settings):
+        """Berechnet die Schätzung in einem separaten Thread und zeigt danach die Bestätigung an"""
+        estimate_text, warning = self.get_estimate_text(settings)
+        self.root.after(0, lambda: self.confirm_conversion(settings, estimate_text, warning))
+    
+    def confirm_conversion(self, settings, estimate_text: str, warning: str = ""):
+        """Fragt nach der Bestätigung (Hauptthread) und startet die Konvertierung"""
+        if warning:
+            self.log_frame.add_warning(warning)
         file_count = len(self.file_list_frame.get_file_list())
+        if settings['rate_control'] == "crf":
+            quality_text = f"CRF: {settings['crf']}"
+        else:
+            quality_text = f"Zielbitrate: {settings['bitrate_k']} kbit/s ({settings['rate_control']})"
         if not messagebox.askyesno("Bestätigung", 
                                  f"Möchten Sie {file_count} Datei(en) konvertieren?\n\n"
                                  f"Encoder: {settings['encoder']}\n"
                                  f"Preset: {settings['preset']}\n"
-                                 f"CRF: {settings['crf']}\n"
-                                 f"Ausgabe: {settings['output_format']}"):
+                                 f"{quality_text}\n"
+                                 f"Ausgabe: {settings['output_format']}"
+                                 f"{estimate_text}"):
+            self.start_btn.config(state=tk.NORMAL)
             return
         
         # Starte die Konvertierung in einem separaten Thread
@@ -258,13 +379,44 @@ class H264ConverterApp:
         # Aktualisiere die UI
         self.start_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
+        self.pause_btn.config(state=tk.NORMAL, text="Pausieren")
+    
+    def get_estimate_text(self, settings) -> Tuple[str, str]:
+        """Erstellt die Zeile mit geschätzter Dauer und Größe für den Bestätigungsdialog (Text, Warnung)"""
+        # Sehr große Warteschlangen nicht vorab analysieren (jede Datei bräuchte ffprobe)
+        if len(self.file_list_frame.get_file_list()) > int(self.config.get("estimate_max_files", 2000)):
+            return "", ""
+        try:
+            estimate = self.get_converter().estimate_files(
+                file_list=self.file_list_frame.get_file_list(),
+                encoder=settings['encoder'],
+                crf=settings['crf'],
+                preset=settings['preset'],
+                profile=settings['profile'],
+                color_depth_mode=settings['color_depth_mode'],
+                split_large_files=settings['split_large_files'],
+                rate_control=settings['rate_control'],
+                bitrate_k=settings['bitrate_k']
+            )
+        except Exception as e:
+            # Läuft im Hintergrund-Thread: Warnung wird im Hauptthread protokolliert
+            return "", f"Schätzung nicht möglich: {str(e)}"
+        
+        text = f"\n\nGeschätzte Größe: {estimate['total_size_bytes'] / 1024 ** 3:.2f} GB"
+        if estimate['total_time_s'] is not None:
+            text += f"\nGeschätzte Dauer: {estimate['total_time_s'] / 60:.0f} Minuten"
+            if estimate['unknown_time']:
+                text += f" (ohne {estimate['unknown_time']} Datei(en) ohne Vergleichswerte)"
+        else:
+            text += "\nGeschätzte Dauer: unbekannt (noch keine Vergleichswerte)"
+        return text, ""
     
     def run_conversion(self, settings):
         """Führt die Konvertierung in einem separaten Thread aus"""
         try:
             file_list = self.file_list_frame.get_file_list()
             
-            self.converter.convert_files(
+            self.get_converter().convert_files(
                 file_list=file_list,
                 encoder=settings['encoder'],
                 crf=settings['crf'],
@@ -273,7 +425,10 @@ class H264ConverterApp:
                 threads=settings['threads'],
                 output_format=settings['output_format'],
                 overwrite=settings['overwrite'],
-                color_depth_mode=settings['color_depth_mode']
+                color_depth_mode=settings['color_depth_mode'],
+                split_large_files=settings['split_large_files'],
+                rate_control=settings['rate_control'],
+                bitrate_k=settings['bitrate_k']
             )
             
         except Exception as e:
@@ -283,26 +438,121 @@ class H264ConverterApp:
             # Aktualisiere die UI im Hauptthread
             self.root.after(0, self.conversion_finished)
     
+    def start_preview(self):
+        """Startet die Vorschau mit den aktuellen Einstellungen"""
+        if not self.file_list_frame.has_files():
+            messagebox.showwarning("Warnung", "Bitte fügen Sie zuerst Videodateien hinzu!")
+            return
+        
+        if not self.get_converter().check_ffmpeg():
+            messagebox.showerror("Fehler", "FFmpeg ist nicht verfügbar!")
+            return
+        
+        settings = self.settings_frame.get_conversion_settings()
+        self.log_frame.add_info("Vorschau wird erstellt...")
+        self.preview_btn.config(state=tk.DISABLED)
+        
+        preview_thread = threading.Thread(
+            target=self.run_preview,
+            args=(settings,),
+            daemon=True
+        )
+        preview_thread.start()
+    
+    def run_preview(self, settings):
+        """Kodiert die Stichproben in einem separaten Thread"""
+        report = None
+        error = None
+        try:
+            report = self.get_converter().preview_files(
+                file_list=self.file_list_frame.get_file_list(),
+                encoder=settings['encoder'],
+                crf=settings['crf'],
+                preset=settings['preset'],
+                profile=settings['profile'],
+                threads=settings['threads'],
+                output_format=settings['output_format'],
+                color_depth_mode=settings['color_depth_mode'],
+                rate_control=settings['rate_control'],
+                bitrate_k=settings['bitrate_k']
+            )
+        except Exception as e:
+            error = str(e)
+        finally:
+            self.root.after(0, lambda: self.preview_finished(report, error))
+    
+    def preview_finished(self, report, error=None):
+        """Zeigt die Hochrechnung der Vorschau an"""
+        self.preview_btn.config(state=tk.NORMAL)
+        if error:
+            self.log_frame.add_error(f"Fehler bei der Vorschau: {error}")
+        if not report:
+            return
+        
+        failed = [entry for entry in report['files'] if entry['error']]
+        message = (f"Geschätzte Dauer: {report['total_time_s'] / 60:.1f} Minuten\n"
+                   f"Geschätzte Größe: {report['total_size_bytes'] / 1024 ** 3:.2f} GB\n\n"
+                   f"Stichproben: {report['preview_directory']}")
+        if failed:
+            message += f"\n\n{len(failed)} Datei(en) fehlgeschlagen - siehe Protokoll"
+            messagebox.showwarning("Vorschau", message)
+        else:
+            messagebox.showinfo("Vorschau", message)
+    
     def stop_conversion(self):
         """Stoppt die laufende Konvertierung"""
         if self.converter:
             self.converter.stop_conversion()
+        self.pause_btn.config(state=tk.DISABLED, text="Pausieren")
         
         self.log_frame.add_warning("Konvertierung wird gestoppt...")
     
+    def toggle_pause(self):
+        """Pausiert die Konvertierung bzw. setzt sie fort"""
+        if not self.converter:
+            return
+        if self.converter.resume_event.is_set():
+            self.converter.pause_conversion()
+            self.pause_btn.config(text="Fortsetzen")
+            self.log_frame.add_warning("Konvertierung pausiert")
+        else:
+            self.converter.resume_conversion()
+            self.pause_btn.config(text="Pausieren")
+            self.log_frame.add_info("Konvertierung fortgesetzt")
+    
     def conversion_finished(self):
         """Wird aufgerufen, wenn die Konvertierung beendet ist"""
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
+        self.pause_btn.config(state=tk.DISABLED, text="Pausieren")
+        self.file_list_frame.refresh()
         self.log_frame.add_info("Konvertierung beendet")
     
-    def update_progress(self, message):
-        """Aktualisiert den Fortschritt"""
-        self.log_frame.add_progress(message)
+    def on_event(self, event):
+        """Empfängt Ereignisse des Konverters (Abonnenten-Thread) und zeigt sie im Hauptthread an"""
+        self.root.after(0, self.show_event, event)
     
-    def update_log(self, message):
-        """Aktualisiert das Protokoll"""
-        self.log_frame.add_info(message)
+    def show_event(self, event):
+        """Zeigt ein Ereignis im Protokoll bzw. in der Statuszeile an"""
+        from events import LogMessage, Progress, JobFinished, JobFailed, BatchStats
+        if isinstance(event, LogMessage):
+            handlers = {
+                "warning": self.log_frame.add_warning,
+                "error": self.log_frame.add_error,
+                "detail": self.log_frame.add_progress
+            }
+            handlers.get(event.level, self.log_frame.add_info)(event.message)
+        elif isinstance(event, Progress):
+            # Nur die Statuszeile aktualisieren, damit das Protokoll nicht überläuft
+            self.log_frame.update_status(f"{event.percent:.1f}% - {event.fps:.0f} fps ({event.speed:.2f}x)")
+        elif isinstance(event, JobFinished):
+            self.log_frame.add_success(f"Fertig: {os.path.basename(event.input_file)} "
+                                       f"({event.output_bytes / 1024 ** 2:.0f} MB in {event.elapsed_s:.0f}s)")
+        elif isinstance(event, JobFailed):
+            self.log_frame.add_error(f"{os.path.basename(event.input_file)}: {event.reason}")
+        elif isinstance(event, BatchStats) and event.total and not event.finished:
+            progress = (event.done / event.total) * 100
+            self.log_frame.add_progress(f"Fortschritt: {progress:.1f}% ({event.done}/{event.total})")
     
     def show_about(self):
         """Zeigt den Über-Dialog"""
@@ -329,8 +579,9 @@ GitHub: https://github.com/MrThiemann/h265"""
     
     def show_ffmpeg_status(self):
         """Zeigt den FFmpeg-Status"""
-        if self.converter.check_ffmpeg():
-            available_encoders = self.converter.get_available_encoders()
+        if self.get_converter().check_ffmpeg():
+            # Ergebnis der Prüfung beim Start wiederverwenden statt erneut Test-Kodierungen auszuführen
+            available_encoders = self.available_encoders or self.converter.get_available_encoders()
             status_text = f"FFmpeg: Verfügbar\n\nVerfügbare Encoder:\n"
             for encoder in available_encoders:
                 status_text += f"• {encoder}: {ENCODERS.get(encoder, 'Unbekannt')}\n"
@@ -352,11 +603,70 @@ Download: https://ffmpeg.org/download.html"""
             print("\nAnwendung wird beendet...")
         except Exception as e:
             print(f"Fehler: {str(e)}")
+        finally:
+            # Ausstehende Konfigurationsänderungen sichern
+            self.config.flush()
+
+def export_plan_cli(inputs, plan_file, shard):
+    """Erstellt den Ausführungsplan ohne Oberfläche (gespeicherte Einstellungen)"""
+    from converter import VideoConverter
+    from command_plan import save_plan, shard_plan
+    config = Config()
+    converter = VideoConverter(config=config)
+    plan = converter.plan_files(
+        file_list=[{'path': os.path.abspath(path)} for path in inputs],
+        encoder=config.get("default_encoder"),
+        crf=config.get("default_crf"),
+        preset=config.get("default_preset"),
+        profile=config.get("default_profile"),
+        threads=config.get("max_threads"),
+        output_format=config.get("default_output_format"),
+        overwrite=config.get("overwrite_files"),
+        color_depth_mode=config.get("color_depth_mode", "auto"),
+        rate_control=config.get("default_rate_control"),
+        bitrate_k=config.get("default_bitrate_k")
+    )
+    if shard:
+        index, count = (int(value) for value in shard.split("/"))
+        plan = shard_plan(plan, index, count)
+    save_plan(plan, plan_file)
+    print(f"Befehlsplan gespeichert: {plan_file} ({len(plan['jobs'])} Job(s))")
 
 def main():
     """Hauptfunktion"""
+    parser = argparse.ArgumentParser(description="H.264 AVC Converter")
+    parser.add_argument("--benchmark-startup", action="store_true",
+                        help="Misst die Zeit bis zum bedienbaren Fenster und beendet das Programm")
+    parser.add_argument("--plan", metavar="DATEI",
+                        help="Probelauf: Befehlsplan für die angegebenen Dateien als .json oder .sh speichern")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Nur den Anteil I (ab 0) von N Rechnern in den Befehlsplan schreiben")
+    parser.add_argument("--serve", action="store_true",
+                        help="Job-API (HTTP/JSON, Server-Sent Events) ohne Oberfläche starten")
+    parser.add_argument("--host", help="Adresse der Job-API (Standard: api_host)")
+    parser.add_argument("--port", type=int, help="Port der Job-API (Standard: api_port)")
+    parser.add_argument("inputs", nargs="*", help="Videodateien für --plan")
+    args = parser.parse_args()
+    
+    if args.serve:
+        from job_api import serve_cli
+        try:
+            serve_cli(args.host, args.port)
+        except OSError as e:
+            print(f"Job-API konnte nicht gestartet werden: {str(e)}")
+            sys.exit(1)
+        return
+    
+    if args.plan:
+        try:
+            export_plan_cli(args.inputs, args.plan, args.shard)
+        except Exception as e:
+            print(f"Befehlsplan konnte nicht erstellt werden: {str(e)}")
+            sys.exit(1)
+        return
+    
     try:
-        app = H264ConverterApp()
+        app = H264ConverterApp(benchmark_startup=args.benchmark_startup)
         app.run()
     except Exception as e:
         print(f"Kritischer Fehler: {str(e)}")
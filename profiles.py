@@ -0,0 +1,61 @@
+from typing import List, Optional
+
+# Einstellungen, die ein Encoding-Profil überschreiben darf
+PROFILE_SETTINGS = ("encoder", "preset", "crf", "profile", "rate_control", "bitrate_k")
+
+
+def get_bit_depth(video_info: dict) -> int:
+    """Ermittelt die Farbtiefe aus den FFprobe-Daten"""
+    try:
+        bit_depth = int(video_info.get('bit_depth') or 0)
+    except (TypeError, ValueError):
+        bit_depth = 0
+    if bit_depth:
+        return bit_depth
+
+    pix_fmt = video_info.get('pix_fmt', '')
+    for depth in (16, 12, 10):
+        if str(depth) in pix_fmt:
+            return depth
+    return 8
+
+
+def rule_matches(rule: dict, video_info: dict, size_mb: float, large_file_threshold_mb: float) -> bool:
+    """Prüft, ob eine Regel auf eine Datei zutrifft (alle angegebenen Bedingungen müssen passen)"""
+    values = {
+        'height': video_info.get('height', 0),
+        'width': video_info.get('width', 0),
+        'bit_depth': get_bit_depth(video_info),
+        'duration_s': video_info.get('duration', 0),
+        'size_mb': size_mb
+    }
+
+    for name, value in values.items():
+        if f"min_{name}" in rule and value < rule[f"min_{name}"]:
+            return False
+        if f"max_{name}" in rule and value > rule[f"max_{name}"]:
+            return False
+
+    if 'large_file' in rule and (size_mb > large_file_threshold_mb) != rule['large_file']:
+        return False
+    if 'codec' in rule and video_info.get('codec_name', '') != rule['codec']:
+        return False
+    return True
+
+
+def match_rule(rules: List[dict], video_info: dict, size_mb: float,
+               large_file_threshold_mb: float) -> Optional[dict]:
+    """Liefert die erste passende Regel oder None"""
+    for rule in rules:
+        if rule_matches(rule, video_info, size_mb, large_file_threshold_mb):
+            return rule
+    return None
+
+
+def apply_profile(settings: dict, profile: dict) -> dict:
+    """Überschreibt die Batch-Einstellungen mit den Werten eines Encoding-Profils"""
+    result = dict(settings)
+    for key in PROFILE_SETTINGS:
+        if key in profile:
+            result[key] = profile[key]
+    return result
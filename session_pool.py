@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional, Tuple
+
+from stream_mapping import AUDIO_TRANSCODE
+
+# Muxer des segment-Muxers pro Ausgabeformat
+SEGMENT_FORMATS = {
+    "MP4": "mp4",
+    "MOV": "mov",
+    "MKV": "matroska",
+    "AVI": "avi",
+    "FLV": "flv"
+}
+
+
+def pool_key(video_info: dict, job: dict, output_format: str) -> Optional[tuple]:
+    """Gruppierungsschlüssel für einen gemeinsamen Encoder-Prozess (None = nicht geeignet)"""
+    if not video_info or not video_info.get('nb_frames') or output_format.upper() not in SEGMENT_FORMATS:
+        return None
+    stream_types = [s.get('codec_type') for s in video_info.get('streams', [])]
+    # Nur Video und höchstens eine Audio-Spur; Untertitel und Anhänge lassen sich nicht aneinanderhängen
+    if any(t not in ('video', 'audio') for t in stream_types) or stream_types.count('audio') > 1:
+        return None
+    return (job['encoder'], job['preset'], job['crf'], job['profile'], job.get('rate_control', 'crf'),
+            job.get('bitrate_k', 0), video_info.get('width'), video_info.get('height'),
+            round(video_info.get('frame_rate', 0), 3), video_info.get('pix_fmt'),
+            'audio' in stream_types, output_format.upper())
+
+
+def group_clips(keys: List[Tuple[dict, Optional[tuple]]], group_size: int) -> Tuple[List[List[dict]], List[dict]]:
+    """Teilt Dateien in Gruppen gleicher Eigenschaften (höchstens group_size) und Einzel-Jobs auf"""
+    buckets: Dict[tuple, List[dict]] = {}
+    singles = []
+    for file_info, key in keys:
+        if key is None:
+            singles.append(file_info)
+        else:
+            buckets.setdefault(key, []).append(file_info)
+
+    groups = []
+    for members in buckets.values():
+        for start in range(0, len(members), max(2, group_size)):
+            group = members[start:start + max(2, group_size)]
+            if len(group) > 1:
+                groups.append(group)
+            else:
+                singles.extend(group)
+    return groups, singles
+
+
+def muxer_options(muxer_args: List[str]) -> str:
+    """Wandelt Muxer-Parameter (z.B. ['-movflags', '+faststart']) in segment_format_options um"""
+    return ':'.join(f"{name.lstrip('-')}={value}" for name, value in zip(muxer_args[::2], muxer_args[1::2]))
+
+
+def build_pooled_command(inputs: List[Tuple[str, dict]], encoder_args: List[str], has_audio: bool,
+                         output_format: str, muxer_args: List[str], segment_pattern: str) -> List[str]:
+    """Ein FFmpeg-Prozess kodiert alle Eingaben nacheinander und schneidet an den Dateigrenzen"""
+    cmd = ['ffmpeg']
+    for input_file, _ in inputs:
+        cmd.extend(['-i', input_file])
+    cmd.append('-y')
+
+    # Eingaben aneinanderhängen (kürzere Audio-Spuren füllt concat mit Stille auf)
+    labels = ''.join(f"[{i}:{info.get('index', 0)}]" + (f"[{i}:a:0]" if has_audio else '')
+                     for i, (_, info) in enumerate(inputs))
+    cmd.extend(['-filter_complex',
+                f"{labels}concat=n={len(inputs)}:v=1:a={int(has_audio)}[v]" + ("[a]" if has_audio else ""),
+                '-map', '[v]'])
+    if has_audio:
+        codec, bitrate = AUDIO_TRANSCODE[output_format.upper()]
+        cmd.extend(['-map', '[a]', '-c:a', codec, '-b:a', bitrate])
+
+    # Schnittpunkte als Bildnummern: Keyframe genau am ersten Bild jeder Datei
+    boundaries = []
+    frames = 0
+    for _, info in inputs[:-1]:
+        frames += info['nb_frames']
+        boundaries.append(frames)
+    cmd.extend(encoder_args)
+    cmd.extend(['-force_key_frames', 'expr:' + '+'.join(f'eq(n,{b})' for b in boundaries)])
+
+    cmd.extend(['-f', 'segment', '-segment_frames', ','.join(str(b) for b in boundaries),
+                '-reset_timestamps', '1', '-segment_format', SEGMENT_FORMATS[output_format.upper()]])
+    if muxer_args:
+        cmd.extend(['-segment_format_options', muxer_options(muxer_args)])
+    cmd.append(segment_pattern)
+    return cmd
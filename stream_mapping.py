@@ -0,0 +1,121 @@
+from typing import List, Optional
+
+# Audio-Codecs, die ein Container ohne Neukodierung aufnehmen kann (None = alle)
+AUDIO_CODECS = {
+    "MP4": {"aac", "mp3", "ac3", "eac3", "alac", "opus", "flac"},
+    "MOV": {"aac", "mp3", "ac3", "eac3", "alac", "pcm_s16le", "pcm_s16be", "pcm_s24le", "pcm_s24be"},
+    "MKV": None,
+    "AVI": {"mp3", "mp2", "ac3", "aac", "pcm_s16le", "pcm_u8"},
+    "FLV": {"aac", "mp3"}
+}
+
+# Ziel-Codec und Bitrate, falls Audio neu kodiert werden muss
+AUDIO_TRANSCODE = {
+    "MP4": ("aac", "192k"),
+    "MOV": ("aac", "192k"),
+    "MKV": ("aac", "192k"),
+    "AVI": ("libmp3lame", "192k"),
+    "FLV": ("aac", "192k")
+}
+
+# Maximale Anzahl an Audio-Spuren pro Container
+MAX_AUDIO_STREAMS = {
+    "FLV": 1
+}
+
+# Untertitel: Text-Formate lassen sich umwandeln, Bild-Formate nur kopieren
+TEXT_SUBTITLE_CODECS = {"subrip", "srt", "ass", "ssa", "webvtt", "mov_text", "text"}
+SUBTITLE_CODECS = {
+    "MP4": {"mov_text"},
+    "MOV": {"mov_text"},
+    "MKV": {"subrip", "srt", "ass", "ssa", "webvtt", "hdmv_pgs_subtitle", "dvd_subtitle", "dvb_subtitle"},
+    "AVI": set(),
+    "FLV": set()
+}
+SUBTITLE_TRANSCODE = {
+    "MP4": "mov_text",
+    "MOV": "mov_text",
+    "MKV": "srt"
+}
+
+
+def plan_stream(stream: dict, output_format: str) -> dict:
+    """Entscheidet für einen Audio-/Untertitel-/Anhang-Stream: kopieren, neu kodieren oder verwerfen"""
+    codec_type = stream.get('codec_type', '')
+    codec = stream.get('codec_name', '')
+    item = {'index': stream.get('index'), 'type': codec_type, 'codec': codec,
+            'action': 'drop', 'target': None, 'reason': ''}
+
+    if codec_type == 'audio':
+        allowed = AUDIO_CODECS.get(output_format)
+        if allowed is None or codec in allowed:
+            item['action'] = 'copy'
+        else:
+            item['action'] = 'transcode'
+            item['target'], item['bitrate'] = AUDIO_TRANSCODE[output_format]
+            item['reason'] = f"{codec} wird von {output_format} nicht unterstützt"
+    elif codec_type == 'subtitle':
+        if codec in SUBTITLE_CODECS.get(output_format, set()):
+            item['action'] = 'copy'
+        elif codec in TEXT_SUBTITLE_CODECS and output_format in SUBTITLE_TRANSCODE:
+            item['action'] = 'transcode'
+            item['target'] = SUBTITLE_TRANSCODE[output_format]
+            item['reason'] = f"{codec} → {item['target']}"
+        else:
+            item['reason'] = f"Untertitel {codec} wird von {output_format} nicht unterstützt"
+    elif codec_type == 'attachment' and output_format == "MKV":
+        # Schriftarten für ASS-Untertitel
+        item['action'] = 'copy'
+    else:
+        item['reason'] = f"{codec_type or 'unbekannter'} Stream wird nicht übernommen"
+
+    return item
+
+
+def plan_streams(streams: List[dict], output_format: str) -> List[dict]:
+    """Erstellt den Mapping-Plan für alle Nicht-Video-Streams"""
+    output_format = output_format.upper()
+    plan = [plan_stream(stream, output_format) for stream in streams
+            if stream.get('codec_type') != 'video']
+
+    # Überzählige Audio-Spuren verwerfen, statt den Muxer scheitern zu lassen
+    max_audio = MAX_AUDIO_STREAMS.get(output_format)
+    if max_audio is not None:
+        audio_items = [item for item in plan if item['type'] == 'audio']
+        for item in audio_items[max_audio:]:
+            item['action'] = 'drop'
+            item['reason'] = f"{output_format} unterstützt nur {max_audio} Audio-Spur(en)"
+    return plan
+
+
+def validate_plan(video_index: Optional[int], plan: List[dict], output_format: str) -> List[str]:
+    """Prüft den Plan vor dem Start auf Fehler, die erst nach dem Kodieren auffallen würden"""
+    errors = []
+    if video_index is None:
+        errors.append("Kein Video-Stream gefunden")
+    if output_format.upper() not in AUDIO_CODECS:
+        errors.append(f"Unbekanntes Ausgabeformat: {output_format}")
+    return errors
+
+
+def stream_args(plan: List[dict], input_index: int = 0) -> List[str]:
+    """Wandelt den Plan in FFmpeg-Parameter um (Mapping und Codecs pro Ausgabestream)"""
+    args = []
+    counters = {'audio': 0, 'subtitle': 0, 'attachment': 0}
+    specifiers = {'audio': 'a', 'subtitle': 's', 'attachment': 't'}
+
+    for item in plan:
+        if item['action'] == 'drop':
+            continue
+        spec = specifiers[item['type']]
+        n = counters[item['type']]
+        counters[item['type']] += 1
+        args.extend(['-map', f"{input_index}:{item['index']}"])
+        if item['action'] == 'copy':
+            args.extend([f'-c:{spec}:{n}', 'copy'])
+        else:
+            args.extend([f'-c:{spec}:{n}', item['target']])
+            if item.get('bitrate'):
+                args.extend([f'-b:{spec}:{n}', item['bitrate']])
+
+    return args
@@ -0,0 +1,272 @@
+import asyncio
+import os
+import re
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List, NamedTuple, Optional
+
+# FFmpeg trennt Fortschrittszeilen mit \r, Meldungen mit \n
+LINE_SEPARATOR = re.compile(r'[\r\n]+')
+
+
+def in_group(process_group: str, group: str) -> bool:
+    """Gruppen sind hierarchisch: conversion umfasst auch die Job-Gruppen conversion/<job>"""
+    return process_group == group or process_group.startswith(group + "/")
+
+
+class ProcessResult(NamedTuple):
+    """Ergebnis eines überwachten Prozesses"""
+    returncode: int
+    stdout: str
+    stderr: str
+    stderr_tail: List[str]
+    timed_out: bool
+    cancelled: bool
+    # perf_counter-Zeitpunkte für die Profilierung
+    requested_at: Optional[float] = None
+    started_at: Optional[float] = None
+    first_output_at: Optional[float] = None
+    ended_at: Optional[float] = None
+
+
+def suspend_windows_process(pid: int, resume: bool = False):
+    """Hält einen Windows-Prozess an bzw. setzt ihn fort (NtSuspendProcess/NtResumeProcess)"""
+    import ctypes
+    process_suspend_resume = 0x0800
+    handle = ctypes.windll.kernel32.OpenProcess(process_suspend_resume, False, pid)
+    if not handle:
+        raise OSError(f"Prozess {pid} kann nicht geöffnet werden")
+    try:
+        if resume:
+            ctypes.windll.ntdll.NtResumeProcess(handle)
+        else:
+            ctypes.windll.ntdll.NtSuspendProcess(handle)
+    finally:
+        ctypes.windll.kernel32.CloseHandle(handle)
+
+
+class ProcessSupervisor:
+    """Startet und überwacht alle FFmpeg/FFprobe-Prozesse in einer gemeinsamen asyncio-Ereignisschleife"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.run_loop, name="ProcessSupervisor", daemon=True)
+        self.processes = {}  # Prozess -> Gruppe
+        self.cancelled = set()
+        self.paused = set()
+        self.paused_groups = set()
+        self.thread.start()
+
+    def run_loop(self):
+        """Ereignisschleife des Supervisors (eigener Thread)"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def run_async(self, cmd: List[str], on_line: Optional[Callable[[str], None]] = None,
+                        timeout: Optional[float] = None, group: str = "default",
+                        capture_stdout: bool = False, capture_stderr: bool = False,
+                        tail_lines: int = 50, grace_s: float = 5.0) -> ProcessResult:
+        """Startet einen Prozess, liest stdout/stderr gleichzeitig und erzwingt das Zeitlimit"""
+        # Unter Windows wird FFmpeg über stdin ('q') sauber beendet, sonst per SIGINT
+        stdin = asyncio.subprocess.PIPE if os.name == 'nt' else asyncio.subprocess.DEVNULL
+        stdout = asyncio.subprocess.PIPE if capture_stdout else asyncio.subprocess.DEVNULL
+        timing = {'requested_at': time.perf_counter()}
+        process = await asyncio.create_subprocess_exec(*cmd, stdin=stdin, stdout=stdout,
+                                                       stderr=asyncio.subprocess.PIPE)
+        timing['started_at'] = time.perf_counter()
+        self.processes[process] = group
+        if any(in_group(group, paused) for paused in self.paused_groups):
+            # Gruppe ist pausiert - neu gestartete Prozesse sofort anhalten
+            self.suspend(process)
+
+        stderr_tail = deque(maxlen=tail_lines)
+        stderr_lines = [] if capture_stderr else None
+        readers = [self.read_lines(process.stderr, on_line, stderr_tail, stderr_lines, timing)]
+        if capture_stdout:
+            readers.append(self.read_all(process.stdout, timing))
+
+        # Die Leser laufen auch nach einem Zeitlimit weiter, damit volle Pipes den Abbruch nicht blockieren
+        reader_task = asyncio.ensure_future(asyncio.gather(*readers))
+        wait_task = asyncio.ensure_future(process.wait())
+        timed_out = False
+        try:
+            done, _ = await asyncio.wait({wait_task}, timeout=timeout)
+            if not done:
+                timed_out = True
+                await self.terminate(process, grace_s)
+            returncode = await wait_task
+            timing['ended_at'] = time.perf_counter()
+            # Von Enkelprozessen offen gehaltene Pipes nicht endlos lesen
+            done, _ = await asyncio.wait({reader_task}, timeout=2)
+            if not done:
+                reader_task.cancel()
+        finally:
+            self.processes.pop(process, None)
+            self.paused.discard(process)
+        stdout_data = b''
+        if capture_stdout and done:
+            stdout_data = reader_task.result()[1]
+
+        cancelled = process.pid in self.cancelled
+        self.cancelled.discard(process.pid)
+        return ProcessResult(returncode, stdout_data.decode('utf-8', errors='replace'),
+                             "\n".join(stderr_lines or []), list(stderr_tail), timed_out, cancelled,
+                             timing['requested_at'], timing['started_at'], timing.get('first_output_at'),
+                             timing.get('ended_at'))
+
+    async def read_all(self, stream, timing: dict) -> bytes:
+        """Liest stdout vollständig und merkt sich das erste Ausgabe-Byte"""
+        chunks = []
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            timing.setdefault('first_output_at', time.perf_counter())
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def read_lines(self, stream, on_line, stderr_tail: deque, stderr_lines: Optional[list],
+                         timing: dict):
+        """Liest stderr blockweise und zerlegt es in Zeilen (auch bei \\r-Fortschrittszeilen)"""
+        buffer = ""
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            timing.setdefault('first_output_at', time.perf_counter())
+            parts = LINE_SEPARATOR.split(buffer + chunk.decode('utf-8', errors='replace'))
+            buffer = parts.pop()
+            for line in parts:
+                self.handle_line(line, on_line, stderr_tail, stderr_lines)
+        if buffer:
+            self.handle_line(buffer, on_line, stderr_tail, stderr_lines)
+
+    def handle_line(self, line: str, on_line, stderr_tail: deque, stderr_lines: Optional[list]):
+        """Speichert eine Ausgabezeile und reicht sie an den Callback weiter"""
+        line = line.strip()
+        if not line:
+            return
+        stderr_tail.append(line)
+        if stderr_lines is not None:
+            stderr_lines.append(line)
+        if on_line:
+            on_line(line)
+
+    async def terminate(self, process, grace_s: float = 5.0):
+        """Beendet einen Prozess sauber (SIGINT bzw. 'q') und nach Ablauf der Frist hart"""
+        if process.returncode is not None:
+            return
+        try:
+            if os.name == 'nt':
+                # Angehaltene Prozesse lesen stdin erst nach dem Fortsetzen
+                self.resume_process(process)
+                process.stdin.write(b'q')
+                await process.stdin.drain()
+            else:
+                # SIGINT wird einem angehaltenen Prozess erst nach SIGCONT zugestellt
+                process.send_signal(signal.SIGINT)
+                self.resume_process(process)
+        except (OSError, ProcessLookupError, ConnectionError):
+            pass
+        try:
+            await asyncio.wait_for(process.wait(), grace_s)
+        except asyncio.TimeoutError:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+
+    async def cancel_group(self, group: Optional[str], grace_s: float):
+        """Beendet alle Prozesse einer Gruppe samt Untergruppen (None = alle)"""
+        if group is None:
+            self.paused_groups.clear()
+        else:
+            self.paused_groups.discard(group)
+        targets = [p for p, g in list(self.processes.items()) if group is None or in_group(g, group)]
+        for process in targets:
+            self.cancelled.add(process.pid)
+        await asyncio.gather(*(self.terminate(p, grace_s) for p in targets))
+
+    def suspend(self, process):
+        """Hält einen Prozess an (SIGSTOP bzw. NtSuspendProcess); die CPU- und GPU-Last endet sofort"""
+        if process.returncode is not None or process in self.paused:
+            return
+        try:
+            if os.name == 'nt':
+                suspend_windows_process(process.pid)
+            else:
+                process.send_signal(signal.SIGSTOP)
+            self.paused.add(process)
+        except (OSError, ProcessLookupError):
+            pass
+
+    def resume_process(self, process):
+        """Setzt einen angehaltenen Prozess fort (SIGCONT bzw. NtResumeProcess)"""
+        if process not in self.paused:
+            return
+        self.paused.discard(process)
+        try:
+            if os.name == 'nt':
+                suspend_windows_process(process.pid, resume=True)
+            else:
+                process.send_signal(signal.SIGCONT)
+        except (OSError, ProcessLookupError):
+            pass
+
+    async def pause_group(self, group: str):
+        """Hält alle Prozesse einer Gruppe an, auch später gestartete"""
+        self.paused_groups.add(group)
+        for process, process_group in list(self.processes.items()):
+            if in_group(process_group, group):
+                self.suspend(process)
+
+    async def resume_group(self, group: str):
+        """Setzt alle Prozesse einer Gruppe fort"""
+        self.paused_groups.discard(group)
+        for process, process_group in list(self.processes.items()):
+            if in_group(process_group, group):
+                self.resume_process(process)
+
+    def pause(self, group: str) -> Future:
+        """Pausiert eine Gruppe aus einem beliebigen Thread"""
+        return asyncio.run_coroutine_threadsafe(self.pause_group(group), self.loop)
+
+    def resume(self, group: str) -> Future:
+        """Setzt eine pausierte Gruppe aus einem beliebigen Thread fort"""
+        return asyncio.run_coroutine_threadsafe(self.resume_group(group), self.loop)
+
+    def submit(self, cmd: List[str], callback: Optional[Callable[[Future], None]] = None,
+               **kwargs) -> Future:
+        """Startet einen Prozess aus einem beliebigen Thread; liefert ein Future mit ProcessResult"""
+        future = asyncio.run_coroutine_threadsafe(self.run_async(cmd, **kwargs), self.loop)
+        if callback:
+            future.add_done_callback(callback)
+        return future
+
+    def run(self, cmd: List[str], **kwargs) -> ProcessResult:
+        """Startet einen Prozess und wartet auf das Ergebnis"""
+        return self.submit(cmd, **kwargs).result()
+
+    def cancel(self, group: Optional[str] = None, grace_s: float = 5.0) -> Future:
+        """Bricht alle laufenden Prozesse einer Gruppe ab (erst sauber, dann hart)"""
+        return asyncio.run_coroutine_threadsafe(self.cancel_group(group, grace_s), self.loop)
+
+    def running(self, group: Optional[str] = None) -> int:
+        """Anzahl laufender Prozesse (einer Gruppe)"""
+        return sum(1 for g in list(self.processes.values()) if group is None or in_group(g, group))
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor() -> ProcessSupervisor:
+    """Liefert den gemeinsamen Supervisor (wird beim ersten Zugriff gestartet)"""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ProcessSupervisor()
+        return _supervisor
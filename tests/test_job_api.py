@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from config import Config
+from job_api import JobApiServer
+
+# Abschließende Ereignisse eines Jobs
+FINAL_EVENTS = ('JobFinished', 'JobFailed', 'JobSkipped')
+
+
+class JobApiTest(unittest.TestCase):
+    """Job-API auf localhost (Port 0 = freier Port); ohne FFmpeg schlagen die Testdateien fehl"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = Config()
+        self.config.config_file = Path(self.directory) / "converter_config.json"
+        # Alle Dateien des Konverters im Testverzeichnis ablegen
+        state_directory = str(Path.home() / ".h264_converter")
+        for key, value in self.config.config.items():
+            if isinstance(value, str) and value.startswith(state_directory):
+                self.config.config[key] = os.path.join(self.directory, os.path.basename(value))
+        self.config.config.update(output_directory=os.path.join(self.directory, "out"),
+                                  history_enabled=False, console_output="off", api_max_queued=3)
+        self.api = JobApiServer(self.config, '127.0.0.1', 0)
+
+    def tearDown(self):
+        self.api.shutdown()
+        self.api.store.db.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def serve_without_dispatcher(self):
+        """Nur den HTTP-Server starten: Jobs bleiben wartend, die Zustände sind vorhersehbar"""
+        threading.Thread(target=self.api.httpd.serve_forever, daemon=True).start()
+
+    def make_files(self, *names):
+        paths = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            with open(path, 'wb') as f:
+                f.write(b'\0' * 1024)
+            paths.append(path)
+        return paths
+
+    def request(self, method: str, path: str, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.api.address + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read()), response.headers
+        except urllib.error.HTTPError as e:
+            with e:
+                return e.code, json.loads(e.read()), e.headers
+
+    def test_submit_and_validation(self):
+        self.serve_without_dispatcher()
+        paths = self.make_files("a.mkv", "b.mkv")
+
+        status, body, _ = self.request('POST', '/jobs', {'files': paths, 'priority': 1})
+        self.assertEqual(status, 202)
+        self.assertEqual(len(body['ids']), 2)
+        self.assertEqual(self.request('POST', '/jobs', {'files': paths[:1]})[1]['duplicates'], 1)
+
+        self.assertEqual(self.request('POST', '/jobs', {'files': []})[0], 400)
+        self.assertEqual(self.request('POST', '/jobs', {'files': [os.path.join(self.directory, "fehlt.mkv")]})[0], 400)
+        self.assertEqual(self.request('POST', '/jobs', {'files': paths, 'settings': {'unbekannt': 1}})[0], 400)
+        self.assertEqual(self.request('POST', '/jobs', {'files': paths, 'settings': {'crf': 'x'}})[0], 400)
+        self.assertEqual(self.request('POST', '/jobs', {'files': paths, 'priority': 'hoch'})[0], 400)
+
+        status, body, _ = self.request('GET', '/jobs')
+        self.assertEqual(status, 200)
+        self.assertEqual([job['state'] for job in body['jobs']], ['queued', 'queued'])
+        self.assertEqual(self.request('GET', '/jobs/99')[0], 404)
+        self.assertEqual(self.request('GET', '/status')[1]['counts'].get('queued'), 2)
+
+    def test_backpressure(self):
+        self.serve_without_dispatcher()
+        paths = self.make_files("a.mkv", "b.mkv", "c.mkv", "d.mkv")
+        self.assertEqual(self.request('POST', '/jobs', {'files': paths[:2]})[0], 202)
+
+        status, body, headers = self.request('POST', '/jobs', {'files': paths[2:]})
+        self.assertEqual(status, 429)
+        self.assertEqual(headers['Retry-After'], str(self.config.get("api_retry_after_s")))
+        self.assertEqual(self.request('GET', '/status')[1]['counts'].get('queued'), 2)
+
+        # Ein abgebrochener Job gibt seinen Platz wieder frei
+        self.assertEqual(self.request('DELETE', '/jobs/1')[0], 200)
+        self.assertEqual(self.request('POST', '/jobs', {'files': paths[2:]})[0], 202)
+
+    def test_cancel_and_priority_conflicts(self):
+        self.serve_without_dispatcher()
+        paths = self.make_files("a.mkv", "b.mkv")
+        job_ids = self.request('POST', '/jobs', {'files': paths})[1]['ids']
+
+        status, body, _ = self.request('PATCH', f'/jobs/{job_ids[1]}', {'priority': 5})
+        self.assertEqual((status, body['priority']), (200, 5))
+        self.assertEqual(self.request('PATCH', f'/jobs/{job_ids[1]}', {'priority': 'hoch'})[0], 400)
+
+        status, body, _ = self.request('DELETE', f'/jobs/{job_ids[0]}')
+        self.assertEqual((status, body['previous']), (200, 'queued'))
+        self.assertEqual(self.request('DELETE', f'/jobs/{job_ids[0]}')[0], 409)
+        self.assertEqual(self.request('PATCH', f'/jobs/{job_ids[0]}', {'priority': 5})[0], 409)
+        self.assertEqual(self.request('DELETE', '/jobs/99')[0], 404)
+
+    def test_event_order(self):
+        self.api.start()
+        events = []
+        done = threading.Event()
+        connected = threading.Event()
+
+        def read_events():
+            with urllib.request.urlopen(f"{self.api.address}/events", timeout=60) as response:
+                for line in response:
+                    line = line.decode('utf-8').strip()
+                    if line.startswith(':'):
+                        connected.set()
+                    elif line.startswith('data:'):
+                        event = json.loads(line[5:])
+                        events.append((event['type'], event.get('id')))
+                        if event['type'] in FINAL_EVENTS:
+                            done.set()
+                            return
+
+        threading.Thread(target=read_events, daemon=True).start()
+        self.assertTrue(connected.wait(10))
+        job_id = self.request('POST', '/jobs', {'files': self.make_files("a.mkv")})[1]['ids'][0]
+        self.assertTrue(done.wait(60))
+
+        types = [event_type for event_type, event_id in events if event_id == job_id and event_type != 'Progress']
+        self.assertEqual(types[:2], ['JobQueued', 'JobStarted'])
+        self.assertIn(types[-1], FINAL_EVENTS)
+        self.assertNotEqual(self.request('GET', f'/jobs/{job_id}')[1]['state'], 'queued')
+
+
+if __name__ == '__main__':
+    unittest.main()
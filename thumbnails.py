@@ -0,0 +1,98 @@
+import math
+import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+from supervisor import get_supervisor
+
+
+def thumbnail_output_args(pattern: str, interval_s: float, width: int, max_frames: int = 0) -> List[str]:
+    """Zusätzliche FFmpeg-Ausgabe: alle interval_s Sekunden ein JPEG-Vorschaubild (image2)"""
+    args = ['-map', '0:v:0', '-an', '-sn', '-dn',
+            '-vf', f'fps=1/{interval_s:.3f},scale={width}:-2',
+            '-q:v', '3']
+    if max_frames:
+        args.extend(['-frames:v', str(max_frames)])
+    args.extend(['-f', 'image2', pattern])
+    return args
+
+
+def list_thumbnails(thumbnail_dir: str) -> List[str]:
+    """Vorschaubilder eines Videos in zeitlicher Reihenfolge"""
+    if not os.path.isdir(thumbnail_dir):
+        return []
+    return [os.path.join(thumbnail_dir, name) for name in sorted(os.listdir(thumbnail_dir))
+            if name.endswith('.jpg')]
+
+
+class ContactSheetBuilder:
+    """Setzt Vorschaubilder im Hintergrund zu Kontaktbögen zusammen"""
+
+    def __init__(self, columns: int = 5, log_callback=None):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Kontaktbogen")
+        self.columns = max(1, columns)
+        self.log_callback = log_callback
+
+    def log(self, message: str):
+        """Sendet eine Log-Nachricht an den Callback"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def submit(self, thumbnail_dir: str, sheet_file: str) -> Future:
+        """Plant einen Kontaktbogen ein"""
+        return self.executor.submit(self.build, thumbnail_dir, sheet_file)
+
+    def build(self, thumbnail_dir: str, sheet_file: str) -> bool:
+        """Erstellt den Kontaktbogen mit Pillow, ohne Pillow mit dem FFmpeg-Filter tile"""
+        thumbnails = list_thumbnails(thumbnail_dir)
+        if not thumbnails:
+            return False
+        try:
+            try:
+                from PIL import Image  # Optional, nur für Kontaktbögen benötigt
+            except ImportError:
+                built = self.build_with_ffmpeg(thumbnails, sheet_file)
+            else:
+                built = self.build_with_pillow(Image, thumbnails, sheet_file)
+        except OSError as e:
+            self.log(f"Kontaktbogen konnte nicht erstellt werden: {str(e)}")
+            return False
+        if built:
+            self.log(f"Kontaktbogen erstellt: {os.path.basename(sheet_file)}")
+        return built
+
+    def build_with_pillow(self, image_module, thumbnails: List[str], sheet_file: str) -> bool:
+        """Setzt die Bilder mit Pillow zu einem Raster zusammen"""
+        with image_module.open(thumbnails[0]) as first:
+            cell_width, cell_height = first.size
+        rows = math.ceil(len(thumbnails) / self.columns)
+        sheet = image_module.new('RGB', (cell_width * self.columns, cell_height * rows), 'black')
+        for i, thumbnail in enumerate(thumbnails):
+            with image_module.open(thumbnail) as image:
+                image.thumbnail((cell_width, cell_height))
+                sheet.paste(image, ((i % self.columns) * cell_width, (i // self.columns) * cell_height))
+        sheet.save(sheet_file, quality=85)
+        return True
+
+    def build_with_ffmpeg(self, thumbnails: List[str], sheet_file: str) -> bool:
+        """Setzt die Bilder mit dem FFmpeg-Filter tile zusammen (kleine JPEGs, kein erneutes Dekodieren des Videos)"""
+        rows = math.ceil(len(thumbnails) / self.columns)
+        fd, list_file = tempfile.mkstemp(suffix='.txt', dir=os.path.dirname(sheet_file) or '.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for thumbnail in thumbnails:
+                    escaped = os.path.abspath(thumbnail).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            cmd = ['ffmpeg', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_file, '-y',
+                   '-vf', f'tile={self.columns}x{rows}', '-frames:v', '1', '-q:v', '3', sheet_file]
+            result = get_supervisor().run(cmd, capture_stderr=True, group="postprocess")
+            if result.returncode != 0:
+                self.log(f"Kontaktbogen fehlgeschlagen: {result.stderr[-500:]}")
+            return result.returncode == 0
+        finally:
+            os.remove(list_file)
+
+    def shutdown(self):
+        """Wartet auf alle ausstehenden Kontaktbögen"""
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """Zeichnet Zeitabschnitte im Chrome-Trace-Format auf (eine Spur pro Worker-Thread)"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.events = []
+        self.lanes = {}
+        self.lock = threading.Lock()
+
+    def lane(self) -> int:
+        """Spur des aktuellen Threads (wird beim ersten Zugriff benannt)"""
+        ident = threading.get_ident()
+        lane = self.lanes.get(ident)
+        if lane is None:
+            with self.lock:
+                lane = self.lanes.setdefault(ident, len(self.lanes) + 1)
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': lane,
+                                    'args': {'name': threading.current_thread().name}})
+        return lane
+
+    def to_us(self, timestamp: float) -> float:
+        """perf_counter-Zeitpunkt in Mikrosekunden seit Beginn der Aufzeichnung"""
+        return round((timestamp - self.origin) * 1e6, 1)
+
+    def complete(self, name: str, start: float, end: float, category: str = "batch", **args):
+        """Fügt einen abgeschlossenen Abschnitt (perf_counter-Zeitpunkte) hinzu"""
+        if not self.enabled or start is None or end is None:
+            return
+        self.events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': 1, 'tid': self.lane(),
+                            'ts': self.to_us(start), 'dur': self.to_us(end) - self.to_us(start),
+                            'args': args})
+
+    def instant(self, name: str, category: str = "batch", timestamp: float = None, **args):
+        """Markiert einen Zeitpunkt (Standard: jetzt) auf der Spur des aktuellen Threads"""
+        if not self.enabled:
+            return
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        self.events.append({'name': name, 'cat': category, 'ph': 'i', 's': 't', 'pid': 1,
+                            'tid': self.lane(), 'ts': self.to_us(timestamp), 'args': args})
+
+    @contextmanager
+    def span(self, name: str, category: str = "batch", **args):
+        """Misst den umschlossenen Block"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, start, time.perf_counter(), category, **args)
+
+    def save(self, trace_directory: str) -> str:
+        """Schreibt die Zeitleiste als JSON (für chrome://tracing bzw. ui.perfetto.dev)"""
+        os.makedirs(trace_directory, exist_ok=True)
+        trace_file = os.path.join(trace_directory, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(trace_file, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return trace_file
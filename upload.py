@@ -0,0 +1,108 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+# Blockgröße beim Kopieren und Prüfen
+COPY_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def file_checksum(file_path: str) -> str:
+    """Berechnet die Prüfsumme einer vollständigen Datei"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def copy_with_checksum(source: str, target: str) -> str:
+    """Kopiert blockweise, berechnet dabei die Prüfsumme und schreibt die Daten auf den Datenträger"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        for block in iter(lambda: src.read(COPY_BLOCK_SIZE), b''):
+            digest.update(block)
+            dst.write(block)
+        dst.flush()
+        os.fsync(dst.fileno())
+    return digest.hexdigest()
+
+
+class UploadPool:
+    """Verschiebt lokal zwischengespeicherte Ausgaben im Hintergrund an ihr Ziel"""
+
+    def __init__(self, workers: int = 2, max_pending: int = 4, max_retries: int = 3,
+                 verify_checksum: bool = True, log_callback=None, tracer=None):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="Upload")
+        # Begrenzt die Anzahl wartender Uploads, damit der lokale Speicher nicht vollläuft
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+        self.max_retries = max(0, max_retries)
+        self.verify_checksum = verify_checksum
+        self.log_callback = log_callback
+        self.tracer = tracer
+
+    def log(self, message: str):
+        """Sendet eine Log-Nachricht an den Callback"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def submit(self, work_files: List[str], output_files: List[str]) -> Future:
+        """Plant das Verschieben ein; blockiert, solange zu viele Uploads ausstehen"""
+        self.slots.acquire()
+        future = self.executor.submit(self.upload_all, work_files, output_files)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def upload_all(self, work_files: List[str], output_files: List[str]) -> bool:
+        """Verschiebt alle Ausgaben eines Jobs"""
+        started = time.perf_counter()
+        uploaded = all(work_file == output_file or self.upload(work_file, output_file)
+                       for work_file, output_file in zip(work_files, output_files))
+        if self.tracer:
+            self.tracer.complete("Übertragung", started, time.perf_counter(), "upload",
+                                 files=[os.path.basename(path) for path in output_files])
+        return uploaded
+
+    def upload(self, work_file: str, output_file: str) -> bool:
+        """Verschiebt eine Datei mit Prüfsummen-Vergleich und Wiederholung bei Fehlern"""
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+
+        # Gleicher Datenträger: Umbenennen genügt
+        try:
+            if os.stat(work_file).st_dev == os.stat(os.path.dirname(output_file) or '.').st_dev:
+                os.replace(work_file, output_file)
+                return True
+        except OSError:
+            pass
+
+        part_file = output_file + ".part"
+        for attempt in range(self.max_retries + 1):
+            try:
+                checksum = copy_with_checksum(work_file, part_file)
+                if self.verify_checksum and file_checksum(part_file) != checksum:
+                    raise OSError("Prüfsumme stimmt nicht überein")
+                os.replace(part_file, output_file)
+                os.remove(work_file)
+                self.log(f"Übertragen: {os.path.basename(output_file)}")
+                return True
+            except OSError as e:
+                if os.path.exists(part_file):
+                    try:
+                        os.remove(part_file)
+                    except OSError:
+                        pass
+                if attempt < self.max_retries:
+                    self.log(f"Übertragung fehlgeschlagen ({str(e)}), neuer Versuch "
+                             f"{attempt + 1}/{self.max_retries}: {os.path.basename(output_file)}")
+                    time.sleep(2 ** attempt)
+                else:
+                    # Lokale Kopie bleibt erhalten, damit die Konvertierung nicht verloren geht
+                    self.log(f"Übertragung endgültig fehlgeschlagen: {os.path.basename(output_file)} "
+                             f"(lokal erhalten: {work_file})")
+        return False
+
+    def shutdown(self):
+        """Wartet auf alle ausstehenden Uploads"""
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,83 @@
+import os
+from typing import Callable, List, Tuple
+
+from supervisor import get_supervisor
+
+
+class OutputVerifier:
+    """Prüft konvertierte Dateien auf Vollständigkeit und Dekodierbarkeit"""
+
+    def __init__(self, config, probe: Callable[[str], dict], log_callback=None):
+        self.config = config
+        self.probe = probe
+        self.log_callback = log_callback
+
+    def log(self, message: str):
+        """Sendet eine Log-Nachricht an den Callback"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def verify(self, source_info: dict, output_file: str) -> Tuple[bool, str]:
+        """Vergleicht die Ausgabe mit der Quelle und führt optional eine Dekodier-Prüfung durch"""
+        if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+            return False, "Ausgabedatei fehlt oder ist leer"
+
+        output_info = self.probe(output_file)
+        if not output_info:
+            return False, "Ausgabedatei kann nicht gelesen werden"
+
+        # Laufzeit vergleichen (Toleranz: 1% bzw. mindestens 0,5 Sekunden)
+        source_duration = source_info.get('duration', 0)
+        output_duration = output_info.get('duration', 0)
+        if source_duration > 0:
+            tolerance = max(0.5, source_duration * 0.01)
+            if abs(source_duration - output_duration) > tolerance:
+                return False, (f"Laufzeit weicht ab: {output_duration:.2f}s statt "
+                               f"{source_duration:.2f}s")
+
+        # Bildanzahl vergleichen, sofern beide Container sie angeben
+        source_frames = source_info.get('nb_frames', 0)
+        output_frames = output_info.get('nb_frames', 0)
+        if source_frames > 0 and output_frames > 0:
+            tolerance = max(2, int(source_frames * 0.01))
+            if abs(source_frames - output_frames) > tolerance:
+                return False, f"Bildanzahl weicht ab: {output_frames} statt {source_frames}"
+
+        if self.config.get("verify_decode_check", False):
+            return self.decode_check(output_file, output_duration)
+
+        return True, "OK"
+
+    def get_sample_points(self, duration: float, segments: int, segment_length: float) -> List[float]:
+        """Verteilt die Stichproben-Segmente gleichmäßig über die Laufzeit"""
+        if segments <= 0 or duration <= segment_length * segments:
+            return []
+        step = (duration - segment_length) / max(1, segments - 1)
+        return [round(i * step, 3) for i in range(segments)]
+
+    def decode_check(self, output_file: str, duration: float) -> Tuple[bool, str]:
+        """Dekodiert die Ausgabe (vollständig oder stichprobenartig) ohne sie zu schreiben"""
+        segments = int(self.config.get("verify_sample_segments", 3))
+        segment_length = float(self.config.get("verify_segment_seconds", 2))
+        sample_points = self.get_sample_points(duration, segments, segment_length)
+
+        # Ohne Stichproben (oder bei kurzen Dateien) wird die ganze Datei dekodiert
+        runs = [['-i', output_file]]
+        if sample_points:
+            runs = [['-ss', str(start), '-i', output_file, '-t', str(segment_length)]
+                    for start in sample_points]
+
+        for args in runs:
+            cmd = ['ffmpeg', '-v', 'error', '-nostdin'] + args + ['-map', '0:v:0', '-f', 'null', '-']
+            try:
+                result = get_supervisor().run(cmd, timeout=600, capture_stderr=True, group="verification")
+            except OSError as e:
+                return False, f"Dekodier-Prüfung fehlgeschlagen: {str(e)}"
+            if result.timed_out:
+                return False, "Dekodier-Prüfung fehlgeschlagen: Zeitlimit überschritten"
+            errors = result.stderr.strip()
+            if result.returncode != 0 or errors:
+                first_error = errors.splitlines()[0] if errors else f"Code: {result.returncode}"
+                return False, f"Dekodierfehler: {first_error}"
+
+        return True, "OK"